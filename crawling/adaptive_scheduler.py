@@ -0,0 +1,203 @@
+# adaptive_scheduler.py
+"""
+소스별 변경 빈도를 학습해 다음 폴링 시각을 정하는 적응형 스케줄 정책.
+
+- 크롤링 전/후 통합 CSV(*_unified.csv)의 id 집합을 비교해 이번 회차의 신규 id 수를 기록
+- 신규 발생을 포아송 과정으로 보고, 신규 건수·경과 시간의 EWMA로 변경률 λ(건/초)를 추정
+- 폴링 간격 I에서 '사본이 낡아 있는 시간 비율'의 기대값
+      staleness(I) = 1 - (1 - e^(-λI)) / (λI)
+  이 목표치(target_staleness) 이하가 되는 가장 긴 I 를 선택 → 목표를 지키는 최소 Tor 요청 수
+- 추정치는 outputs/adaptive_schedule_state.json, 결정 로그는 outputs/adaptive_schedule_log.jsonl
+
+`python3 adaptive_scheduler.py` 로 현재 추정치와 고정 주기 대비 절감량을 확인할 수 있습니다.
+"""
+
+import csv
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+STATE_PATH = Path("outputs/adaptive_schedule_state.json")
+DECISION_LOG_PATH = Path("outputs/adaptive_schedule_log.jsonl")
+
+
+def load_ids(csv_path: Path) -> Set[str]:
+    """통합 CSV의 id 컬럼 집합 (파일이 없으면 빈 집합)"""
+    if not Path(csv_path).is_file():
+        return set()
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with Path(csv_path).open("r", encoding="utf-8", newline="") as f:
+        return {row["id"] for row in csv.DictReader(f) if row.get("id")}
+
+
+def expected_staleness(rate: float, interval: float) -> float:
+    """변경률 rate(건/초), 폴링 간격 interval(초)에서 사본이 낡아 있는 시간 비율의 기대값"""
+    x = rate * interval
+    if x <= 1e-9:
+        return 0.0
+    return 1.0 - (1.0 - math.exp(-x)) / x
+
+
+def choose_interval(rate: float, target: float, min_interval: float, max_interval: float) -> float:
+    """staleness(I) <= target 를 만족하는 [min_interval, max_interval] 안의 가장 긴 I (이분 탐색)"""
+    if rate <= 0 or expected_staleness(rate, max_interval) <= target:
+        return max_interval
+    if expected_staleness(rate, min_interval) > target:
+        return min_interval
+    lo, hi = min_interval, max_interval
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if expected_staleness(rate, mid) <= target:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+class AdaptivePoller:
+    """
+    CrawlScheduler에 끼워 쓰는 폴링 정책.
+    before_run()으로 기존 id를 스냅샷하고, after_run()이 다음 실행까지의 지연(초)을 반환합니다.
+    """
+    def __init__(self,
+                 outputs: Dict[str, Path],
+                 target_staleness: float = 0.1,
+                 min_interval: float = 15 * 60,
+                 max_interval: float = 24 * 3600,
+                 alpha: float = 0.3,
+                 baseline_intervals: Optional[Dict[str, float]] = None,
+                 state_path: Path = STATE_PATH,
+                 log_path: Path = DECISION_LOG_PATH):
+        self.outputs = {k: Path(v) for k, v in outputs.items()}
+        self.target_staleness = target_staleness
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.baseline_intervals = baseline_intervals or {}
+        self.state_path = Path(state_path)
+        self.log_path = Path(log_path)
+        self.state: Dict[str, dict] = self._load_state()
+        self._snapshots: Dict[str, Set[str]] = {}
+
+    # ── 상태 저장 ──
+    def _load_state(self) -> Dict[str, dict]:
+        try:
+            with self.state_path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=4, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+    def _log_decision(self, record: dict):
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.log_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # ── 추정 ──
+    def rate(self, name: str) -> Optional[float]:
+        st = self.state.get(name)
+        if not st or not st.get("ewma_elapsed"):
+            return None
+        return st["ewma_new"] / st["ewma_elapsed"]
+
+    def before_run(self, name: str):
+        if name in self.outputs:
+            self._snapshots[name] = load_ids(self.outputs[name])
+
+    def after_run(self, name: str, rc: int, started: float) -> Optional[float]:
+        """
+        이번 회차 결과를 반영하고 다음 실행까지의 지연(초)을 반환합니다.
+        실패(rc != 0)했거나 관측할 출력이 없으면 None (→ 고정 스케줄 사용)
+        """
+        before = self._snapshots.pop(name, None)
+        if rc != 0 or before is None:
+            return None
+
+        new_ids = len(load_ids(self.outputs[name]) - before)
+        st = self.state.setdefault(name, {"ewma_new": 0.0, "ewma_elapsed": 0.0, "observations": 0})
+        last = st.get("last_crawl")
+        st["last_crawl"] = started
+
+        if last is not None and started > last:
+            elapsed = started - last
+            if st["observations"] == 0:
+                st["ewma_new"], st["ewma_elapsed"] = float(new_ids), elapsed
+            else:
+                a = self.alpha
+                st["ewma_new"] = a * new_ids + (1 - a) * st["ewma_new"]
+                st["ewma_elapsed"] = a * elapsed + (1 - a) * st["ewma_elapsed"]
+            st["observations"] += 1
+        else:
+            elapsed = None  # 첫 관측: 기준 시각만 기록
+
+        rate = self.rate(name)
+        if rate is None:
+            interval = self.baseline_intervals.get(name, self.min_interval)
+        else:
+            interval = choose_interval(rate, self.target_staleness, self.min_interval, self.max_interval)
+        st["interval"] = interval
+        self._save_state()
+
+        baseline = self.baseline_intervals.get(name)
+        self._log_decision({
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "source": name,
+            "new_ids": new_ids,
+            "elapsed_sec": round(elapsed, 1) if elapsed is not None else None,
+            "rate_per_hour": round(rate * 3600, 4) if rate is not None else None,
+            "interval_sec": round(interval, 1),
+            "expected_staleness": round(expected_staleness(rate or 0.0, interval), 4),
+            "target_staleness": self.target_staleness,
+            "polls_per_day": round(86400 / interval, 2),
+            "baseline_polls_per_day": round(86400 / baseline, 2) if baseline else None,
+        })
+        return interval
+
+    def summary(self) -> Dict[str, dict]:
+        out = {}
+        for name, st in self.state.items():
+            rate = self.rate(name)
+            interval = st.get("interval")
+            baseline = self.baseline_intervals.get(name)
+            out[name] = {
+                "observations": st.get("observations", 0),
+                "rate_per_hour": rate * 3600 if rate is not None else None,
+                "interval_sec": interval,
+                "expected_staleness": expected_staleness(rate or 0.0, interval) if interval else None,
+                "polls_per_day": 86400 / interval if interval else None,
+                "baseline_polls_per_day": 86400 / baseline if baseline else None,
+            }
+        return out
+
+
+def _fmt(v: Optional[float], spec: str) -> str:
+    return "-" if v is None else format(v, spec)
+
+
+def print_summary(poller: AdaptivePoller, last_n: int = 10):
+    """소스별 추정 변경률/선택된 간격과 고정 주기 대비 폴링 횟수, 최근 결정 로그를 출력합니다."""
+    print(f"{'source':<17} {'obs':>4} {'rate/h':>9} {'interval(m)':>11} {'stale':>7} {'polls/d':>8} {'fixed/d':>8}")
+    for name, s in poller.summary().items():
+        interval_min = s["interval_sec"] / 60 if s["interval_sec"] else None
+        print(f"{name:<17} {s['observations']:>4} {_fmt(s['rate_per_hour'], '.3f'):>9} "
+              f"{_fmt(interval_min, '.0f'):>11} {_fmt(s['expected_staleness'], '.3f'):>7} "
+              f"{_fmt(s['polls_per_day'], '.1f'):>8} {_fmt(s['baseline_polls_per_day'], '.1f'):>8}")
+    if poller.log_path.is_file():
+        lines = poller.log_path.read_text(encoding="utf-8").splitlines()[-last_n:]
+        print(f"\n최근 결정 {len(lines)}건 ({poller.log_path}):")
+        for line in lines:
+            print("  " + line)
+
+
+if __name__ == "__main__":
+    print_summary(AdaptivePoller(outputs={}, state_path=STATE_PATH, log_path=DECISION_LOG_PATH))
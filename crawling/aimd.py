@@ -0,0 +1,132 @@
+# aimd.py
+"""
+호스트별 AIMD(additive increase / multiplicative decrease) 동시성 제어.
+
+요청을 한꺼번에 쏟아내면 포럼의 DDoS 방어에 걸려 페이지 전체가 실패하므로,
+- 성공했고 지연이 건강하면(최근 기준 지연의 LATENCY_TOLERANCE배 이내) 동시성 상한을 요청 1개당 1/limit씩 올려
+  대략 "한 바퀴(상한만큼 완료)마다 +1"
+- 429/503, timeout, 챌린지 페이지면 상한을 절반으로 (같은 혼잡에서 한꺼번에 몰려온 실패로 여러 번 깎이지 않도록
+  감소는 최근 지연 중앙값의 DECREASE_RTTS배(최소 MIN_DECREASE_INTERVAL초)에 한 번만)
+- 그 밖의 오류(연결 거부 등)는 혼잡 신호가 아니므로 상한을 바꾸지 않음
+fetch.py의 Fetcher(adaptive_concurrency=True)가 호스트마다 하나씩 만들어 요청마다 slot()을 거칩니다.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional
+
+INITIAL_LIMIT = 2.0
+MIN_LIMIT = 1.0
+MAX_LIMIT = 16.0
+DECREASE_FACTOR = 0.5
+DECREASE_RTTS = 2.0         # 감소 후 (지연 중앙값 × 이 값) 안의 혼잡 신호는 같은 사건으로 봄
+MIN_DECREASE_INTERVAL = 0.5
+LATENCY_TOLERANCE = 3.0     # 지연이 기준(최근 하위 10%)의 이 배수를 넘으면 증가 보류
+LATENCY_WINDOW = 50
+THROUGHPUT_WINDOW = 60.0    # 처리량 계산 구간(초)
+
+log = logging.getLogger("aimd")
+
+
+class Slot:
+    """slot() 블록 안에서 결과를 알려주는 핸들. 아무것도 호출하지 않고 끝나면 중립(오류)으로 처리"""
+    def __init__(self):
+        self.outcome: Optional[str] = None
+        self.latency: Optional[float] = None
+
+    def success(self, latency: float):
+        self.outcome, self.latency = "ok", latency
+
+    def overload(self, reason: str):
+        self.outcome, self.latency = reason, None
+
+
+class AIMDLimiter:
+    """한 호스트의 동시 요청 상한. 같은 이벤트 루프 안에서만 사용"""
+    def __init__(self, name: str, initial: float = INITIAL_LIMIT,
+                 min_limit: float = MIN_LIMIT, max_limit: float = MAX_LIMIT):
+        self.name = name
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.inflight = 0
+        self.peak_limit = initial
+        self.decreases = 0
+        self._last_decrease: Optional[float] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._done: Deque[float] = deque()  # 성공 완료 시각 (처리량 계산용)
+        self._cond = asyncio.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    def throughput(self) -> float:
+        """최근 THROUGHPUT_WINDOW초 동안의 분당 성공 요청 수"""
+        now = time.monotonic()
+        while self._done and now - self._done[0] > THROUGHPUT_WINDOW:
+            self._done.popleft()
+        if not self._done:
+            return 0.0
+        span = max(now - self._done[0], 1.0)
+        return len(self._done) * 60.0 / span
+
+    def describe(self) -> str:
+        return (f"{self.name}: 동시성 {self.capacity} (상한 {self.limit:.1f}, 진행 {self.inflight}, "
+                f"최고 {self.peak_limit:.1f}, 감소 {self.decreases}회), 처리량 {self.throughput():.1f} req/min")
+
+    def _healthy(self, latency: float) -> bool:
+        if len(self._latencies) < 5:
+            return True
+        ordered = sorted(self._latencies)
+        baseline = ordered[len(ordered) // 10]
+        return latency <= baseline * LATENCY_TOLERANCE
+
+    def _decrease_interval(self) -> float:
+        if not self._latencies:
+            return MIN_DECREASE_INTERVAL
+        ordered = sorted(self._latencies)
+        return max(MIN_DECREASE_INTERVAL, ordered[len(ordered) // 2] * DECREASE_RTTS)
+
+    def _record(self, slot: Slot):
+        now = time.monotonic()
+        if slot.outcome == "ok":
+            healthy = self._healthy(slot.latency)
+            self._latencies.append(slot.latency)
+            self._done.append(now)
+            if healthy and self.inflight >= self.capacity:  # inflight에는 방금 끝난 요청도 포함
+                # 상한까지 채워 쓰고 있을 때만 늘림 (여유가 있는데 늘리면 의미 없이 커짐)
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+        elif slot.outcome is not None:
+            if self._last_decrease is None or now - self._last_decrease >= self._decrease_interval():
+                before = self.limit
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                self._last_decrease = now
+                self.decreases += 1
+                log.info(f"[AIMD] {self.name}: {slot.outcome} → 동시성 {before:.1f} → {self.limit:.1f}")
+
+    async def restore(self):
+        """혼잡이 아닌 원인(예: 챌린지 clearance 없음 → clearance.py가 해소)으로 깎인 상한을 최고치로 되돌림"""
+        if self.limit < self.peak_limit:
+            log.info(f"[AIMD] {self.name}: 동시성 복구 {self.limit:.1f} → {self.peak_limit:.1f}")
+            self.limit = self.peak_limit
+        async with self._cond:
+            self._cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.inflight < self.capacity)
+            self.inflight += 1
+        s = Slot()
+        try:
+            yield s
+        finally:
+            self._record(s)
+            async with self._cond:
+                self.inflight -= 1
+                self._cond.notify_all()
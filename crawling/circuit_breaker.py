@@ -0,0 +1,146 @@
+# circuit_breaker.py
+"""
+호스트별 circuit breaker: 일시적인 네트워크 장애에 실행 전체를 끝내지 않고 기다렸다가 스스로 재개합니다.
+
+- closed: 정상. 요청 실패(재시도까지 끝난 뒤)가 보고되면 open
+- open: backoff 동안 그 호스트로 요청하지 않음. backoff는 BASE부터 연속 실패마다 2배(최대 MAX), 절반~전체 사이 지터
+- half-open: backoff가 끝나면 probe(예: onion_prober SOCKS CONNECT)로 먼저 확인하고, 통과하면 실제 요청 1회(시험 요청)만 허용.
+  다른 호출은 그 결과(success/failure)를 기다림 → 성공하면 closed로 함께 진행, 실패하면 더 긴 backoff로 다시 open.
+  시험 요청이 결과를 보고하지 않은 채(다른 예외 등) TRIAL_WAIT초가 지나면 기다리던 호출 하나가 시험 요청을 맡음
+- 첫 실패부터 hard_limit초가 지나도 회복하지 않으면 BreakerExhausted → 호출 측이 상태를 저장하고 중지
+  (hard_limit=0 이면 첫 실패에서 바로 중지, None이면 무제한 대기)
+
+    breaker = CircuitBreaker(host, probe=lambda: onion_prober.probe_and_record(url))
+    while True:
+        await breaker.before_request()
+        try:
+            result = await fetch(url)
+        except NETWORK_ERRORS as e:
+            breaker.failure(e)   # hard limit을 넘었으면 BreakerExhausted
+            continue
+        breaker.success()
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+BASE_BACKOFF = 30.0
+MAX_BACKOFF = 15 * 60.0
+HARD_LIMIT = 6 * 3600.0
+TRIAL_WAIT = 120.0  # half-open 시험 요청 결과를 기다리는 최대 시간(초)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+log = logging.getLogger("circuit_breaker")
+
+
+class BreakerExhausted(Exception):
+    """hard limit 동안 회복하지 않아 더 기다리지 않음"""
+
+
+class CircuitBreaker:
+    """호스트 하나의 장애 상태. 같은 이벤트 루프 안에서만 사용"""
+    def __init__(self, name: str,
+                 probe: Optional[Callable[[], Awaitable[bool]]] = None,
+                 base_backoff: float = BASE_BACKOFF,
+                 max_backoff: float = MAX_BACKOFF,
+                 hard_limit: Optional[float] = HARD_LIMIT):
+        self.name = name
+        self.probe = probe
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hard_limit = hard_limit
+        self.state = CLOSED
+        self.trips = 0                           # 이번 장애에서 open된 횟수 (backoff 지수)
+        self.total_trips = 0
+        self.failing_since: Optional[float] = None
+        self.open_until = 0.0
+        self._lock = asyncio.Lock()
+        self._trial: Optional[asyncio.Event] = None  # half-open 시험 요청이 진행 중이면 그 결과 알림
+
+    def _remaining(self) -> Optional[float]:
+        if self.hard_limit is None or self.failing_since is None:
+            return None
+        return self.hard_limit - (time.monotonic() - self.failing_since)
+
+    def _check_hard_limit(self, reason: str):
+        remaining = self._remaining()
+        if remaining is not None and remaining <= 0:
+            raise BreakerExhausted(f"{self.name}: {self.hard_limit:.0f}초 동안 회복하지 않음 (마지막 오류: {reason})")
+
+    def _settle_trial(self):
+        if self._trial is not None:
+            self._trial.set()
+            self._trial = None
+
+    def _trip(self, reason: str):
+        self.trips += 1
+        self.total_trips += 1
+        base = min(self.max_backoff, self.base_backoff * 2 ** (self.trips - 1))
+        backoff = base / 2 + random.uniform(0, base / 2)
+        self.state = OPEN
+        self.open_until = time.monotonic() + backoff
+        log.warning(f"[breaker] {self.name}: open ({reason}) → {backoff:.0f}초 후 재확인 (연속 {self.trips}회)")
+
+    def failure(self, error):
+        """요청 실패 보고. 장애가 hard limit을 넘었으면 BreakerExhausted"""
+        reason = str(error) or type(error).__name__
+        if self.failing_since is None:
+            self.failing_since = time.monotonic()
+        try:
+            self._check_hard_limit(reason)
+            self._trip(reason)
+        finally:
+            self._settle_trial()
+
+    def success(self):
+        if self.failing_since is not None:
+            log.info(f"[breaker] {self.name}: 회복 → closed "
+                     f"(장애 {time.monotonic() - self.failing_since:.0f}초, open {self.trips}회)")
+        self.state = CLOSED
+        self.trips = 0
+        self.failing_since = None
+        self._settle_trial()
+
+    async def before_request(self):
+        """
+        open이면 backoff가 끝날 때까지 기다리고 probe로 확인 (실패하면 다시 open 후 반복).
+        probe를 통과하면 이 호출이 시험 요청이 되고, 그동안 다른 호출은 시험 요청의 결과를 기다렸다가 다시 판단합니다.
+        """
+        while True:
+            async with self._lock:
+                trial = self._trial
+                if trial is None:
+                    await self._await_closed_or_trial()
+                    return
+            try:
+                await asyncio.wait_for(trial.wait(), TRIAL_WAIT)
+            except asyncio.TimeoutError:
+                if self._trial is trial:  # 결과 보고 없이 끝난 시험 요청 → 다음 호출이 다시 시험
+                    log.warning(f"[breaker] {self.name}: 시험 요청 결과 없음 ({TRIAL_WAIT:.0f}초) → 다시 시험")
+                    self._trial = None
+
+    async def _await_closed_or_trial(self):
+        """(lock 안) closed면 그대로, open이면 backoff/probe 후 이 호출을 시험 요청으로 지정"""
+        if self.state == CLOSED:
+            return
+        while self.state == OPEN:
+            wait = self.open_until - time.monotonic()
+            remaining = self._remaining()
+            if remaining is not None:
+                wait = min(wait, remaining)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._check_hard_limit("backoff 중 hard limit 도달")
+            self.state = HALF_OPEN
+            if self.probe is not None and not await self.probe():
+                self._trip("probe 실패")
+                continue
+        self._trial = asyncio.Event()
+        log.info(f"[breaker] {self.name}: half-open → 요청 1회로 확인 (나머지 요청은 결과를 기다림)")
+
+    def describe(self) -> str:
+        return f"{self.name}: {self.state} (이번 장애 open {self.trips}회, 누적 {self.total_trips}회)"
@@ -0,0 +1,224 @@
+# clearance.py
+"""
+DDoS 방어/챌린지 페이지의 clearance(쿠키 + User-Agent)를 브라우저 세션에서 한 번 받아 httpx 크롤러에 넘겨줍니다.
+
+httpx 크롤러는 챌린지를 풀 수 없으므로, 챌린지를 받으면
+1. 그 호스트로 가는 요청을 멈추고 (wait()에서 대기)
+2. 다른 프로세스가 그사이 저장한 clearance가 있으면 그것을, 없으면 SafeWebDriver(crawler_selenium_darkforums.py)로
+   같은 URL을 열어 챌린지를 통과 (인증 문구면 check_for_verification이 사람 입력을 기다리고,
+   JS 챌린지면 페이지가 바뀔 때까지 대기)
+3. 브라우저의 쿠키와 navigator.userAgent를 Fetcher의 AsyncClient에 넣고 (쿠키는 UA에 묶여 있으므로 UA도 교체)
+   AIMD 상한을 챌린지 이전 최고치로 되돌린 뒤 요청 재개 → 이후는 다시 비동기 속도로 진행
+- 받은 clearance는 outputs/clearance/<호스트>.json 에 저장해 다음 실행/다른 크롤러도 사용 (MAX_AGE까지)
+- CRAWL_CLEARANCE: auto(기본, 터미널에서 실행할 때만 브라우저) | browser | saved(저장본만) | 0(끔)
+  러너/cron처럼 사람이 없는 실행은 `python3 clearance.py <URL>` 로 미리 받아 둔 저장본을 사용
+- 한 실행에서 호스트당 브라우저 해결은 MAX_SOLVES회까지, 실패하면 그 실행에서는 더 시도하지 않음
+
+    clearance = ClearanceManager(fetcher, is_challenge=lambda html: "checking your browser" in html.lower())
+    generation = await clearance.wait(url)
+    response = await fetcher.get(url)
+    if is_challenge(response) and await clearance.solve(url, generation):
+        ...  # 새 clearance로 다시 요청
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import tor_circuits
+import tracing
+
+CLEARANCE_DIR = Path("outputs/clearance")
+MODE_ENV = "CRAWL_CLEARANCE"
+MODES = ("auto", "browser", "saved", "off")
+MAX_AGE = 6 * 3600            # 저장본을 쓰는 최대 기간(초). 보통 clearance 쿠키 수명보다 짧게
+MAX_SOLVES = 3                # 한 실행에서 호스트당 브라우저 해결 횟수 상한
+BROWSER_TIMEOUT = 10 * 60     # 브라우저에서 챌린지가 풀리기를 기다리는 최대 시간(초)
+
+log = logging.getLogger("clearance")
+
+
+def mode() -> str:
+    value = os.environ.get(MODE_ENV, "auto").strip().lower()
+    if value in ("0", "false", "no", "off"):
+        return "off"
+    if value not in MODES:
+        return "auto"
+    if value == "auto":
+        return "browser" if sys.stdin is not None and sys.stdin.isatty() else "saved"
+    return value
+
+
+@dataclasses.dataclass
+class Clearance:
+    """브라우저 세션에서 가져온 쿠키와 User-Agent"""
+    host: str
+    user_agent: str
+    cookies: List[Dict[str, str]]     # name, value, domain, path
+    obtained_at: float
+
+    def fresh(self, max_age: float = MAX_AGE) -> bool:
+        return time.time() - self.obtained_at < max_age
+
+    def path(self, root: Path = CLEARANCE_DIR) -> Path:
+        return Path(root) / f"{self.host}.json"
+
+    def save(self, root: Path = CLEARANCE_DIR):
+        path = self.path(root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(dataclasses.asdict(self), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, host: str, root: Path = CLEARANCE_DIR) -> Optional["Clearance"]:
+        try:
+            return cls(**json.loads((Path(root) / f"{host}.json").read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+
+
+def _socks_hostport() -> str:
+    port = (os.environ.get(tor_circuits.PORTS_ENV) or tor_circuits.DEFAULT_PORT).split(",")[0].strip()
+    return f"127.0.0.1:{port}"
+
+
+def browser_clearance(url: str, is_challenge: Callable[[str], bool],
+                      timeout: float = BROWSER_TIMEOUT) -> Clearance:
+    """
+    SafeWebDriver로 url을 열어 챌린지를 통과한 뒤 쿠키/UA를 가져옵니다 (블로킹, selenium 필요).
+    .onion은 Tor SOCKS 프록시를 거치고, 제한 시간 안에 챌린지가 풀리지 않으면 TimeoutError.
+    """
+    # selenium/webdriver_manager가 있는 환경에서만 필요하므로 호출 시점에 import
+    import crawler_selenium_darkforums as selenium_crawler
+
+    host = urlsplit(url).hostname or ""
+    proxy = _socks_hostport() if host.endswith(".onion") else None
+    service = selenium_crawler.Service(selenium_crawler.ChromeDriverManager().install())
+    with selenium_crawler.SafeWebDriver(service=service, options=selenium_crawler.chrome_options(proxy)) as driver:
+        driver.get(url)  # 인증 문구가 보이면 check_for_verification이 사람 입력을 기다림
+        deadline = time.monotonic() + timeout
+        while is_challenge(driver.page_source):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{host}: {timeout:.0f}초 안에 챌린지가 풀리지 않음")
+            time.sleep(2)
+        cookies = [{"name": c["name"], "value": c["value"],
+                    "domain": c.get("domain", host), "path": c.get("path", "/")}
+                   for c in driver.get_cookies()]
+        user_agent = driver.execute_script("return navigator.userAgent")
+    return Clearance(host, user_agent, cookies, time.time())
+
+
+class ClearanceManager:
+    """Fetcher 하나에 붙는 호스트별 clearance 상태. 같은 이벤트 루프 안에서만 사용"""
+    def __init__(self, fetcher, is_challenge: Callable[[str], bool],
+                 provider: Optional[Callable[[str, Callable[[str], bool]], Clearance]] = None,
+                 mode_: Optional[str] = None, max_solves: int = MAX_SOLVES, root: Path = CLEARANCE_DIR):
+        self.fetcher = fetcher
+        self.is_challenge = is_challenge
+        self.provider = provider or browser_clearance
+        self.mode = "off" if fetcher.replay else (mode_ or mode())
+        self.max_solves = max_solves
+        self.root = Path(root)
+        self.solves: Dict[str, int] = {}
+        self.applied: Dict[str, float] = {}        # 호스트 → 적용한 clearance의 obtained_at
+        self._generation: Dict[str, int] = {}
+        self._gates: Dict[str, asyncio.Event] = {}
+        self._checked: Set[str] = set()
+        self._failed: Set[str] = set()
+
+    def _gate(self, host: str) -> asyncio.Event:
+        gate = self._gates.get(host)
+        if gate is None:
+            gate = self._gates[host] = asyncio.Event()
+            gate.set()
+        return gate
+
+    def _apply(self, clearance: Clearance):
+        client = self.fetcher.client
+        for c in clearance.cookies:
+            client.cookies.set(c["name"], c["value"], domain=c.get("domain") or clearance.host, path=c.get("path") or "/")
+        client.headers["User-Agent"] = clearance.user_agent
+        self.applied[clearance.host] = clearance.obtained_at
+        self._generation[clearance.host] = self._generation.get(clearance.host, 0) + 1
+
+    def _load_newer(self, host: str) -> Optional[Clearance]:
+        saved = Clearance.load(host, self.root)
+        if saved is None or not saved.fresh() or saved.obtained_at <= self.applied.get(host, 0):
+            return None
+        return saved
+
+    async def wait(self, url: str) -> int:
+        """요청 전에 호출: 그 호스트의 clearance를 받는 중이면 끝날 때까지 대기. 현재 세대 번호를 반환"""
+        host = urlsplit(url).hostname or ""
+        if self.mode != "off" and host not in self._checked:
+            self._checked.add(host)
+            saved = self._load_newer(host)
+            if saved is not None:
+                log.info(f"[clearance] {host}: 저장된 clearance 사용 ({time.time() - saved.obtained_at:.0f}초 전)")
+                self._apply(saved)
+        await self._gate(host).wait()
+        return self._generation.get(host, 0)
+
+    async def solve(self, url: str, generation: int) -> bool:
+        """
+        챌린지를 받은 요청이 호출. 새 clearance를 적용했으면(다른 요청이 먼저 받은 경우 포함) True → 다시 요청,
+        받을 수 없으면 False (호출 측은 기존처럼 챌린지 오류로 처리)
+        """
+        host = urlsplit(url).hostname or ""
+        gate = self._gate(host)
+        if not gate.is_set() or self._generation.get(host, 0) != generation:
+            await gate.wait()
+            return self._generation.get(host, 0) != generation
+        if self.mode == "off":
+            return False
+
+        gate.clear()  # 이 호스트로 가는 새 요청은 wait()에서 멈춤
+        try:
+            with tracing.span("clearance", host=host) as sp:
+                clearance = await asyncio.to_thread(self._load_newer, host)
+                source = "saved"
+                if clearance is None:
+                    if self.mode != "browser" or host in self._failed or self.solves.get(host, 0) >= self.max_solves:
+                        sp.set(source="unavailable")
+                        log.warning(f"[clearance] {host}: 챌린지 페이지 — 사용할 clearance 없음 "
+                                    f"({MODE_ENV}={self.mode}; 사람이 있을 때 `python3 clearance.py {url}`)")
+                        return False
+                    self.solves[host] = self.solves.get(host, 0) + 1
+                    log.warning(f"[clearance] {host}: 챌린지 페이지 — 요청을 멈추고 브라우저로 clearance를 받습니다")
+                    try:
+                        clearance = await asyncio.to_thread(self.provider, url, self.is_challenge)
+                    except Exception as e:
+                        self._failed.add(host)
+                        sp.set(source="browser")
+                        sp.set_error(e)
+                        log.error(f"[clearance] {host}: 브라우저에서 clearance 받기 실패: {e}")
+                        return False
+                    source = "browser"
+                    await asyncio.to_thread(clearance.save, self.root)
+                sp.set(source=source, cookies=len(clearance.cookies))
+                self._apply(clearance)
+                if self.fetcher.adaptive_concurrency:
+                    await self.fetcher.limiter(host).restore()
+                log.info(f"[clearance] {host}: clearance 적용 ({source}, 쿠키 {len(clearance.cookies)}개) → 요청 재개")
+                return True
+        finally:
+            gate.set()
+
+
+if __name__ == "__main__":
+    # 사람이 있을 때 미리 clearance를 받아 저장 (러너/cron 실행은 이 저장본을 사용)
+    if len(sys.argv) < 2:
+        sys.exit("usage: python3 clearance.py <URL>")
+    from crawler_beautifulsoup_darkforums import is_challenge_html
+
+    result = browser_clearance(sys.argv[1], is_challenge_html)
+    result.save()
+    print(f"[clearance] 저장: {result.path()} (쿠키 {len(result.cookies)}개, UA {result.user_agent})")
@@ -0,0 +1,225 @@
+# crawl_metrics.py
+"""
+크롤러 내부 지표(가져온 페이지 수, 오류 수, 요청 지연 시간) 수집.
+
+크롤러는 요청마다 observe_fetch(latency, ok, host)를, 파싱/저장 오류마다 count_error()를 호출합니다.
+host를 주면 호스트별 지연 히스토그램(경계는 tracing.LATENCY_BUCKETS_MS)에도 누적합니다.
+받은 바이트 수는 observe_bytes(n), HTTP 캐시(http_cache.py) 조회 결과는 observe_cache(hit, fresh)로 누적합니다
+(fresh=요청 없이 TTL 안 저장본을 쓴 경우. 이 요청은 observe_fetch에 잡히지 않으므로 pages에 들어가지 않음).
+with span("parse") as sp: / with span("write") as sp: 로 구간별 시간을 누적합니다 (요청 시간은 "fetch" 구간에 자동 누적).
+with thread_cpu(): 블록 동안 현재 스레드가 쓴 CPU 시간을 누적합니다 (profiling.run이 크롤러 main을 감쌀 때 사용.
+in-process 모드에서 러너 프로세스 전체가 아닌 크롤러별 CPU를 얻는 유일한 값).
+같은 블록이 tracing.py의 span으로도 기록되며(트레이싱이 켜져 있을 때), sp.set(elements=..., rows=...)로 속성을 붙입니다.
+- in-process 모드: 러너가 실행마다 CrawlMetrics를 만들어 태스크 컨텍스트(_CURRENT)에 설정
+- subprocess 모드: 러너가 CRAWL_METRICS_EMIT=1 로 띄우면 프로세스 종료 시
+  "##CRAWL_METRICS {json}" 한 줄을 stdout에 출력하고, 러너의 _read_stream이 이를 읽어 반영
+- 둘 다 아니면(단독 실행) 아무것도 하지 않음
+"""
+
+import atexit
+import contextlib
+import contextvars
+import dataclasses
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import tracing
+
+METRICS_PREFIX = "##CRAWL_METRICS "
+EMIT_ENV = "CRAWL_METRICS_EMIT"
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """정렬된 값의 q 분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+@dataclasses.dataclass
+class CrawlMetrics:
+    """크롤러 1회 실행 동안의 요청/오류 집계"""
+    pages: int = 0          # 성공한 요청 수
+    errors: int = 0         # 실패한 요청 + 파싱/저장 오류
+    latencies: List[float] = dataclasses.field(default_factory=list)  # 요청 지연(초)
+    spans: Dict[str, List[float]] = dataclasses.field(default_factory=dict)  # 구간 이름 → [횟수, 누적 초]
+    bytes_fetched: int = 0  # 네트워크로 받은 응답 바이트 (압축된 전송 크기)
+    cache_lookups: int = 0  # 캐시 대상 요청 수
+    cache_hits: int = 0     # 그중 저장본을 쓴 수 (TTL 안 또는 304)
+    cache_fresh_hits: int = 0  # 그중 요청 없이 TTL 안 저장본을 쓴 수
+    # 호스트 → [구간별 개수 (LATENCY_BUCKETS_MS 각 경계 이하, 마지막은 초과), 누적 초]
+    host_latency: Dict[str, list] = dataclasses.field(default_factory=dict)
+    thread_cpu_sec: Optional[float] = None  # thread_cpu()로 잰 스레드 CPU 시간 (user+sys)
+    profile_files: List[str] = dataclasses.field(default_factory=list)   # profiling.py가 남긴 파일
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def observe_fetch(self, latency: float, ok: bool = True, host: Optional[str] = None):
+        with self._lock:
+            self.latencies.append(latency)
+            if ok:
+                self.pages += 1
+            else:
+                self.errors += 1
+            if host:
+                h = self.host_latency.setdefault(host, [[0] * (len(tracing.LATENCY_BUCKETS_MS) + 1), 0.0])
+                ms = latency * 1000
+                h[0][next((i for i, le in enumerate(tracing.LATENCY_BUCKETS_MS) if ms <= le),
+                          len(tracing.LATENCY_BUCKETS_MS))] += 1
+                h[1] += latency
+        self.add_span("fetch", latency)
+
+    def add_span(self, name: str, seconds: float):
+        with self._lock:
+            s = self.spans.setdefault(name, [0, 0.0])
+            s[0] += 1
+            s[1] += seconds
+
+    def add_thread_cpu(self, seconds: float):
+        with self._lock:
+            self.thread_cpu_sec = (self.thread_cpu_sec or 0.0) + seconds
+
+    def count_error(self, n: int = 1):
+        with self._lock:
+            self.errors += n
+
+    def observe_bytes(self, n: int):
+        with self._lock:
+            self.bytes_fetched += n
+
+    def observe_cache(self, hit: bool, fresh: bool = False):
+        with self._lock:
+            self.cache_lookups += 1
+            if hit:
+                self.cache_hits += 1
+                if fresh:
+                    self.cache_fresh_hits += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            lat = sorted(self.latencies)
+            pages, errors = self.pages, self.errors
+            spans = {k: {"count": c, "total_sec": round(t, 4)} for k, (c, t) in self.spans.items()}
+            profile_files = list(self.profile_files)
+            bytes_fetched, lookups, hits = self.bytes_fetched, self.cache_lookups, self.cache_hits
+            fresh_hits = self.cache_fresh_hits
+            thread_cpu_sec = self.thread_cpu_sec
+            host_latency = {host: {"buckets": list(counts), "count": sum(counts), "sum_sec": round(total, 4)}
+                            for host, (counts, total) in self.host_latency.items()}
+
+        def ms(v):
+            return round(v * 1000, 1) if v is not None else None
+
+        return {
+            "pages": pages,
+            "errors": errors,
+            "requests": len(lat),
+            "latency_p50_ms": ms(percentile(lat, 0.50)),
+            "latency_p90_ms": ms(percentile(lat, 0.90)),
+            "latency_p99_ms": ms(percentile(lat, 0.99)),
+            "spans": spans,
+            "profile_files": profile_files,
+            "bytes_fetched": bytes_fetched,
+            "cache_lookups": lookups,
+            "cache_hit_rate": round(hits / lookups, 4) if lookups else None,
+            "cache_fresh_rate": round(fresh_hits / lookups, 4) if lookups else None,
+            "latency_buckets_ms": list(tracing.LATENCY_BUCKETS_MS),
+            "host_latency": host_latency,
+            "thread_cpu_sec": round(thread_cpu_sec, 4) if thread_cpu_sec is not None else None,
+        }
+
+
+_CURRENT: contextvars.ContextVar[Optional[CrawlMetrics]] = contextvars.ContextVar("crawl_metrics", default=None)
+_process_metrics: Optional[CrawlMetrics] = None
+_process_lock = threading.Lock()
+
+
+def install(metrics: CrawlMetrics):
+    """현재 컨텍스트(러너가 띄운 크롤러 태스크)에 수집기를 설정합니다."""
+    _CURRENT.set(metrics)
+
+
+def current() -> Optional[CrawlMetrics]:
+    global _process_metrics
+    m = _CURRENT.get()
+    if m is not None or not os.environ.get(EMIT_ENV):
+        return m
+    with _process_lock:
+        if _process_metrics is None:
+            _process_metrics = CrawlMetrics()
+            atexit.register(emit, _process_metrics)
+        return _process_metrics
+
+
+def observe_fetch(latency: float, ok: bool = True, host: Optional[str] = None):
+    m = current()
+    if m is not None:
+        m.observe_fetch(latency, ok, host)
+
+
+def count_error(n: int = 1):
+    m = current()
+    if m is not None:
+        m.count_error(n)
+
+
+def observe_bytes(n: int):
+    m = current()
+    if m is not None:
+        m.observe_bytes(n)
+
+
+def observe_cache(hit: bool, fresh: bool = False):
+    m = current()
+    if m is not None:
+        m.observe_cache(hit, fresh)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    블록 실행 시간을 현재 수집기의 name 구간에 누적하고 trace span으로도 기록합니다
+    (수집기가 없으면 누적 생략, 트레이싱이 꺼져 있으면 속성 설정은 무시됨).
+    """
+    m = current()
+    with tracing.span(name, **attributes) as sp:
+        if m is None:
+            yield sp
+            return
+        t0 = time.perf_counter()
+        try:
+            yield sp
+        finally:
+            m.add_span(name, time.perf_counter() - t0)
+
+
+@contextlib.contextmanager
+def thread_cpu():
+    """블록 동안 현재 스레드가 쓴 CPU 시간(time.thread_time)을 현재 수집기에 누적합니다."""
+    m = current()
+    t0 = time.thread_time()
+    try:
+        yield
+    finally:
+        if m is not None:
+            m.add_thread_cpu(time.thread_time() - t0)
+
+
+def emit(metrics: CrawlMetrics):
+    print(METRICS_PREFIX + json.dumps(metrics.summary()), flush=True)
+
+
+def parse_line(text: str) -> Optional[dict]:
+    """러너 쪽: 크롤러 출력 한 줄이 지표 줄이면 dict, 아니면 None"""
+    if not text.startswith(METRICS_PREFIX):
+        return None
+    try:
+        return json.loads(text[len(METRICS_PREFIX):])
+    except json.JSONDecodeError:
+        return None
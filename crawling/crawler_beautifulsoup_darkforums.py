@@ -1,20 +1,31 @@
 import csv
 import re
-import platform
 import asyncio
 import httpx
 import sys
 import logging
 import json
 import dataclasses
+import os
+import time
 from pathlib import Path
 from zoneinfo import ZoneInfo
 from datetime import datetime, timedelta, timezone
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urlsplit
 from typing import Set, List, Dict, Any, Tuple, Optional
 from abc import ABC, abstractmethod
 
+import crawl_metrics
+import html_backend
+import http_cache
+from circuit_breaker import BreakerExhausted, CircuitBreaker
+from clearance import ClearanceManager
+import onion_prober
+import profiling
+import run_history
+from fetch import TOR_PROXY, Fetcher
+from parse_pool import ParsePool
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,13 +35,12 @@ logging.basicConfig(
 
 BASE_URL = "http://qeei4m7a2tve6ityewnezvcnf647onsqbmdbmlcw4y5pr6uwwfwa35yd.onion/"
 OUTPUT_DIR = "outputs"
+# Tor 경유 확인 API (DARKFORUMS_TOR_CHECK_URL 로 교체 가능: testbed.py 대역 서버는 http)
+TOR_CHECK_URL = os.environ.get("DARKFORUMS_TOR_CHECK_URL", "https://check.torproject.org/api/ip")
 OUTPUT_FILENAME = "dark_forums_unified.csv"
 STATE_FILENAME = "crawl_state.json"
 
-# Tor 프록시 설정 (Windows의 Tor Browser 기본 포트: 9150, macOS/Linux: 9050)
-PORT = "9150" if platform.system() == "Windows" else "9050"
-TOR_PROXY = f"socks5h://127.0.0.1:{PORT}"
-HTTPX_TRANSPORT = httpx.AsyncHTTPTransport(retries=3, proxy=TOR_PROXY, verify=False)
+# Tor 프록시/연결 풀/재시도/Tor 예산은 공통 수집 계층(fetch.py)이 담당
 
 TARGET_FORUMS = {
     # Home
@@ -133,6 +143,30 @@ MAX_PAGES_PER_FORUM = None # 예: 3 페이지로 제한
 DUPLICATION_KEEP_SEARCH = False
 # ---
 
+# --- 네트워크 장애 시 circuit breaker 설정 (circuit_breaker.py) ---
+# 목록 페이지 요청이 (재시도 후에도) 연결 오류/timeout이면 그 호스트를 잠시 멈추고, backoff 후 probe로 확인해 이어서 진행
+BREAKER_BASE_BACKOFF = 30          # 첫 대기(초). 연속 실패마다 2배 (지터 포함)
+BREAKER_MAX_BACKOFF = 15 * 60      # 대기 상한(초)
+# 장애가 이 시간(초) 넘게 이어지면 진행 상황을 저장하고 중지 (수동 재시작). 0이면 첫 장애에서 바로 중지
+BREAKER_HARD_LIMIT = float(os.environ.get("DARKFORUMS_BREAKER_HARD_LIMIT", 6 * 3600))
+NETWORK_ERRORS = (httpx.RemoteProtocolError, httpx.ConnectError, httpx.TimeoutException)
+# ---
+
+# --- 동시성 설정 ---
+# 동시 요청 수 상한 (연결 수 + AIMD 상한). 파싱 워커 수/방식은 parse_pool.py의 CRAWL_PARSE_* 환경 변수로 따로 조정
+FETCH_CONCURRENCY = int(os.environ.get("DARKFORUMS_FETCH_CONCURRENCY", 16))
+# 게시물 페이지는 두 번째 글이 시작하기 전까지만 파싱 (답글/서명/사이드바는 트리로 만들지 않음). 0이면 페이지 전체
+TARGETED_PARSE = os.environ.get("DARKFORUMS_TARGETED_PARSE", "1").strip().lower() not in {"0", "false", "no"}
+# ---
+
+# DDoS 방어/챌린지 페이지 판별 문구 (응답 앞부분 소문자 기준). 걸리면 동시성 절반(aimd.py) 후 재시도,
+# 그래도 챌린지면 브라우저 세션의 clearance를 받아 이어서 진행 (clearance.py)
+CHALLENGE_MARKERS = (
+    "ddos protection", "ddos-guard", "checking your browser", "just a moment...",
+    "you are in queue", "please complete the security check",
+    "verification requested",  # selenium 크롤러의 check_for_verification이 기다리는 인증 페이지
+)
+
 UNIFIED_HEADERS = [
     "source", "record_type", "id", "company", "website", "country", "address",
     "size_bytes", "size_gib", "is_published", "time_until_publication",
@@ -149,6 +183,20 @@ class CriticalCrawlStop(Exception):
     pass
 
 
+class ChallengePageError(httpx.HTTPStatusError):
+    """재시도 후에도 게시물 대신 DDoS 방어/챌린지 페이지를 받은 경우 (HTTP 오류로 집계)"""
+    pass
+
+
+def is_challenge_html(html: str) -> bool:
+    head = html[:4096].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def is_challenge_page(response: httpx.Response) -> bool:
+    return is_challenge_html(response.text)
+
+
 @dataclasses.dataclass
 class PageCrawlResult:
     """_crawl_page 메서드의 크롤링 결과(상태)를 담는 데이터 클래스"""
@@ -188,22 +236,27 @@ def load_existing_urls_from_csv(csv_path: Path) -> Set[str]:
         logging.error(f"CSV 파일 읽기 중 오류 발생: {e}. 빈 set으로 시작합니다.")
         return set()
 
-def save_to_csv(data_list: List[Dict[str, Any]], out_dir: str = OUTPUT_DIR, filename: str = OUTPUT_FILENAME):
+def save_to_csv(data_list: List[Dict[str, Any]], out_dir: str = OUTPUT_DIR, filename: str = OUTPUT_FILENAME) -> int:
+    """CSV에 행을 추가하고 추가한 바이트 수를 반환합니다 (실패하면 0)."""
     if not data_list:
-        return
+        return 0
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
     csv_path = out_path / filename
     file_exists = csv_path.is_file()
     try:
         with csv_path.open('a', newline='', encoding='utf-8') as f:
+            start = f.tell()
             writer = csv.DictWriter(f, fieldnames=UNIFIED_HEADERS)
             if not file_exists:
                 writer.writeheader()
             writer.writerows(data_list)
+            written = f.tell() - start
         logging.info(f"[+] {len(data_list)}개 게시물 정보를 '{csv_path}'에 추가했습니다.")
+        return written
     except Exception as e:
         logging.error(f"CSV 파일 저장 중 오류 발생: {e}")
+        return 0
 
     
 def convert_to_iso_utc(input_str: str) -> str:
@@ -296,6 +349,95 @@ def clear_crawl_state():
     except IOError as e:
         logging.error(f"상태 파일 삭제 실패: {e}")
 
+# --- HTML 파싱 (html 문자열 → 필드. 백엔드는 html_backend.py) ---
+
+def _last_page_number(doc) -> Optional[int]:
+    """게시판 목록의 페이지네이션에서 마지막 페이지 번호 (찾지 못하면 None)"""
+    page_tag = doc.select_one("div.pagination")
+    if not page_tag:
+        return None
+    last_link_tag = page_tag.select_one("a.pagination_last")
+    if last_link_tag:
+        try: return int(last_link_tag.text())
+        except (ValueError, TypeError): pass
+    page_links = page_tag.select("a.pagination_page")
+    if page_links:
+        try: return int(page_links[-1].text())
+        except (ValueError, TypeError, IndexError): pass
+    return None
+
+
+def parse_listing_page(html: str, backend: Optional[str] = None) -> Tuple[List[str], Optional[int]]:
+    """게시판 목록 페이지 → (게시물 링크 href 목록, 마지막 페이지 번호 또는 None)"""
+    doc = html_backend.parse(html, backend)
+    hrefs = [href for tag in doc.select("span[id^='tid_'] a") if (href := tag.attr("href")) is not None]
+    return hrefs, _last_page_number(doc)
+
+
+_POSTS_CONTAINER = re.compile(r"""\bid\s*=\s*["']?posts["'\s>]""", re.I)
+_POST_START = re.compile(r"""<div\b[^>]*\bid\s*=\s*["']?post_\d+""", re.I)  # MyBB: <div class="post classic" id="post_123">
+
+
+def first_post_prefix(html: str) -> str:
+    """게시물 페이지 html에서 두 번째 게시물이 시작하기 전까지 (게시물이 하나뿐이거나 구조가 다르면 전체)"""
+    container = _POSTS_CONTAINER.search(html)
+    first = _POST_START.search(html, container.end()) if container else None
+    second = _POST_START.search(html, first.end()) if first else None
+    return html[:second.start()] if second else html
+
+
+def parse_post_details(html: str, post_url: str, backend: Optional[str] = None,
+                       full: Optional[bool] = None) -> Optional[Dict[str, str]]:
+    """
+    게시물 상세 페이지 → 첫 번째 게시물의 필드 (첫 게시물이 없으면 None).
+    full=False(기본, TARGETED_PARSE)면 first_post_prefix()만 파싱하고, 거기서 제목이나 첫 게시물을 못 찾으면 전체를 다시 파싱
+    """
+    if full is None:
+        full = not TARGETED_PARSE
+    if not full:
+        prefix = first_post_prefix(html)
+        if len(prefix) < len(html):
+            details = _post_details(html_backend.parse(prefix, backend), post_url)
+            if details is not None and details['title'] != "N/A":
+                return details
+    details = _post_details(html_backend.parse(html, backend), post_url)
+    if details is None:
+        logging.warning(f"    - 상세 페이지에서 첫 번째 게시물({post_url})을 찾을 수 없습니다.")
+    return details
+
+
+def _post_details(doc, post_url: str) -> Optional[Dict[str, str]]:
+    details = {'details_url': post_url}
+    first_post = doc.select_one("#posts > .post.classic:first-of-type")
+    if not first_post:
+        return None
+
+    def get_text(base, selector, default="N/A"):
+        node = base.select_one(selector)
+        return node.text().strip() if node is not None else default
+
+    details['title'] = get_text(doc, ".thread-info__name")
+    details['author'] = get_text(first_post, ".post_user-profile a")
+    details['posted_date'] = get_text(first_post, ".post_date").split('\n')[0]
+    details['last_edited_info'] = get_text(first_post, ".post_edit em", "N/A")
+    details['main_content'] = get_text(first_post, ".post_body")
+    details['author_rank'] = get_text(first_post, ".post_user-title")
+    details['reputation'] = get_text(first_post, ".reputation_positive, .reputation_neutral, .reputation_negative", "0")
+
+    author_stats = {spans[0].text().strip(): spans[1].text().strip()
+                    for stat in first_post.select(".post_author-stats .post_stats-bit.group")
+                    if (spans := stat.select("span")) and len(spans) == 2}
+
+    details['posts_count'] = author_stats.get("Posts", "N/A")
+    details['threads_count'] = author_stats.get("Threads", "N/A")
+    details['join_date'] = author_stats.get("Joined", "N/A")
+
+    for k, v in details.items():
+        details[k] = re.sub(r'\s+', ' ', v).strip()
+
+    return details
+
+
 # --- 1. Receiver (수신자) ---
 # 실제 크롤링 로직을 모두 캡슐화하는 클래스
 
@@ -304,22 +446,72 @@ class Crawler:
     실제 크롤링 작업을 수행하는 Receiver 클래스.
     HTTP 클라이언트와 중복 URL 세트를 상태로 관리합니다.
     """
-    def __init__(self, client: httpx.AsyncClient, crawled_post_urls: Set[str]):
+    def __init__(self, client: Fetcher, crawled_post_urls: Set[str], parse_pool: Optional[ParsePool] = None):
         self.client = client
+        # 파싱은 이벤트 루프 밖(프로세스/스레드 풀)에서 하고 필드만 돌려받음
+        self.parse_pool = parse_pool or ParsePool("inline")
+        self.clearance = ClearanceManager(client, is_challenge=is_challenge_html)
         self.crawled_post_urls = crawled_post_urls
         self.total_posts_saved = 0
         self.total_errors = 0
         self.total_http_errors = 0
-
-    async def _async_get_soup(self, url: str) -> Optional[BeautifulSoup]:
-        """(private) URL에서 BeautifulSoup 객체를 비동기로 가져옵니다."""
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """호스트별 circuit breaker (재생 모드에서는 기다릴 이유가 없으므로 첫 장애에서 중지)"""
+        host = urlsplit(url).hostname or url
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            probe = None
+            if host.endswith(".onion"):
+                async def probe():
+                    return await onion_prober.probe_and_record(url, timeout=60)
+            breaker = self.breakers[host] = CircuitBreaker(
+                host, probe=probe,
+                base_backoff=BREAKER_BASE_BACKOFF, max_backoff=BREAKER_MAX_BACKOFF,
+                hard_limit=0 if self.client.replay else BREAKER_HARD_LIMIT)
+        return breaker
+
+    async def _get_listing_page(self, url: str) -> Tuple[List[str], Optional[int]]:
+        """
+        (private) 목록 페이지 요청. 네트워크 오류면 breaker가 멈췄다가 probe 후 같은 페이지를 다시 요청합니다.
+        장애가 hard limit을 넘으면 BreakerExhausted. HTTP 상태 오류 등은 그대로 전파합니다.
+        """
+        breaker = self.breaker_for(url)
+        while True:
+            await breaker.before_request()
+            try:
+                response = await self._async_get(url)
+            except NETWORK_ERRORS as e:
+                breaker.failure(e)
+                continue
+            breaker.success()
+            with crawl_metrics.span("parse", kind="listing", bytes=len(response.content),
+                                    executor=self.parse_pool.mode) as sp:
+                hrefs, last_page = await self.parse_pool.run(parse_listing_page, response.text)
+                sp.set(elements=len(hrefs))
+            return hrefs, last_page
+
+    async def _async_get(self, url: str) -> httpx.Response:
+        """(private) URL을 비동기로 요청합니다. 챌린지 페이지면 clearance를 받아 다시 요청합니다."""
         try:
-            response = await self.client.get(url, timeout=30)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
+            while True:
+                # clearance를 받는 중이면 이 호스트 요청은 여기서 대기
+                generation = await self.clearance.wait(url)
+                response = await self.client.get(url, timeout=30)
+                response.raise_for_status()
+                if not is_challenge_page(response):
+                    break
+                # Fetcher 재시도 후에도 챌린지 → 새 clearance를 적용했으면 같은 URL을 다시 요청
+                if not await self.clearance.solve(url, generation):
+                    raise ChallengePageError(f"챌린지 페이지 응답: {url}", request=response.request, response=response)
+            return response
         except httpx.HTTPStatusError as e:
             logging.warning(f"HTTP 상태 에러: {e.response.status_code} - {e.request.url}")
             raise
+        except (httpx.ConnectError, httpx.TimeoutException) as e:
+            logging.error(f"페이지 요청 중 연결 실패: {e} - {url}")
+            raise
         except Exception as e:
             logging.error(f"페이지 요청 중 알 수 없는 에러: {e} - {url}")
             raise
@@ -328,43 +520,13 @@ class Crawler:
         """(private) 게시물 상세 페이지를 스크랩합니다."""
         logging.debug(f"    - 상세 페이지 크롤링 시작: {post_url}")
         
-        soup = await self._async_get_soup(post_url)
-        if not soup:
+        response = await self._async_get(post_url)
+        if not response.content:
             logging.warning(f"    - 상세 페이지 응답값 없음: {post_url}")
-            return None 
-
-        details = {'details_url': post_url}
-        first_post = soup.select_one("#posts > .post.classic:first-of-type")
-        if not first_post:
-            logging.warning(f"    - 상세 페이지에서 첫 번째 게시물({post_url})을 찾을 수 없습니다.")
             return None
 
-        def get_text(base, selector, default="N/A"):
-            try:
-                return base.select_one(selector).text.strip()
-            except AttributeError:
-                return default
-
-        details['title'] = get_text(soup, ".thread-info__name")
-        details['author'] = get_text(first_post, ".post_user-profile a")
-        details['posted_date'] = get_text(first_post, ".post_date").split('\n')[0]
-        details['last_edited_info'] = get_text(first_post, ".post_edit em", "N/A")
-        details['main_content'] = get_text(first_post, ".post_body")
-        details['author_rank'] = get_text(first_post, ".post_user-title")
-        details['reputation'] = get_text(first_post, ".reputation_positive, .reputation_neutral, .reputation_negative", "0")
-        
-        author_stats = {spans[0].text.strip(): spans[1].text.strip()
-                        for stat in first_post.select(".post_author-stats .post_stats-bit.group")
-                        if (spans := stat.find_all("span")) and len(spans) == 2}
-        
-        details['posts_count'] = author_stats.get("Posts", "N/A")
-        details['threads_count'] = author_stats.get("Threads", "N/A")
-        details['join_date'] = author_stats.get("Joined", "N/A")
-
-        for k, v in details.items():
-            details[k] = re.sub(r'\s+', ' ', v).strip()
-
-        return details
+        with crawl_metrics.span("parse", kind="thread", bytes=len(response.content), executor=self.parse_pool.mode):
+            return await self.parse_pool.run(parse_post_details, response.text, post_url)
 
     def _process_page_results(self, results: List[Any], forum_name: str, crawled_at_utc: str, crawled_at_kst: str) -> Tuple[List[Dict[str, Any]], int, int]:
         """(private) asyncio.gather의 결과를 처리하여 CSV 행으로 변환합니다."""
@@ -384,6 +546,7 @@ class Crawler:
             elif not details:
                 logging.warning("  [Error] 웹 응답 없음 또는 파싱 실패.")
                 error_count += 1
+                crawl_metrics.count_error()
                 continue
 
             try:
@@ -402,32 +565,16 @@ class Crawler:
             except Exception as e:
                 logging.error(f"  [Error] 결과 처리 중 예외 발생: {e} - (데이터: {details})")
                 error_count += 1
+                crawl_metrics.count_error()
                 
         return page_data, error_count, http_error_count
     
-    def _get_last_page_number(self, soup: BeautifulSoup) -> int:
-        """(private) 게시판 목록으로부터 마지막 페이지 번호를 추출합니다."""
-        page_tag = soup.select_one("div.pagination")
-        if not page_tag:
-            logging.info("  페이지네이션 태그를 찾을 수 없음 (1페이지가 마지막).")
-            return 1
-        last_link_tag = page_tag.select_one("a.pagination_last")
-        if last_link_tag:
-            try: return int(last_link_tag.text)
-            except (ValueError, TypeError): pass 
-        page_links = page_tag.select("a.pagination_page")
-        if page_links:
-            try: return int(page_links[-1].text)
-            except (ValueError, TypeError, IndexError): pass 
-        logging.info("  마지막 페이지 링크를 찾을 수 없음 (1페이지가 마지막).")
-        return 1
-
     async def _crawl_page(self, page_url: str, forum_name: str, current_total_posts: int) -> PageCrawlResult:
         """(private) 단일 페이지를 크롤링합니다."""
         logging.info(f"  - 페이지 방문 중: {page_url}")
         try:
-            list_soup = await self._async_get_soup(page_url)
-        except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.ReadTimeout) as e:
+            post_hrefs, _ = await self._get_listing_page(page_url)
+        except BreakerExhausted as e:
             logging.error(f"  [치명적 네트워크 오류]: {e}. 진행 상황을 저장하고 중지를 시도합니다.")
             return PageCrawlResult([], False, 0, 1, 0, True)
         except httpx.HTTPStatusError as e:
@@ -438,12 +585,7 @@ class Crawler:
             logging.error(f"  페이지 {page_url} 요청 실패: {e}. 이 페이지만 건너뜁니다.")
             return PageCrawlResult([], False, 0, 1, 1 if isinstance(e, httpx.HTTPStatusError) else 0)
 
-        if not list_soup:
-            logging.error(f"  페이지 {page_url} 내용을 가져오지 못했습니다. 이 페이지만 건너뜁니다.")
-            return PageCrawlResult([], False, 0, 1, 0)
-
-        posts_on_page_tags = list_soup.select("span[id^='tid_'] a")
-        if not posts_on_page_tags:
+        if not post_hrefs:
             logging.info("  이 페이지에서 게시물을 찾을 수 없습니다.")
             return PageCrawlResult([], False, 0, 0, 0)
         
@@ -454,8 +596,8 @@ class Crawler:
 
         tasks, new_urls_on_page_count, temp_total_posts = [], 0, current_total_posts
 
-        for post_link_tag in posts_on_page_tags:
-            post_url = urljoin(BASE_URL, post_link_tag['href'])
+        for href in post_hrefs:
+            post_url = urljoin(BASE_URL, href)
             if post_url not in self.crawled_post_urls:
                 new_urls_on_page_count += 1
                 if MAX_POSTS_PER_FORUM is not None and temp_total_posts >= MAX_POSTS_PER_FORUM:
@@ -468,9 +610,13 @@ class Crawler:
         if not tasks:
             return PageCrawlResult([], new_urls_on_page_count > 0, 0, 0, 0)
 
+        # 동시 요청 수는 Fetcher의 호스트별 AIMD 제어가 제한 (나머지 작업은 슬롯을 기다림)
         logging.info(f"    ... {len(tasks)}개 게시물 비동기 크롤링 시작 ...")
         results = await asyncio.gather(*tasks, return_exceptions=True)
         logging.info(f"    ... {len(tasks)}개 게시물 비동기 크롤링 완료 ...")
+        for limiter in self.client.limiters():
+            logging.info(f"    ... [AIMD] {limiter.describe()}")
+        logging.info(f"    ... [parse] {self.parse_pool.describe()}")
 
         page_data, errors, http_errors = self._process_page_results(
             results, forum_name, crawled_at_utc, crawled_at_kst
@@ -492,11 +638,13 @@ class Crawler:
         logging.info(f"\n{'='*50}\n[+] 게시판 '{forum_display_name}' 크롤링 시작...\n{'='*50}")
         base_forum_url = urljoin(BASE_URL, forum_uri)
         total_posts_saved_in_forum = 0
-        
+
+        # 죽은 것으로 알려진 대상은 Fetcher가 요청 없이 TargetDown(ConnectError)으로 실패시키므로
+        # breaker가 backoff/probe로 회복을 기다림
         try:
-            first_page_soup = await self._async_get_soup(base_forum_url)
-        except (httpx.RemoteProtocolError, httpx.ConnectError, httpx.ReadTimeout) as e:
-            # 치명적 네트워크 오류 (게시판 목록)
+            _, last_page = await self._get_listing_page(base_forum_url)
+        except BreakerExhausted as e:
+            # 장애가 hard limit을 넘음 (게시판 목록)
             logging.error(f"  [치명적 네트워크 오류] (게시판 {forum_display_name}): {e}. 진행 상황을 저장하고 중지합니다.")
             # 실패한 '현재 시작 페이지(start_page)'를 저장하여 재시도하도록 함
             save_crawl_state(forum_uri, start_page)
@@ -514,12 +662,9 @@ class Crawler:
             self.total_errors += 1
             return # 이 커맨드(게시판)만 종료
 
-        if not first_page_soup:
-            logging.error(f"  게시판 '{forum_display_name}' 첫 페이지 내용을 가져오지 못했습니다. 이 게시판을 건너뜁니다.")
-            self.total_errors += 1
-            return
-
-        last_page = self._get_last_page_number(first_page_soup)
+        if last_page is None:
+            logging.info("  페이지네이션(마지막 페이지 링크)을 찾을 수 없음 (1페이지가 마지막).")
+            last_page = 1
         logging.info(f"  게시판 '{forum_display_name}'의 총 페이지 수: {last_page}")
 
         if start_page > 1:
@@ -558,7 +703,8 @@ class Crawler:
                 raise CriticalCrawlStop(f"Server disconnected at {page_url}")
 
             if result.page_data:
-                save_to_csv(result.page_data)
+                with crawl_metrics.span("write", rows=len(result.page_data)) as sp:
+                    sp.set(bytes=save_to_csv(result.page_data))
             
             # [*] Receiver가 스스로의 상태를 저장
             save_crawl_state(forum_uri, current_page_num + 1)
@@ -575,7 +721,7 @@ class Crawler:
     async def check_tor_connection(self) -> bool:
         """(public) Tor 연결을 확인합니다."""
         logging.info("Tor 네트워크 연결 확인 중...")
-        ip_check_url = 'https://check.torproject.org/api/ip'
+        ip_check_url = TOR_CHECK_URL
         try:
             response = await self.client.get(ip_check_url, timeout=15)
             response.raise_for_status()
@@ -710,30 +856,33 @@ async def main():
     csv_path = Path(OUTPUT_DIR) / OUTPUT_FILENAME
     crawled_post_urls = load_existing_urls_from_csv(csv_path)
 
-    async with httpx.AsyncClient(transport=HTTPX_TRANSPORT) as client:
-        
-        # 1. Receiver 생성
-        crawler = Crawler(client, crawled_post_urls)
-        
-        # 2. Invoker 생성
-        manager = CrawlManager()
+    with ParsePool() as parse_pool:
+        async with Fetcher(max_retries=3, verify=False, max_connections=FETCH_CONCURRENCY,
+                           adaptive_concurrency=True, is_challenge=is_challenge_page,
+                           cache=http_cache.for_source("darkforums")) as client:
 
-        # 3. Commands 생성 및 등록
-        
-        # 3-1. Tor 연결 확인 커맨드
-        manager.register(CheckTorCommand(crawler))
-
-        # 3-2. 포럼 크롤링 커맨드
-        for forum_display_name, forum_uri in TARGET_FORUMS.items():
-            command = CrawlForumCommand(
-                crawler=crawler,
-                forum_display_name=forum_display_name,
-                forum_uri=forum_uri
-            )
-            manager.register(command)
-        
-        # 4. Invoker 실행
-        await manager.run()
+            # 1. Receiver 생성
+            crawler = Crawler(client, crawled_post_urls, parse_pool)
+
+            # 2. Invoker 생성
+            manager = CrawlManager()
+
+            # 3. Commands 생성 및 등록
+
+            # 3-1. Tor 연결 확인 커맨드
+            manager.register(CheckTorCommand(crawler))
+
+            # 3-2. 포럼 크롤링 커맨드
+            for forum_display_name, forum_uri in TARGET_FORUMS.items():
+                command = CrawlForumCommand(
+                    crawler=crawler,
+                    forum_display_name=forum_display_name,
+                    forum_uri=forum_uri
+                )
+                manager.register(command)
+
+            # 4. Invoker 실행
+            await manager.run()
 
     # --- 최종 결과는 Receiver(crawler)의 상태에서 가져옴 ---
     logging.info(f"\n{'='*50}\n모든 크롤링 작업이 완료되었습니다.\n{'='*50}")
@@ -743,9 +892,20 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 러너 밖에서 단독 실행되므로 실행 이력(run_history.py)은 직접 기록
+    metrics = crawl_metrics.CrawlMetrics()
+    crawl_metrics.install(metrics)
+    started_at = time.time()
+    rc = 0
     try:
-        asyncio.run(main())
+        profiling.run(asyncio.run, main())
     except KeyboardInterrupt:
+        rc = 130
         logging.info("작업이 사용자에 의해 중단되었습니다. (현재 상태 저장됨)")
     except Exception as e:
-        logging.critical(f"예상치 못한 오류로 프로그램이 종료됩니다: {e} (현재 상태 저장됨)")
\ No newline at end of file
+        rc = 1
+        logging.critical(f"예상치 못한 오류로 프로그램이 종료됩니다: {e} (현재 상태 저장됨)")
+    finally:
+        for reg in run_history.record_standalone("dark_forums", started_at, metrics, rc,
+                                                 Path(OUTPUT_DIR) / OUTPUT_FILENAME):
+            logging.warning(f"[성능 회귀] {reg.describe()}")
\ No newline at end of file
@@ -1,8 +1,7 @@
 # crawler_coinbase_cartel.py
-import platform
-import requests
+import asyncio
+import httpx
 from pprint import pprint
-from bs4 import BeautifulSoup
 from typing import List, Optional
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
@@ -10,13 +9,17 @@ from urllib.parse import urljoin
 from pathlib import Path
 import csv
 
-# Tor 프록시 & 타깃 URL (Ubuntu 9050 기본)
-PORT = "9150" if platform.system() == "Windows" else "9050"
-PROXIES = {
-    "http": f"socks5h://127.0.0.1:{PORT}",
-    "https": f"socks5h://127.0.0.1:{PORT}",
-}
+import crawl_metrics
+import html_backend
+import http_cache
+import profiling
+from fetch import TOR_PROXY, Fetcher, TargetDown
+from mirrors import MirrorSet, mirror_list
+
+# 타깃 URL (Tor 프록시는 fetch.py 공통 설정)
 BASE_URL = "http://fjg4zi4opkxkvdz7mvwp7h6goe4tcby3hhkrz43pht4j3vakhy75znyd.onion"
+# 요청을 보낼 미러 목록 (COINBASE_CARTEL_MIRRORS=url1,url2 로 교체). 상세 링크는 항상 BASE_URL 기준
+MIRRORS = mirror_list([BASE_URL], "COINBASE_CARTEL_MIRRORS")
 
 # --- 통합 스키마 헤더 ---
 UNIFIED_HEADERS = [
@@ -27,13 +30,16 @@ UNIFIED_HEADERS = [
     "details_url", "description", "files_api_present"
 ]
 
-def get_tor_response(url: str, timeout: int = 30) -> Optional[requests.Response]:
-    print(f"Tor 프록시(포트: {PORT})로 접속 시도 → {url}")
+async def get_tor_response(mirrors: MirrorSet, path: str = "/", timeout: int = 30) -> Optional[httpx.Response]:
+    print(f"Tor 프록시({TOR_PROXY})로 접속 시도 → {', '.join(mirrors.mirrors)} {path}")
     try:
-        res = requests.get(url, proxies=PROXIES, timeout=timeout)
+        res = await mirrors.get(path, timeout=timeout)
         res.raise_for_status()
         print("--- 접속 성공 ---")
         return res
+    except TargetDown as e:
+        print(f"대상이 down 상태로 기록되어 있어 요청하지 않음 → {e}")
+        return None
     except Exception as e:
         print(f"Error: {e}")
         return None
@@ -59,9 +65,9 @@ class CC_Victim:
     def __repr__(self):
         return f"[Name: {self.name}, industry: {self.industry}, revenue: {self.revenue}, website: {self.website}, details_link: {self.details_link}]"
 
-def parse_victims_from_html(html_text: str) -> List[CC_Victim]:
-    soup = BeautifulSoup(html_text, "html.parser")
-    articles = soup.select("div.companies-grid > article")
+def parse_victims_from_html(html_text: str, backend: Optional[str] = None) -> List[CC_Victim]:
+    doc = html_backend.parse(html_text, backend)
+    articles = doc.select("div.companies-grid > article")
     victims: List[CC_Victim] = []
 
     for article in articles:
@@ -69,14 +75,14 @@ def parse_victims_from_html(html_text: str) -> List[CC_Victim]:
             name_tag = article.select_one("h3.card-name")
             if not name_tag:
                 continue
-            name = name_tag.get_text(strip=True)
+            name = name_tag.text(strip=True)
 
             industry = None
             revenue = None
             meta_tag = article.select_one("div.card-meta")
             if meta_tag:
                 for span in meta_tag.select("span"):
-                    span_text = span.get_text(" ", strip=True)
+                    span_text = span.text(" ", strip=True)
                     if "Industry" in span_text:
                         industry = span_text.replace("Industry:", "").strip()
                     elif "Revenue" in span_text:
@@ -85,13 +91,13 @@ def parse_victims_from_html(html_text: str) -> List[CC_Victim]:
             website = None
             if meta_tag:
                 a_tag = meta_tag.select_one("a")
-                if a_tag and a_tag.get("href"):
-                    website = a_tag["href"].strip()
+                if a_tag and a_tag.attr("href"):
+                    website = a_tag.attr("href").strip()
 
             details_link = None
             details_link_tag = article.select_one("a.view-detail")
-            if details_link_tag and details_link_tag.get("href"):
-                details_link = urljoin(BASE_URL, details_link_tag["href"].strip())
+            if details_link_tag and details_link_tag.attr("href"):
+                details_link = urljoin(BASE_URL, details_link_tag.attr("href").strip())
 
             victims.append(CC_Victim(
                 name=name, industry=industry, revenue=revenue,
@@ -136,7 +142,7 @@ def to_unified_row(v: CC_Victim, crawled_at_utc: str, crawled_at_kst: str) -> di
         "files_api_present": "",
     }
 
-def save_unified_csv_coinbase(victims: List[CC_Victim], out_dir: str = "outputs", filename: str = "coinbase_cartel_unified.csv"):
+def save_unified_csv_coinbase(victims: List[CC_Victim], out_dir: str = "outputs", filename: str = "coinbase_cartel_unified.csv") -> Path:
     kst = ZoneInfo("Asia/Seoul")
     now_utc = datetime.now(timezone.utc).isoformat()
     now_kst = datetime.now(kst).isoformat()
@@ -153,21 +159,34 @@ def save_unified_csv_coinbase(victims: List[CC_Victim], out_dir: str = "outputs"
             writer.writerow(row)
 
     print(f"\nCSV 저장 완료 (덮어쓰기): {csv_path.resolve()}")
+    return csv_path
 
-def run_coinbase_cartel_crawler():
+async def crawl():
     print("--- Coinbase Cartel Crawler ---")
-    res = get_tor_response(BASE_URL)
+    async with Fetcher(cache=http_cache.for_source("coinbase_cartel")) as fetcher:
+        res = await get_tor_response(MirrorSet("coinbase_cartel", MIRRORS, fetcher))
     if not res or not res.text:
         print("URL 데이터를 찾지 못함.")
         return
 
     print(f"--- Response Preview ---\n{res.text[:300]}")
-    victims = parse_victims_from_html(res.text)
+    with crawl_metrics.span("parse", bytes=len(res.content)) as sp:
+        victims = parse_victims_from_html(res.text)
+        sp.set(elements=len(victims))
     print(f"\n총 {len(victims)}개 항목 파싱")
     if victims:
         pprint(victims[:5])  # 샘플 출력
-    save_unified_csv_coinbase(victims)
+    with crawl_metrics.span("write", rows=len(victims)) as sp:
+        sp.set(bytes=save_unified_csv_coinbase(victims).stat().st_size)
+
+def run_coinbase_cartel_crawler():
+    # 크롤러 전용 이벤트 루프 (러너에서는 to_thread 워커 스레드 안에서 실행)
+    asyncio.run(crawl())
+
+async def main_async():
+    """러너(script.py)의 in-process 모드용 공통 비동기 진입점"""
+    await asyncio.to_thread(profiling.run, run_coinbase_cartel_crawler)
 
 if __name__ == "__main__":
-    run_coinbase_cartel_crawler()
+    profiling.run(run_coinbase_cartel_crawler)
 
@@ -1,18 +1,20 @@
-import requests
-import platform
+import asyncio
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 import csv
 from pathlib import Path
 import re
 
-# DragonForce (Ubuntu 기본 Tor 포트 9050)
+import crawl_metrics
+import http_cache
+import profiling
+from fetch import Fetcher, TargetDown
+from mirrors import MirrorSet, mirror_list
+
+# DragonForce (Tor 포트는 fetch.py에서 OS별로 선택)
 URL = "http://z3wqggtxft7id3ibr7srivv5gjof5fwg76slewnzwwakjuf3nlhukdid.onion"
-PORT = "9150" if platform.system() == "Windows" else "9050"
-PROXIES = {
-    "http": f"socks5h://127.0.0.1:{PORT}",
-    "https": f"socks5h://127.0.0.1:{PORT}"
-}
+# 요청을 보낼 미러 목록 (DRAGONFORCE_MIRRORS=url1,url2 로 교체). 레코드 id/URL은 항상 URL 기준
+MIRRORS = mirror_list([URL], "DRAGONFORCE_MIRRORS")
 
 # --- 통합 스키마 헤더 ---
 UNIFIED_HEADERS = [
@@ -23,19 +25,21 @@ UNIFIED_HEADERS = [
     "details_url", "description", "files_api_present"
 ]
 
-def get_tor_session() -> requests.Session:
-    s = requests.session()
-    s.proxies = PROXIES
-    return s
-
-def fetch_page_data(session: requests.Session, page: int, base_url: str) -> dict | None:
-    api_url = f"{base_url}/api/guest/blog/posts?page={page}"
-    print(f"⏳ Page {page} 데이터 요청 시도 (URL: {api_url})")
+async def fetch_page_data(mirrors: MirrorSet, page: int) -> dict | None:
+    api_path = f"/api/guest/blog/posts?page={page}"
+    print(f"⏳ Page {page} 데이터 요청 시도 (URL: {mirrors.current or URL}{api_path})")
     try:
-        response = session.get(api_url, timeout=60)
+        response = await mirrors.get(api_path, timeout=60)
         response.raise_for_status()
         print(f"Page {page}: 데이터 로드 성공")
         return response.json()
+    except TargetDown as e:
+        print(f"Page {page}: 대상이 down 상태로 기록되어 있어 요청하지 않음 - {e}")
+        return None
+    except ValueError as e:  # JSON 디코딩 실패
+        crawl_metrics.count_error()
+        print(f"Page {page}: 데이터 로드 실패 - {e}")
+        return None
     except Exception as e:
         print(f"Page {page}: 데이터 로드 실패 - {e}")
         return None
@@ -193,7 +197,7 @@ def to_unified_row(publication: dict, now_utc: datetime, now_kst: datetime) -> d
 
 def save_unified_csv_dragonforce(rows: list[dict],
                                  out_dir: str = "outputs",
-                                 filename: str = "dragonforce_unified.csv"):
+                                 filename: str = "dragonforce_unified.csv") -> Path:
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
     path = out / filename
@@ -203,44 +207,59 @@ def save_unified_csv_dragonforce(rows: list[dict],
         for r in rows:
             w.writerow(r)
     print(f" - 통합(덮어쓰기): {path.resolve()}")
+    return path
 
-def main():
+async def crawl():
     print("### TimeZone 에러 발생시 pip install tzdata 실행 (Ubuntu 일반적으로 기본 제공)")
     all_victims = []
     unified_rows = []
 
-    session = get_tor_session()
-    initial_data = fetch_page_data(session=session, page=1, base_url=URL)
-    if not initial_data:
-        print("### 프로그램을 종료합니다. 첫 페이지를 가져올 수 없습니다.")
-        return
+    async with Fetcher(max_connections=4, cache=http_cache.for_source("dragonforce")) as fetcher:
+        mirrors = MirrorSet("dragonforce", MIRRORS, fetcher)
+        initial_data = await fetch_page_data(mirrors, page=1)
+        if not initial_data:
+            print("### 프로그램을 종료합니다. 첫 페이지를 가져올 수 없습니다.")
+            return
 
-    total_pages = initial_data.get('data', {}).get('pages', 1)
-    print(f"총 {total_pages}개의 페이지를 발견했습니다. 순차적으로 크롤링을 시작합니다.\n")
+        total_pages = initial_data.get('data', {}).get('pages', 1)
+        print(f"총 {total_pages}개의 페이지를 발견했습니다. 나머지 페이지를 동시에 요청합니다.\n")
+        # 요청 간격/동시성은 Tor 예산과 Fetcher 연결 풀이 제한, 결과는 페이지 순서대로 처리
+        rest = await asyncio.gather(*(fetch_page_data(mirrors, page=n)
+                                      for n in range(2, total_pages + 1)))
 
-    for page_num in range(1, total_pages + 1):
-        page_data = initial_data if page_num == 1 else fetch_page_data(session=session, page=page_num, base_url=URL)
+    for page_num, page_data in enumerate([initial_data, *rest], start=1):
         if not page_data:
             print(f"페이지 {page_num} 처리를 건너뜁니다.")
             continue
 
         publications = page_data.get('data', {}).get('publications', [])
-        for item in publications:
-            if not item.get('is_transfering', True):
-                parsed_info = parse_victim_data(item, page_num)  # 콘솔 확인용
-                all_victims.append(parsed_info)
+        with crawl_metrics.span("parse", page=page_num, elements=len(publications)):
+            for item in publications:
+                if not item.get('is_transfering', True):
+                    parsed_info = parse_victim_data(item, page_num)  # 콘솔 확인용
+                    all_victims.append(parsed_info)
 
-                now_utc = datetime.now(timezone.utc)
-                now_kst = now_utc.astimezone(ZoneInfo("Asia/Seoul"))
-                unified_rows.append(to_unified_row(item, now_utc, now_kst))
+                    now_utc = datetime.now(timezone.utc)
+                    now_kst = now_utc.astimezone(ZoneInfo("Asia/Seoul"))
+                    unified_rows.append(to_unified_row(item, now_utc, now_kst))
 
     print(f"### 데이터 처리 완료! 총 **{len(all_victims)}** 개의 피해 기업 정보를 리스트에 저장했습니다.")
     print("### 수집된 데이터 샘플 (최신 5개)")
     for victim_data in all_victims[:5]:
         print_victim_details(victim_data)
 
-    save_unified_csv_dragonforce(unified_rows, out_dir="outputs", filename="dragonforce_unified.csv")
+    with crawl_metrics.span("write", rows=len(unified_rows)) as sp:
+        path = save_unified_csv_dragonforce(unified_rows, out_dir="outputs", filename="dragonforce_unified.csv")
+        sp.set(bytes=path.stat().st_size)
+
+def main():
+    # 크롤러 전용 이벤트 루프 (러너에서는 to_thread 워커 스레드 안에서 실행되어 파싱이 러너 루프를 막지 않음)
+    asyncio.run(crawl())
+
+async def main_async():
+    """러너(script.py)의 in-process 모드용 공통 비동기 진입점"""
+    await asyncio.to_thread(profiling.run, main)
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
 
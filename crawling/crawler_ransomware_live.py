@@ -1,13 +1,19 @@
 # crawler_ransomware_live.py
-from bs4 import BeautifulSoup
+import asyncio
+import os
 from pprint import pprint
-import requests
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 import re
 from pathlib import Path
 import csv
 
+import crawl_metrics
+import html_backend
+import http_cache
+import profiling
+from fetch import Fetcher
+
 # --- 통합 스키마 헤더 ---
 UNIFIED_HEADERS = [
     "source", "record_type", "id", "company", "website", "country", "address",
@@ -17,52 +23,57 @@ UNIFIED_HEADERS = [
     "details_url", "description", "files_api_present"
 ]
 
-def get_html_sync(url: str, timeout: int = 10) -> str | None:
+# 수집 대상 (RANSOMWARE_LIVE_URL 로 교체 가능: testbed.py 대역 서버 등)
+URL = os.environ.get("RANSOMWARE_LIVE_URL", "https://www.ransomware.live/")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+async def get_html(fetcher: Fetcher, url: str, timeout: int = 10) -> str | None:
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = await fetcher.get(url, timeout=timeout)
         response.raise_for_status()
         print(f"✅ [{url}] - HTML 콘텐츠 로드 성공")
         return response.text
-    except requests.exceptions.RequestException as e:
+    except Exception as e:
         print(f"❌ [{url}] - 오류 발생: {e}")
         return None
 
-def parse_ransomware_live_data(html_content):
+def parse_ransomware_live_data(html_content, backend=None):
     kst_timezone = ZoneInfo("Asia/Seoul")
     crawl_time_utc = datetime.now(timezone.utc).isoformat()
     crawl_time_kst = datetime.now(kst_timezone).isoformat()
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+    doc = html_backend.parse(html_content, backend)
 
     def get_victim_details(item):
         try:
-            name = item.select_one('strong').get_text(strip=True)
+            name = item.select_one('strong').text(strip=True)
 
             group_el = item.select_one('small a span.badge')
-            group = group_el.get_text(strip=True) if group_el else ""
+            group = group_el.text(strip=True) if group_el else ""
 
             date_container = item.select_one('div.text-body-secondary')
-            date_text = date_container.get_text(" ", strip=True) if date_container else ""
+            date_text = date_container.text(" ", strip=True) if date_container else ""
             discovery_date_match = re.search(r"Discovery Date: ([\d-]+)", date_text)
             discovery_date = discovery_date_match.group(1) if discovery_date_match else ""
             attack_date_match = re.search(r"Estimated Attack Date: ([\d-]+)", date_text)
             estimated_attack_date = attack_date_match.group(1) if attack_date_match else ""
 
             description_tag = item.select_one('div.bg-body-secondary')
-            description = description_tag.get_text(strip=True) if description_tag else ""
+            description = description_tag.text(strip=True) if description_tag else ""
 
             country_tag = item.select_one('img[style*="width: 32px"]')
-            country = country_tag['alt'].strip() if country_tag and country_tag.has_attr('alt') else ""
+            country = (country_tag.attr('alt') or "").strip() if country_tag else ""
             country = country.upper() if len(country) == 2 else ""  # ISO-2만 유지
 
             website_tag = item.select_one('a:has(i.fa-globe-americas)')
-            website = website_tag['href'].strip() if website_tag and website_tag.has_attr('href') else ""
+            website = (website_tag.attr('href') or "").strip() if website_tag else ""
 
             details_link_tag = item.select_one('a[href*="/id/"]')
-            details_url = ("https://www.ransomware.live" + details_link_tag['href'].strip()) if (details_link_tag and details_link_tag.has_attr('href')) else ""
+            details_href = details_link_tag.attr('href') if details_link_tag else None
+            details_url = ("https://www.ransomware.live" + details_href.strip()) if details_href is not None else ""
             
             return {
                 "company_name": name,
@@ -80,11 +91,11 @@ def parse_ransomware_live_data(html_content):
     # (선택) 상단 카운터 파싱은 기존대로 유지
     statistics = {}
     try:
-        scripts = soup.find_all('script')
+        scripts = doc.select('script')
         script_text = ""
         for script in scripts:
-            if 'animateCounter' in script.text:
-                script_text = script.text
+            if 'animateCounter' in (text := script.text()):
+                script_text = text
                 break
 
         groups_match = re.search(r"animateCounter\('groupsCounter',\s*\d+,\s*([\d,]+)", script_text)
@@ -102,7 +113,7 @@ def parse_ransomware_live_data(html_content):
         print(f"통계 데이터 추출 중 오류 발생: {e}")
         statistics = {}
 
-    victim_items = soup.select('#victim-list .victim-item')
+    victim_items = doc.select('#victim-list .victim-item')
     victims_list = [data for item in victim_items if (data := get_victim_details(item)) is not None]
 
     return {
@@ -156,7 +167,7 @@ def save_csvs(results: dict, out_dir: str = "outputs", prefix: str = "ransomware
     print(f" - 원본 피해자: {victims_file.resolve()}")
 
 def save_unified_csv_ransomware(results: dict, out_dir: str = "outputs",
-                                filename: str = "ransomware_live_unified.csv"):
+                                filename: str = "ransomware_live_unified.csv") -> Path:
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
     path = out / filename
@@ -193,27 +204,40 @@ def save_unified_csv_ransomware(results: dict, out_dir: str = "outputs",
                 "files_api_present": ""
             })
     print(f" - 통합(덮어쓰기): {path.resolve()}")
+    return path
 
-def main():
-    URL = "https://www.ransomware.live/"
+async def crawl():
     print(f"'{URL}'에서 데이터 크롤링을 시작합니다...")
-    html_content = get_html_sync(URL)
+    async with Fetcher(proxy=None, headers=HEADERS, cache=http_cache.for_source("ransomware_live")) as fetcher:  # clearnet: Tor 미경유
+        html_content = await get_html(fetcher, URL)
 
     if html_content:
         print("\n크롤링 성공! 데이터 파싱을 시작합니다...")
-        ransomware_data = parse_ransomware_live_data(html_content)
+        with crawl_metrics.span("parse", bytes=len(html_content)) as sp:
+            ransomware_data = parse_ransomware_live_data(html_content)
+            sp.set(elements=len((ransomware_data or {}).get("victims", [])))
 
         print("\n--- 파싱 완료된 데이터 ---")
         pprint(ransomware_data)
 
-        save_csvs(ransomware_data, out_dir="outputs", prefix="ransomware_live")
-        save_unified_csv_ransomware(ransomware_data, out_dir="outputs",
-                                    filename="ransomware_live_unified.csv")
+        with crawl_metrics.span("write", rows=len(ransomware_data.get("victims", []))) as sp:
+            save_csvs(ransomware_data, out_dir="outputs", prefix="ransomware_live")
+            path = save_unified_csv_ransomware(ransomware_data, out_dir="outputs",
+                                               filename="ransomware_live_unified.csv")
+            sp.set(bytes=path.stat().st_size)
         print("\n🎉 프로그램이 성공적으로 실행되었습니다.")
     else:
         print("\n❗️ HTML 콘텐츠를 가져오지 못해 파싱을 진행할 수 없습니다.")
         print("프로그램 실행에 실패했습니다.")
 
+def main():
+    # 크롤러 전용 이벤트 루프 (러너에서는 to_thread 워커 스레드 안에서 실행)
+    asyncio.run(crawl())
+
+async def main_async():
+    """러너(script.py)의 in-process 모드용 공통 비동기 진입점"""
+    await asyncio.to_thread(profiling.run, main)
+
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
 
@@ -1,15 +1,12 @@
-# pip install blinker==1.7.0 brotli psutil
+# pip install blinker==1.7.0 psutil
 import os
 import platform
 import subprocess
 import psutil
 import time
 import functools
-import brotli
-import json
 import csv
 from pathlib import Path
-from urllib.parse import urlparse
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 # from seleniumwire import webdriver
@@ -23,6 +20,8 @@ from selenium.common.exceptions import StaleElementReferenceException, NoSuchEle
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service as ChromeService
 
+import warc_archive
+
 # 크롤링할 대상 포럼을 관리하는 딕셔너리입니다.
 # 여기에 명시된 게시판만 순서대로 방문하여 크롤링합니다.
 TARGET_FORUMS = {
@@ -51,12 +50,36 @@ UNIFIED_HEADERS = [
 TARGET_URL = "https://darkforums.st"
 TARGET_TITLE = "darkforums"
 # Tor 프록시 주소 (Tor Browser 기본 설정)
-TOR_PROXY = f"127.0.0.1:{"9150" if platform.system() == "Windows" else "9050"}"
+TOR_PROXY = f"127.0.0.1:{'9150' if platform.system() == 'Windows' else '9050'}"
 # TARGET_RESPONSE_URLS = [
 #     "https://darkforums.st/", "https://darkforums.st/Forum-Databases"
 # ]
 TARGET_CONTENT_TYPE = "text/html; charset=UTF-8"
 TARGET_CONTENT_ENCODING = "br"
+# CRAWL_WARC_RECORD가 설정되어 있으면 게시물마다 잡힌 트래픽을 WARC로 기록 (selenium-wire 드라이버 필요, __main__에서 생성)
+warc_writer = None
+
+
+def chrome_options(proxy: str = None) -> ChromeOptions:
+    """
+    크롤링용 Chrome 옵션 (자동화 탐지 회피 포함).
+    proxy("호스트:포트")를 주면 SOCKS5로 접속합니다 (.onion 이름 해석도 프록시에서).
+    """
+    # options.add_argument("--headless")  # 필요 시 브라우저 창을 띄우지 않음
+    options = webdriver.ChromeOptions()
+    # options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    # 'untrusted enterprise roots' 경고 무시
+    options.add_argument('--ignore-certificate-errors-spki-list')
+    options.add_argument('--ignore-ssl-errors')
+
+    options.add_argument("disable-blink-features=AutomationControlled")  # 자동화 탐지 방지
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])  # 자동화 표시 제거
+    options.add_experimental_option('useAutomationExtension', False)  # 자동화 확장 기능 사용 안 함
+    if proxy:
+        options.add_argument(f"--proxy-server=socks5://{proxy}")
+        options.add_argument("--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE 127.0.0.1")
+    return options
 
 
 def convert_to_iso_utc(date_str: str) -> str:
@@ -137,9 +160,15 @@ class SafeWebDriver:
     
     'with' 구문을 지원하여 드라이버의 생성과 종료(quit)를 자동으로 관리합니다.
     """
-    def __init__(self, service: ChromeService, options: ChromeOptions):
+    def __init__(self, service: ChromeService, options: ChromeOptions, seleniumwire_options: dict = None):
         print("SafeDriver: 드라이버 생성을 시작합니다...")
-        self.driver = webdriver.Chrome(service=service, options=options)
+        if seleniumwire_options is not None:
+            # 트래픽 기록(WARC)용: selenium-wire 드라이버는 요청/응답을 driver.requests에 모음
+            from seleniumwire import webdriver as wire_webdriver
+            self.driver = wire_webdriver.Chrome(service=service, options=options,
+                                                seleniumwire_options=seleniumwire_options)
+        else:
+            self.driver = webdriver.Chrome(service=service, options=options)
 
         try:
             self.driver_pids = set()
@@ -255,11 +284,14 @@ class SafeWebDriver:
     # --- selenium-wire 호환성을 위한 속성 (필요시) ---
     @property
     def requests(self):
-        """selenium-wire의 'requests' 속성에 접근합니다."""
+        """selenium-wire의 'requests' 속성에 접근합니다. selenium-wire 드라이버가 아니면 None"""
+        return getattr(self.driver, 'requests', None)
+
+    @requests.deleter
+    def requests(self):
+        """selenium-wire가 모은 요청 기록을 비웁니다."""
         if hasattr(self.driver, 'requests'):
-            return self.driver.requests
-        # selenium-wire가 아니면 빈 리스트 반환
-        return []
+            del self.driver.requests
     
     # WebDriver의 다른 모든 속성/메서드에 직접 접근할 수 있도록 위임합니다.
     def __getattr__(self, name):
@@ -384,7 +416,8 @@ def crawl_current_page_posts(driver: SafeWebDriver):
             if crawled_data:
                 all_crawled_data.append(crawled_data)
 
-            # save_network_data(driver)
+            if warc_writer is not None:
+                save_network_data(driver, warc_writer)
             
             # 목록으로 복귀
             driver.back()
@@ -528,70 +561,26 @@ def save_unified_csv_ransomware(results: dict, forum: str, out_dir: str = "outpu
     print(f" - 통합(덮어쓰기): {path.resolve()}")
 
 
-def save_network_data(driver: SafeWebDriver):
-    directory = 'network_log'
-    if not os.path.exists(directory):
-        os.makedirs(directory) # 디렉토리가 없으면 생성
-
-    # 최종 파일 경로
-    filename = f"{TARGET_TITLE}_{datetime.now(ZoneInfo("Asia/Seoul")).strftime('%Y-%m-%d_%H-%M-%S')}.json"
-    file_path = os.path.join(directory, filename)
-
-    print(f"로그가 다음 파일에 저장됩니다: {file_path}")
-    json_list = []
-    
-    # 캡처된 요청들을 확인합니다.
-    print("\n--- 네트워크 트래픽 로그 (selenium-wire) ---")
-    if not driver.requests:
-        print("캡처된 요청이 없습니다.")
-    else:
-    # --- 방문 페이지 순회 ---
-        for i, request in enumerate(driver.requests):
-            if (request.response and 
-                    # request.url in TARGET_RESPONSE_URLS and
-                    request.response.headers.get('content-type', '') == 'text/html; charset=UTF-8' and
-                    request.response.headers.get('content-encoding', '') == 'br'):
-                print(f"[{i+1}] URL: {request.url}")
-                print(f"    Request Headers: {request.headers}")
-                print(f"    Status Code: {request.response.status_code}")
-                print(f"    Headers: {request.response.headers}")
-                # print(f"    Body: {request.response.body.decode('utf-8', 'ignore')[:100]}...") # 응답 본문 (필요 시)
-                print("-" * 20)
-                body = None
-                try:
-                    body = brotli.decompress(request.response.body).decode('utf-8')
-                            
-                except Exception as e:
-                    print(e)
-                    
-                # print(f"body : {body[:100]}")
-
-                log_entry = {
-                    "index": i + 1,
-                    "time_utc": datetime.now(timezone.utc).isoformat(),
-                    "time_kst": datetime.now(ZoneInfo("Asia/Seoul")).isoformat(),
-                    "url": request.url,
-                    "request_headers": dict(request.headers), # 헤더를 dict로 변환
-                    "status_code": request.response.status_code,
-                    "response_headers": dict(request.response.headers), # 헤더를 dict로 변환
-                    "body": body if body else ""
-                }
-                json_list.append(log_entry)
-                # with open(f'{file_path}_{i+1}_body.br', 'wb') as f:
-                #     f.write(request.response.body)
-                # Forum-Databases
-                title = os.path.basename(urlparse(request.url).path)
-                full_path_file = f"{os.path.join(directory, title)}.html"
-                
-
-                # if not os.path.exists(full_path_file):
-                with open(full_path_file, 'w', encoding='utf-8') as html_file:
-                    html_file.write(body)
-
-
-                
-    with open(f'{file_path}', 'w', encoding='utf-8') as f:
-        f.write(json.dumps(json_list, ensure_ascii=False))
+def save_network_data(driver: SafeWebDriver, writer: "warc_archive.WarcWriter"):
+    """
+    selenium-wire가 잡은 요청/응답을 WARC에 기록합니다 (본문은 br/gzip 인코딩 그대로).
+    기록한 요청은 driver.requests에서 지워 다음 호출 때 중복 기록하지 않습니다.
+    """
+    captured = driver.requests
+    if captured is None:
+        print("[warc] selenium-wire 드라이버가 아니라 네트워크 트래픽을 기록할 수 없습니다.")
+        return
+    saved = 0
+    for request in captured:
+        response = request.response
+        if response is None:
+            continue
+        writer.write_exchange(request.method, request.url, request.headers.items(),
+                              response.status_code, response.reason or "", response.headers.items(),
+                              response.body or b"")
+        saved += 1
+    del driver.requests
+    print(f"[warc] {saved}개 요청/응답 기록 → {writer.path}")
 
 
 if __name__ == "__main__":
@@ -616,24 +605,22 @@ if __name__ == "__main__":
         print(f"ChromeDriverManager settings: {service.__repr__()}")
         
         # Chrome 옵션
-        # options.add_argument("--headless")  # 필요 시 브라우저 창을 띄우지 않음
-        options = webdriver.ChromeOptions()
-        # options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        # 'untrusted enterprise roots' 경고 무시
-        options.add_argument('--ignore-certificate-errors-spki-list')
-        options.add_argument('--ignore-ssl-errors')
-
-        options.add_argument("disable-blink-features=AutomationControlled")  # 자동화 탐지 방지
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])  # 자동화 표시 제거
-        options.add_experimental_option('useAutomationExtension', False)  # 자동화 확장 기능 사용 안 함
-        
-        # (selenium-wire 사용 시)
-        # real_driver = seleniumwire.webdriver.Chrome(service=service, options=options, seleniumwire_options=sw_options)
+        options = chrome_options()
         
         # 3. 'with' 구문으로 SafeWebDriver 생성 및 사용
         #    SafeWebDriver.__init__이 service와 options를 받아 드라이버를 생성합니다.
-        with SafeWebDriver(service=service, options=options) as safe_driver:
+        #    WARC 기록(CRAWL_WARC_RECORD)은 selenium-wire 드라이버로만 가능하므로, 없으면 시작하지 않음
+        sw_options = None
+        if warc_archive.recording():
+            try:
+                import seleniumwire  # noqa: F401
+            except ImportError:
+                raise SystemExit(f"{warc_archive.RECORD_ENV}: selenium 크롤러의 WARC 기록에는 selenium-wire가 필요합니다 "
+                                 "(pip install selenium-wire blinker==1.7.0)")
+            sw_options = {}
+            warc_writer = warc_archive.WarcWriter.for_crawler(TARGET_TITLE)
+
+        with SafeWebDriver(service=service, options=options, seleniumwire_options=sw_options) as safe_driver:
             
             # 4. 메인 크롤링 작업을 별도의 try...except로 감쌉니다.
             try:
@@ -0,0 +1,398 @@
+# fetch.py
+"""
+모든 크롤러가 함께 쓰는 비동기 HTTP 수집 계층 (httpx 기반).
+
+- Tor SOCKS 프록시(socks5h)를 통한 keep-alive 연결 풀 (clearnet 대상은 proxy=None)
+- 압축 전송(Accept-Encoding: gzip, deflate, br — br은 brotli 패키지가 있을 때)
+- 연결 오류/타임아웃/429/5xx 에 대한 제한된 재시도 (지수 백오프 + 지터, Retry-After 준수)
+- 같은 URL에 대한 동시 GET은 하나의 요청으로 합침(single-flight)
+- Tor 요청은 격리된 여러 회로에 지연 기반으로 분산(tor_circuits.py)
+- 호스트별 관측 지연(p99)으로 timeout을 정하고(표본이 모이기 전에는 호출 측 timeout),
+  Tor 요청이 p95를 넘기면 다른 회로로 같은 요청을 한 번 더 보내 먼저 온 응답을 사용(hedging, 느린 쪽 취소)
+- adaptive_concurrency=True면 호스트별 AIMD 동시성 제어(aimd.py): 429/503, timeout, 챌린지 페이지(is_challenge)에서
+  절반으로 줄이고 건강하면 조금씩 늘림. 챌린지 페이지는 429/5xx처럼 재시도 대상
+- cache=HttpCache면 디스크 캐시(http_cache.py): TTL 안이면 요청 없이 저장본, 지나면 ETag/Last-Modified 조건부 GET
+  (304면 저장본). 요청별 headers를 준 요청은 캐시하지 않음. 응답 extensions["http_cache"]에 처리 결과
+- CRAWL_WARC_RECORD면 요청/응답을 WARC로 기록, CRAWL_WARC_REPLAY면 네트워크 대신 WARC 응답으로 재생(warc_archive.py).
+  재생 중에는 Tor/예산/캐시/재시도/hedging/.onion 가용성 기록을 모두 건너뜀
+- 공통 계측: Tor 예산 슬롯(tor_budget.py), .onion 가용성 기록(onion_prober.py), 요청 지표/받은 바이트/호스트별 지연
+  히스토그램(crawl_metrics.py), get() 1회당 "fetch" trace span (host, status, bytes, circuit, cache — tracing.py)
+
+    async with Fetcher() as fetcher:
+        res = await fetcher.get(url, timeout=60)
+        res.raise_for_status()
+"""
+
+import asyncio
+import email.utils
+import random
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+import aimd
+import crawl_metrics
+import http_cache
+import onion_prober
+import tor_budget
+import tor_circuits
+import tracing
+import warc_archive
+
+PORT = tor_circuits.DEFAULT_PORT
+TOR_PROXY = f"socks5h://127.0.0.1:{PORT}"
+
+try:
+    import brotli  # noqa: F401  (httpx가 br 디코딩에 사용)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+OVERLOAD_STATUS = {429, 503}    # AIMD 감소 신호 (그 밖의 5xx는 서버 오류로 보고 상한 유지)
+RETRY_EXCEPTIONS = (httpx.TransportError,)  # ConnectError, TimeoutException, RemoteProtocolError 등
+
+HEDGE_ENV = "FETCH_HEDGE"       # 0이면 hedging 끔 (러너는 --no-hedge)
+LATENCY_WINDOW = 200            # 호스트별로 기억하는 최근 성공 요청 지연 수
+MIN_LATENCY_SAMPLES = 10        # 이보다 적으면 적응형 timeout/hedging을 쓰지 않음
+TIMEOUT_MULTIPLIER = 3.0        # 적응형 timeout = p99 × 배수
+MIN_TIMEOUT = 10.0
+MAX_TIMEOUT = 120.0
+HEDGE_QUANTILE = 0.95           # 첫 요청이 이 분위 지연을 넘기면 hedge 요청 발사
+HEDGE_RATIO = 0.1               # Fetcher 요청 수 대비 hedge 요청 비율 상한 (Tor 부하 제한)
+
+
+class TargetDown(httpx.ConnectError):
+    """onion_prober에 down으로 기록된 대상 (요청하지 않고 즉시 실패)"""
+
+
+def _is_onion(url) -> bool:
+    return (urlsplit(str(url)).hostname or "").endswith(".onion")
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostLatency:
+    """호스트별 최근 성공 요청 지연. 프로세스 공용이라 in-process 모드에서는 크롤러들이 함께 학습"""
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, latency: float):
+        with self._lock:
+            self._samples.setdefault(host, deque(maxlen=self.window)).append(latency)
+
+    def quantile(self, host: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return crawl_metrics.percentile(samples, q)
+
+    def timeout(self, host: str, default: float) -> float:
+        p99 = self.quantile(host, 0.99)
+        if p99 is None:
+            return default
+        return max(MIN_TIMEOUT, min(MAX_TIMEOUT, p99 * TIMEOUT_MULTIPLIER))
+
+
+LATENCY = HostLatency()
+
+
+class Fetcher:
+    """크롤러 1회 실행 동안 유지하는 HTTP 클라이언트. 같은 이벤트 루프 안에서만 사용"""
+    def __init__(self,
+                 proxy: Optional[str] = TOR_PROXY,
+                 timeout: float = 30.0,
+                 max_retries: int = 2,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0,
+                 max_connections: int = 8,
+                 headers: Optional[Dict[str, str]] = None,
+                 verify: bool = True,
+                 circuits: Optional[tor_circuits.CircuitPool] = None,
+                 hedge: Optional[bool] = None,
+                 adaptive_concurrency: bool = False,
+                 is_challenge: Optional[Callable[[httpx.Response], bool]] = None,
+                 cache: Optional[http_cache.HttpCache] = None):
+        self.proxy = proxy
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        transport_kwargs = {
+            "verify": verify,
+            "limits": httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        }
+        replay = warc_archive.replaying()
+        self.replay = replay is not None
+        self.warc: Optional[warc_archive.WarcWriter] = None
+        if self.replay:
+            # 재생: 기록된 응답만 돌려주므로 재시도/캐시는 의미가 없고 결과만 흐려짐
+            self.circuits = None
+            self.max_retries = 0
+            cache = None
+            transport = warc_archive.ReplayAsyncTransport(warc_archive.archive(replay))
+        elif proxy == TOR_PROXY or circuits is not None:
+            # 기본 Tor 프록시는 회로 풀을 거쳐 회로마다 따로 연결 (TOR_CIRCUITS=1 이면 단일 회로)
+            self.circuits = circuits or tor_circuits.default_pool()
+            transport = tor_circuits.PooledAsyncTransport(self.circuits, **transport_kwargs)
+        else:
+            self.circuits = None
+            transport = httpx.AsyncHTTPTransport(proxy=proxy, **transport_kwargs)
+        if proxy and not self.replay:
+            # Tor 경유 요청만 공유 Tor 예산에서 슬롯을 받음
+            transport = tor_budget.BudgetedAsyncTransport(transport)
+        if not self.replay and warc_archive.recording():
+            # 캐시 적중은 네트워크를 거치지 않아 기록되지 않으므로, 기록 중에는 캐시를 쓰지 않음
+            cache = None
+            self.warc = warc_archive.WarcWriter.for_crawler(tor_budget.CURRENT_CRAWLER.get())
+            transport = warc_archive.RecordingAsyncTransport(transport, self.warc)
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            headers={**DEFAULT_HEADERS, **(headers or {})},
+            follow_redirects=True,
+        )
+        if hedge is None:
+            hedge = os.environ.get(HEDGE_ENV, "1").strip().lower() not in {"0", "false", "no"}
+        # hedge 요청은 다른 회로로 보내야 의미가 있으므로 회로가 2개 이상일 때만
+        self.hedge = bool(hedge and self.circuits and len(self.circuits.circuits) > 1)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0  # single-flight로 합쳐진 요청 수
+        self.requests = 0
+        self.hedged = 0      # 보낸 hedge 요청 수
+        self.hedge_wins = 0  # hedge 쪽 응답이 먼저 온 횟수
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_connections = max_connections
+        self.is_challenge = is_challenge
+        self._limiters: Dict[str, aimd.AIMDLimiter] = {}
+        self.cache = cache
+
+    def limiter(self, host: str) -> aimd.AIMDLimiter:
+        lim = self._limiters.get(host)
+        if lim is None:
+            # 연결 수를 기본 AIMD 상한보다 크게 잡은 경우에만 상한도 따라 올림
+            lim = self._limiters[host] = aimd.AIMDLimiter(host, max_limit=max(aimd.MAX_LIMIT, self.max_connections))
+        return lim
+
+    def limiters(self) -> List[aimd.AIMDLimiter]:
+        return list(self._limiters.values())
+
+    def _challenged(self, response: httpx.Response) -> bool:
+        return self.is_challenge is not None and response.is_success and self.is_challenge(response)
+
+    async def __aenter__(self) -> "Fetcher":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+        if self.warc is not None:
+            print(f"[warc] 기록: {self.warc.path} (레코드 {self.warc.records}개)")
+
+    async def get(self, url: str, *, timeout: Optional[float] = None,
+                  headers: Optional[Dict[str, str]] = None, retries: Optional[int] = None) -> httpx.Response:
+        """
+        URL을 가져와 본문까지 읽은 응답을 반환합니다. HTTP 상태 오류는 raise하지 않으므로
+        호출 측에서 raise_for_status()로 확인합니다. 재시도 후에도 전송 오류면 httpx 예외가 그대로 전파됩니다.
+        retries를 주면 이 요청만 max_retries 대신 그 횟수로 재시도합니다 (mirrors.py 경쟁 요청은 0).
+        """
+        key = str(url)
+        with tracing.span("fetch", url=key, host=urlsplit(key).hostname) as sp:
+            pending = self._inflight.get(key)
+            if pending is not None and not headers:
+                self.coalesced += 1
+                sp.set(coalesced=True)
+                response = await asyncio.shield(pending)
+            else:
+                response = await self._get_single_flight(key, timeout, headers, retries)
+            sp.set(status=response.status_code,
+                   bytes=response.num_bytes_downloaded,
+                   circuit=response.extensions.get(tor_circuits.CIRCUIT_EXT),
+                   cache=response.extensions.get(http_cache.CACHE_EXT))
+            return response
+
+    async def _get_single_flight(self, key: str, timeout: Optional[float],
+                                 headers: Optional[Dict[str, str]], retries: Optional[int]) -> httpx.Response:
+        fut = asyncio.get_running_loop().create_future()
+        if not headers:
+            self._inflight[key] = fut
+        try:
+            response = await self._get_with_retries(key, timeout, headers, retries)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # 기다리는 쪽이 없어도 경고가 나지 않도록 확인 처리
+            raise
+        else:
+            fut.set_result(response)
+            return response
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            after = _retry_after(response)
+            if after is not None:
+                return min(after, self.max_backoff)
+        base = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return base / 2 + random.uniform(0, base / 2)
+
+    async def _get_with_retries(self, url: str, timeout: Optional[float],
+                                headers: Optional[Dict[str, str]],
+                                retries: Optional[int] = None, use_cache: bool = True) -> httpx.Response:
+        max_retries = self.max_retries if retries is None else retries
+        cache = self.cache if use_cache and not headers else None
+        entry = None
+        if cache is not None:
+            entry = await asyncio.to_thread(cache.lookup, url)
+            if entry is not None and entry.fresh(cache.ttl):
+                cached = await asyncio.to_thread(cache.response, url, entry, "hit")
+                if cached is not None:
+                    crawl_metrics.observe_cache(True, fresh=True)
+                    return cached
+            if entry is not None:
+                headers = entry.conditional_headers() or None
+
+        onion = _is_onion(url) and not self.replay
+        if onion and onion_prober.known_dead(url):
+            raise TargetDown(f"{urlsplit(url).hostname} down 상태로 기록됨 (onion_prober)")
+
+        host = urlsplit(url).hostname or ""
+        for attempt in range(max_retries + 1):
+            t0 = time.monotonic()
+            try:
+                response = await self._limited_attempt(url, host, timeout, headers)
+            except RETRY_EXCEPTIONS as e:
+                latency = time.monotonic() - t0
+                if attempt < max_retries:
+                    await asyncio.sleep(self._delay(attempt))
+                    continue
+                crawl_metrics.observe_fetch(latency, ok=False, host=host)
+                if onion:
+                    await asyncio.to_thread(onion_prober.record_failure, url, e)
+                raise
+
+            latency = time.monotonic() - t0
+            retryable = response.status_code in RETRY_STATUS or self._challenged(response)
+            if retryable and attempt < max_retries:
+                await asyncio.sleep(self._delay(attempt, response))
+                continue
+            crawl_metrics.observe_fetch(latency, ok=response.is_success or response.status_code == 304, host=host)
+            crawl_metrics.observe_bytes(response.num_bytes_downloaded)
+            if response.status_code < 500:
+                # hedge가 이긴 경우에도 그 요청 자체의 소요 시간으로 학습
+                LATENCY.observe(host, response.elapsed.total_seconds())
+            if onion and response.status_code < 500:
+                # 재시도 후에도 5xx면 서비스가 정상이라고 볼 수 없으므로 down 기록을 지우지 않음
+                await asyncio.to_thread(onion_prober.record_success, url, latency)
+            if cache is not None:
+                return await self._cached(cache, url, entry, response, timeout, retries)
+            return response
+        raise AssertionError("unreachable")
+
+    async def _cached(self, cache: http_cache.HttpCache, url: str, entry: Optional[http_cache.Entry],
+                      response: httpx.Response, timeout: Optional[float],
+                      retries: Optional[int]) -> httpx.Response:
+        """받은 응답을 캐시에 반영하고 호출 측에 돌려줄 응답을 반환 (304면 저장본)"""
+        if response.status_code == 304 and entry is not None:
+            await asyncio.to_thread(cache.touch, url, entry)
+            cached = await asyncio.to_thread(cache.response, url, entry, "revalidated")
+            if cached is not None:
+                crawl_metrics.observe_cache(True)
+                return cached
+            # 저장본이 그사이 사라졌거나 손상됨 → 조건 없이 다시 받음
+            return await self._get_with_retries(url, timeout, None, retries, use_cache=False)
+        crawl_metrics.observe_cache(False)
+        outcome = "skip" if self._challenged(response) else await asyncio.to_thread(cache.store, url, response, entry)
+        response.extensions[http_cache.CACHE_EXT] = outcome
+        return response
+
+    async def _limited_attempt(self, url: str, host: str, timeout: Optional[float],
+                               headers: Optional[Dict[str, str]]) -> httpx.Response:
+        """호스트별 AIMD 슬롯 안에서 요청하고 결과를 혼잡 신호로 알려줌 (꺼져 있으면 그대로 요청)"""
+        if not self.adaptive_concurrency:
+            return await self._attempt(url, host, timeout, headers)
+        async with self.limiter(host).slot() as slot:
+            t0 = time.monotonic()
+            try:
+                response = await self._attempt(url, host, timeout, headers)
+            except httpx.TimeoutException:
+                slot.overload("timeout")
+                raise
+            if response.status_code in OVERLOAD_STATUS:
+                slot.overload(f"HTTP {response.status_code}")
+            elif self._challenged(response):
+                slot.overload("challenge")
+            elif response.status_code < 500:
+                slot.success(time.monotonic() - t0)
+            return response
+
+    async def _attempt(self, url: str, host: str, timeout: Optional[float],
+                       headers: Optional[Dict[str, str]]) -> httpx.Response:
+        """요청 1회 (필요하면 hedge 포함). 호출 측 timeout은 관측 지연이 모이기 전까지의 기본값"""
+        self.requests += 1
+        kwargs = {"headers": headers, "timeout": LATENCY.timeout(host, timeout or self.timeout)}
+        delay = None
+        if self.hedge and self.hedged < HEDGE_RATIO * self.requests:
+            delay = LATENCY.quantile(host, HEDGE_QUANTILE)
+        if delay is None:
+            return await self.client.get(url, **kwargs)
+
+        chosen = {}  # 첫 요청이 탄 회로 (PooledAsyncTransport가 채움)
+        primary = asyncio.ensure_future(
+            self.client.get(url, extensions={tor_circuits.CIRCUIT_EXT: chosen}, **kwargs))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            self.hedged += 1
+            hedge = asyncio.ensure_future(
+                self.client.get(url, extensions={tor_circuits.AVOID_EXT: chosen.get("index")}, **kwargs))
+            tasks.add(hedge)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        if t is hedge:
+                            self.hedge_wins += 1
+                        return t.result()
+                    error = t.exception()
+            raise error
+        finally:
+            for t in tasks:
+                t.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
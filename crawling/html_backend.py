@@ -0,0 +1,349 @@
+# html_backend.py
+"""
+크롤러 HTML 파서의 백엔드 선택. 파서 코드는 기존 CSS 선택자를 그대로 쓰고, 트리만 더 빠른 구현으로 바꿉니다.
+
+- selectolax : lexbor(C) 파서 + lexbor CSS 엔진. 가장 빠르고 메모리도 적음 (pip install selectolax)
+- lxml       : BeautifulSoup + lxml 트리 빌더. 선택자는 기존과 같은 soupsieve (pip install lxml)
+- html.parser: 기존 BeautifulSoup 기본값 (기준 구현)
+  lxml.html 자체의 .cssselect()는 cssselect 패키지가 필요하고 :has() 등을 지원하지 않아 쓰지 않음
+
+HTML_PARSER=<이름> 으로 고정할 수 있고(러너는 --html-parser), 지정하지 않으면 설치된 것 중 위 순서대로 사용.
+세 백엔드 모두 Node 인터페이스(select / select_one / text / attr)로 감싸며, text()는 BeautifulSoup의
+get_text()와 같은 규칙(script/style 내용 제외, strip이면 빈 조각 제외)을 따릅니다.
+
+    doc = html_backend.parse(html)
+    for item in doc.select("#victim-list .victim-item"):
+        name = item.select_one("strong").text(strip=True)
+
+`python3 html_backend.py parity [--warc PATH]` : 테스트베드 페이지(+ 기록한 WARC 응답)에서 백엔드별 추출 결과가
+                                               기준(html.parser, 페이지 전체 파싱)과 같은지 확인 (다르면 종료 코드 1)
+`python3 html_backend.py bench [--docs N]`     : 백엔드 × 페이지 종류별 문서/초와 최대 메모리(RSS 증가분).
+                                               darkforums 게시물은 첫 게시물만 파싱(targeted)과 전체(full)를 함께 측정
+                                               (긴 게시물은 --replies 300 등)
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+PARSER_ENV = "HTML_PARSER"
+BACKENDS = ("selectolax", "lxml", "html.parser")  # 자동 선택 순서 (빠른 것부터)
+REFERENCE = "html.parser"
+
+# get_text()가 내용을 문자열로 치지 않는 태그 (BeautifulSoup과 동일)
+_RAW_TEXT_TAGS = frozenset({"script", "style", "template"})
+_RAW_TEXT_CSS = "script, style, template"
+_SEP = "\x00"
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # 선택 의존성
+    LexborHTMLParser = None
+
+try:
+    from bs4 import BeautifulSoup
+    from bs4.builder import builder_registry
+except ImportError:  # selectolax만 있는 환경
+    BeautifulSoup = builder_registry = None
+
+
+def available() -> List[str]:
+    names = []
+    if LexborHTMLParser is not None:
+        names.append("selectolax")
+    if BeautifulSoup is not None:
+        if builder_registry.lookup("lxml") is not None:
+            names.append("lxml")
+        names.append("html.parser")
+    return names
+
+
+_default: Optional[str] = None
+
+
+def default_backend() -> str:
+    """HTML_PARSER가 있으면 그 값, 없으면 설치된 백엔드 중 가장 빠른 것"""
+    global _default
+    name = os.environ.get(PARSER_ENV, "").strip().lower()
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"{PARSER_ENV}={name}: {', '.join(BACKENDS)} 중 하나여야 합니다")
+        return name
+    if _default is None:
+        names = available()
+        if not names:
+            raise ImportError("HTML 파서가 없습니다 (pip install beautifulsoup4 또는 selectolax)")
+        _default = names[0]
+    return _default
+
+
+class SoupNode:
+    """BeautifulSoup Tag 래퍼 (html.parser / lxml 백엔드)"""
+    __slots__ = ("_tag",)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    def select(self, css: str) -> List["SoupNode"]:
+        return [SoupNode(t) for t in self._tag.select(css)]
+
+    def select_one(self, css: str) -> Optional["SoupNode"]:
+        t = self._tag.select_one(css)
+        return SoupNode(t) if t is not None else None
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        return self._tag.get_text(separator, strip=strip)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._tag.get(name)
+        if value is None:
+            return default
+        return " ".join(value) if isinstance(value, list) else value  # class 등 다중 값 속성
+
+
+class LexborNode:
+    """selectolax LexborNode 래퍼. 트리(parser)를 함께 잡아 두어 노드가 살아 있는 동안 해제되지 않게 함"""
+    __slots__ = ("_node", "_tree")
+
+    def __init__(self, node, tree):
+        self._node = node
+        self._tree = tree
+
+    def select(self, css: str) -> List["LexborNode"]:
+        return [LexborNode(n, self._tree) for n in self._node.css(css)]
+
+    def select_one(self, css: str) -> Optional["LexborNode"]:
+        n = self._node.css_first(css)
+        return LexborNode(n, self._tree) if n is not None else None
+
+    def _strings(self) -> List[str]:
+        node = self._node
+        if node.tag in _RAW_TEXT_TAGS:
+            return [node.text(deep=True)]
+        if node.css_first(_RAW_TEXT_CSS) is None:
+            # 흔한 경우: C 쪽에서 한 번에 이어 붙인 뒤 나눔
+            return node.text(deep=True, separator=_SEP).split(_SEP)
+        return [n.text_content or "" for n in node.traverse(include_text=True)
+                if n.tag == "-text" and n.parent.tag not in _RAW_TEXT_TAGS]
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        strings = self._strings()
+        if strip:
+            return separator.join(s for s in (s.strip() for s in strings) if s)
+        return separator.join(strings)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        attributes = self._node.attributes
+        if name not in attributes:
+            return default
+        value = attributes[name]
+        return "" if value is None else value  # 값 없는 속성은 BeautifulSoup처럼 ""
+
+
+def parse(html: str, backend: Optional[str] = None):
+    """html 문서를 backend(기본: default_backend())로 파싱해 문서 루트 Node를 돌려줍니다."""
+    name = backend or default_backend()
+    if name == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("selectolax가 설치되어 있지 않습니다 (pip install selectolax)")
+        tree = LexborHTMLParser(html)
+        return LexborNode(tree.root, tree)
+    if BeautifulSoup is None:
+        raise ImportError("beautifulsoup4가 설치되어 있지 않습니다")
+    if name == "lxml" and builder_registry.lookup("lxml") is None:
+        raise ImportError("lxml이 설치되어 있지 않습니다 (pip install lxml)")
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 HTML 파서: {name}")
+    return SoupNode(BeautifulSoup(html, name))
+
+
+# ── 파리티 확인 / 벤치마크 (CLI) ──
+def extractors() -> Dict[str, Callable[[str, str, bool], object]]:
+    """
+    페이지 종류 → (html, backend, full) 을 받아 비교 가능한 추출 결과를 돌려주는 함수 (크롤러 모듈은 여기서만 import).
+    full=False면 크롤러 기본 방식(darkforums 게시물은 첫 게시물까지만 파싱), True면 페이지 전체
+    """
+    import crawler_beautifulsoup_darkforums as darkforums
+    import crawler_coinbase_cartel as coinbase
+    import crawler_ransomware_live as ransomware
+
+    def ransomware_live(html, backend, full=False):
+        data = ransomware.parse_ransomware_live_data(html, backend=backend)
+        return {"statistics": data["statistics"], "victims": data["victims"]}  # 수집 시각 제외
+
+    return {
+        "ransomware_live": ransomware_live,
+        "coinbase_cartel": lambda html, backend, full=False: [
+            v.to_dict() for v in coinbase.parse_victims_from_html(html, backend=backend)],
+        "darkforums_listing": lambda html, backend, full=False: darkforums.parse_listing_page(html, backend=backend),
+        "darkforums_thread": lambda html, backend, full=False: darkforums.parse_post_details(
+            html, "http://darkforums/Thread-1", backend=backend, full=full),
+    }
+
+
+def testbed_corpus(replies: int = 10) -> List[Tuple[str, str, str]]:
+    """테스트베드가 만드는 페이지: (종류, 이름, html)"""
+    import testbed
+
+    content = testbed.Content(testbed.TestbedConfig(replies=replies))
+    docs = [("ransomware_live", "ransomware_index", content.ransomware_index().decode()),
+            ("coinbase_cartel", "coinbase_index", content.coinbase_index().decode())]
+    for page in (1, 2):
+        docs.append(("darkforums_listing", f"Forum-Databases?page={page}",
+                     content.forum_page("Forum-Databases", page).decode()))
+    for tid in (1, 2, 3, 100001):
+        docs.append(("darkforums_thread", f"Thread-{tid}", content.thread_page(tid).decode()))
+    return docs
+
+
+def _warc_kind(url: str) -> Optional[str]:
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    if "ransomware.live" in (parts.hostname or "") and parts.path in ("", "/"):
+        return "ransomware_live"
+    if parts.path.startswith("/Forum-"):
+        return "darkforums_listing"
+    if parts.path.startswith("/Thread-"):
+        return "darkforums_thread"
+    if parts.hostname and parts.hostname.endswith(".onion") and parts.path in ("", "/"):
+        return "coinbase_cartel"
+    return None
+
+
+def warc_corpus(path) -> List[Tuple[str, str, str]]:
+    """WARC 재생 기록(warc_archive.py)의 200 HTML 응답 중 파서가 다루는 페이지"""
+    import httpx
+    import warc_archive
+
+    docs = []
+    for url, (status, headers, body) in warc_archive.Archive(path).responses.items():
+        kind = _warc_kind(url)
+        if kind is None or status != 200:
+            continue
+        response = httpx.Response(status, headers=headers, stream=httpx.ByteStream(body))
+        response.read()  # Content-Encoding 해제
+        if "html" in response.headers.get("content-type", "html"):
+            docs.append((kind, url, response.text))
+    return docs
+
+
+def parity(docs: List[Tuple[str, str, str]], backends: List[str]) -> int:
+    """기준(html.parser, 페이지 전체)과 크롤러 기본 방식의 추출 결과가 다른 (백엔드, 문서) 수"""
+    funcs = extractors()
+    mismatches = 0
+    for kind, name, html in docs:
+        expected = funcs[kind](html, REFERENCE, True)
+        for backend in backends:
+            got = funcs[kind](html, backend, False)
+            if got != expected:
+                mismatches += 1
+                print(f"  ✗ {backend:<11} {kind:<19} {name}")
+                print(f"      기준: {json.dumps(expected, ensure_ascii=False)[:300]}")
+                print(f"      결과: {json.dumps(got, ensure_ascii=False)[:300]}")
+    return mismatches
+
+
+def _rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS는 바이트, Linux는 KB
+
+
+def _bench_one(backend: str, kind: str, docs: int, replies: int, full: bool) -> dict:
+    """같은 문서를 docs번 파싱+추출. 새 프로세스에서 실행해야 RSS 최고치가 이 백엔드 것만 반영됨"""
+    html = next(h for k, _, h in testbed_corpus(replies) if k == kind)
+    func = extractors()[kind]
+    gc.collect()
+    rss_before = _rss_kb()  # 크롤러 모듈 import 후 기준. 첫 호출의 트리도 최고치에 포함
+    func(html, backend, full)  # 선택자 컴파일 등 첫 호출 비용은 시간에서 제외
+    t0 = time.perf_counter()
+    for _ in range(docs):
+        func(html, backend, full)
+    elapsed = time.perf_counter() - t0
+    rss_after = _rss_kb()
+    return {"backend": backend, "kind": kind, "full": full, "docs": docs, "kb": round(len(html.encode()) / 1024, 1),
+            "docs_per_sec": round(docs / elapsed, 1), "ms_per_doc": round(elapsed / docs * 1000, 3),
+            "peak_rss_delta_kb": None if rss_before is None else rss_after - rss_before}
+
+
+def bench(backends: List[str], docs: int, replies: int) -> List[dict]:
+    results = []
+    for kind in extractors():
+        # 게시물 페이지만 첫 게시물 파싱(targeted)이 있으므로 전체 파싱과 나란히 측정
+        for full in ((False, True) if kind == "darkforums_thread" else (False,)):
+            for backend in backends:
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), "_bench_one", backend, kind,
+                                      str(docs), str(replies), "full" if full else "default"],
+                                     capture_output=True, text=True, check=True)
+                results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def print_bench(results: List[dict]):
+    print(f"{'page':<28} {'KB':>7} {'backend':<11} {'docs/s':>9} {'ms/doc':>8} {'speedup':>8} {'peak RSS +KB':>13}")
+    for kind in dict.fromkeys(r["kind"] for r in results):
+        rows = [r for r in results if r["kind"] == kind]
+        # 기준: html.parser로 페이지 전체 파싱 (기존 크롤러 동작)
+        base = next((r["docs_per_sec"] for r in sorted(rows, key=lambda r: not r["full"])
+                     if r["backend"] == REFERENCE), None)
+        for r in rows:
+            label = f"{kind} ({'full' if r['full'] else 'targeted'})" if kind == "darkforums_thread" else kind
+            speedup = f"{r['docs_per_sec'] / base:.1f}x" if base else "-"
+            rss = "-" if r["peak_rss_delta_kb"] is None else f"{r['peak_rss_delta_kb']:,}"
+            print(f"{label:<28} {r['kb']:>7} {r['backend']:<11} {r['docs_per_sec']:>9,.1f} {r['ms_per_doc']:>8.2f} "
+                  f"{speedup:>8} {rss:>13}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["_bench_one"]:
+        backend, kind, docs, replies, mode = argv[1:6]
+        print(json.dumps(_bench_one(backend, kind, int(docs), int(replies), mode == "full")))
+        return 0
+
+    parser = argparse.ArgumentParser(description="HTML 파서 백엔드 파리티 확인 / 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--backends", default=",".join(available()),
+                        help=f"비교할 백엔드 (기본: 설치된 것 전부, 기준은 {REFERENCE})")
+    common.add_argument("--replies", type=int, default=10, help="테스트베드 게시물 페이지의 답글 수")
+    p_parity = sub.add_parser("parity", parents=[common], help="백엔드별 추출 결과가 기준과 같은지 확인")
+    p_parity.add_argument("--warc", action="append", default=[], help="추가로 비교할 WARC 파일/디렉터리 (여러 번 지정 가능)")
+    p_bench = sub.add_parser("bench", parents=[common], help="백엔드별 문서/초와 최대 메모리")
+    p_bench.add_argument("--docs", type=int, default=200, help="종류별 반복 파싱 횟수")
+    p_bench.add_argument("--json", help="결과를 JSON으로도 저장")
+    args = parser.parse_args(argv)
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    missing = [b for b in backends + [REFERENCE] if b not in available()]
+    if missing:
+        parser.error(f"설치되지 않은 백엔드: {', '.join(missing)} (사용 가능: {', '.join(available())})")
+
+    if args.command == "parity":
+        docs = testbed_corpus(args.replies)
+        for path in args.warc:
+            docs += warc_corpus(path)
+        print(f"[parity] 문서 {len(docs)}개 × 백엔드 {', '.join(backends)} (기준 {REFERENCE}, 페이지 전체 파싱)")
+        mismatches = parity(docs, backends)
+        print(f"[parity] {'모두 일치' if not mismatches else f'불일치 {mismatches}건'}")
+        return 1 if mismatches else 0
+
+    results = bench(backends, args.docs, args.replies)
+    print_bench(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+# http_cache.py
+"""
+크롤러 공용 디스크 HTTP 캐시 (URL 단위, 실행 간 유지).
+
+변경이 없어도 매번 Tor로 전체 페이지를 다시 받는 것을 줄이기 위해 fetch.py의 Fetcher(cache=...)가 사용합니다.
+- 저장한 지 TTL이 지나지 않은 응답은 요청 없이 바로 사용 (fresh hit)
+- TTL이 지나면 ETag/Last-Modified로 조건부 GET(If-None-Match/If-Modified-Since) → 304면 저장본 사용 (revalidated)
+- 검증자가 없는 서버는 본문 sha256을 비교해 바뀌지 않은 본문은 다시 쓰지 않음 (unchanged)
+- 200 이외의 응답, Cache-Control: no-store, 요청별 헤더를 붙인 요청은 캐시하지 않음
+- 소스별 TTL은 TTLS 기본값, 환경 변수 HTTP_CACHE_TTL=dragonforce=600,coinbase_cartel=0 으로 변경
+  (0이면 항상 조건부 GET). HTTP_CACHE=0 이면 캐시를 쓰지 않음 (러너는 --no-http-cache)
+- TTL과 주기 실행: 러너가 주기적으로 도는 목록 페이지는 기본 TTL 0 (매 실행 조건부 GET, 바뀌지 않았으면 304라
+  본문 전송은 아낌). TTL이 실행 주기보다 길면 그 사이 실행은 서버에 묻지 않고 저장본을 쓰므로 새 게시물을 못 보고,
+  --adaptive 데몬은 "새 id 0건"으로 보고 변경률을 낮게 잡아 주기를 늘림. 그래서 TTL을 올릴 때는 주기(또는
+  --min-interval)보다 짧게 두어야 하며, 데몬은 시작할 때 그렇지 않은 소스를 경고함.
+  fresh hit(TTL>0)은 같은 페이지를 짧은 간격으로 반복 실행할 때(개발/재실행)를 위한 것
+- 저장 위치: outputs/http_cache/<소스>/<URL sha256>.json(메타) + .body(디코딩된 본문),
+  러너와 subprocess 크롤러가 함께 쓰므로 원자적 교체. MAX_AGE 동안 쓰이지 않은 항목은 정리
+
+`python3 http_cache.py` 로 소스별 항목 수/크기를, `--clear [소스]` 로 캐시를 비웁니다.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import httpx
+except ImportError:  # 상태 출력/정리는 httpx 없이도 가능
+    httpx = None
+
+CACHE_DIR = Path("outputs/http_cache")
+ENABLE_ENV = "HTTP_CACHE"
+TTL_ENV = "HTTP_CACHE_TTL"
+
+# 소스별 기본 TTL(초). 모두 러너가 주기적으로 다시 확인하는 목록 페이지라 0 (항상 조건부 GET, 위 설명 참고)
+TTLS = {
+    "ransomware_live": 0,
+    "dragonforce": 0,
+    "coinbase_cartel": 0,
+    "darkforums": 0,
+}
+DEFAULT_TTL = 0
+MAX_AGE = 7 * 86400  # 이 기간 동안 쓰이지 않은 항목은 삭제
+
+# 본문과 함께 저장하지 않는 헤더 (저장본은 디코딩된 본문이므로 전송 관련 헤더는 의미가 없음)
+_SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "set-cookie"}
+
+# 응답 extensions 키: 캐시 처리 결과 ("hit" | "revalidated" | "unchanged" | "miss")
+CACHE_EXT = "http_cache"
+
+
+def enabled() -> bool:
+    return os.environ.get(ENABLE_ENV, "1").strip().lower() not in {"0", "false", "no"}
+
+
+def ttl_for(source: str) -> float:
+    """HTTP_CACHE_TTL 환경 변수 > TTLS 기본값 > DEFAULT_TTL"""
+    for item in os.environ.get(TTL_ENV, "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() == source and value.strip():
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                break
+    return TTLS.get(source, DEFAULT_TTL)
+
+
+@dataclasses.dataclass
+class Entry:
+    """저장된 응답 하나의 메타데이터 (본문은 별도 파일)"""
+    url: str
+    headers: Dict[str, str]
+    sha256: str
+    stored_at: float     # 마지막으로 서버와 확인한 시각 (TTL 기준)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: int = 0
+
+    def fresh(self, ttl: float) -> bool:
+        return ttl > 0 and time.time() - self.stored_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        h = {}
+        if self.etag:
+            h["If-None-Match"] = self.etag
+        if self.last_modified:
+            h["If-Modified-Since"] = self.last_modified
+        return h
+
+
+class HttpCache:
+    """한 소스의 캐시 디렉터리. 스레드 안전 (파일 교체는 원자적)"""
+    def __init__(self, source: str, ttl: Optional[float] = None, root: Path = CACHE_DIR):
+        self.source = source
+        self.ttl = ttl_for(source) if ttl is None else ttl
+        self.dir = Path(root) / source
+        self._lock = threading.Lock()
+        self._pruned = False
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.dir / f"{key}.json", self.dir / f"{key}.body"
+
+    def lookup(self, url: str) -> Optional[Entry]:
+        meta, body = self._paths(url)
+        try:
+            entry = Entry(**json.loads(meta.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        if entry.url != url or not body.is_file():
+            return None
+        return entry
+
+    def body(self, url: str) -> Optional[bytes]:
+        try:
+            return self._paths(url)[1].read_bytes()
+        except OSError:
+            return None
+
+    def store(self, url: str, response: "httpx.Response", previous: Optional[Entry] = None) -> str:
+        """
+        200 응답을 저장하고 처리 결과를 반환합니다.
+        "unchanged": 저장본과 본문 해시가 같음(메타만 갱신), "miss": 새로 저장, "skip": 캐시하지 않는 응답
+        """
+        if response.status_code != 200 or "no-store" in response.headers.get("Cache-Control", "").lower():
+            return "skip"
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        unchanged = previous is not None and previous.sha256 == digest
+        entry = Entry(
+            url=url,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS},
+            sha256=digest,
+            stored_at=time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            size=len(content),
+        )
+        meta, body = self._paths(url)
+        with self._lock:
+            self._prune_once()
+            if not unchanged:
+                _atomic_write(body, content)
+            _atomic_write(meta, json.dumps(dataclasses.asdict(entry), ensure_ascii=False).encode("utf-8"))
+        return "unchanged" if unchanged else "miss"
+
+    def touch(self, url: str, entry: Entry):
+        """304 응답: 저장본이 아직 유효하므로 확인 시각만 갱신"""
+        entry.stored_at = time.time()
+        meta, _ = self._paths(url)
+        with self._lock:
+            _atomic_write(meta, json.dumps(dataclasses.asdict(entry), ensure_ascii=False).encode("utf-8"))
+
+    def response(self, url: str, entry: Entry, outcome: str) -> Optional["httpx.Response"]:
+        """저장본으로 응답 객체를 만듭니다 (본문 파일이 사라졌으면 None)"""
+        content = self.body(url)
+        if content is None or hashlib.sha256(content).hexdigest() != entry.sha256:
+            return None
+        return httpx.Response(200, headers=entry.headers, content=content,
+                              request=httpx.Request("GET", url), extensions={CACHE_EXT: outcome})
+
+    def _prune_once(self):
+        """프로세스당 한 번, MAX_AGE 동안 확인되지 않은 항목 삭제"""
+        if self._pruned:
+            return
+        self._pruned = True
+        if not self.dir.is_dir():
+            return
+        cutoff = time.time() - MAX_AGE
+        for meta in self.dir.glob("*.json"):
+            try:
+                if meta.stat().st_mtime < cutoff:
+                    meta.unlink()
+                    meta.with_suffix(".body").unlink(missing_ok=True)
+            except OSError:
+                continue
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def for_source(source: str, ttl: Optional[float] = None) -> Optional[HttpCache]:
+    """크롤러용: 캐시가 꺼져 있으면(HTTP_CACHE=0) None"""
+    return HttpCache(source, ttl) if enabled() else None
+
+
+def print_status(root: Path = CACHE_DIR):
+    print(f"{'source':<20} {'entries':>8} {'size(KB)':>10} {'ttl(s)':>8}")
+    if not root.is_dir():
+        return
+    for d in sorted(p for p in root.iterdir() if p.is_dir()):
+        bodies = list(d.glob("*.body"))
+        size = sum(b.stat().st_size for b in bodies)
+        print(f"{d.name:<20} {len(bodies):>8} {size / 1024:>10.1f} {ttl_for(d.name):>8.0f}")
+
+
+if __name__ == "__main__":
+    if "--clear" in sys.argv:
+        targets = sys.argv[sys.argv.index("--clear") + 1:]
+        for path in [CACHE_DIR / t for t in targets] or [CACHE_DIR]:
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"[http_cache] 삭제: {path}")
+    print_status()
@@ -0,0 +1,181 @@
+# log_sink.py
+"""
+러너(script.py)용 비동기 로그 싱크.
+
+- 라인을 메모리에 모았다가 크기(flush_bytes) 또는 시간(flush_interval) 기준으로 한 번에 기록
+- 활성 파일 outputs/logs/<name>.log 하나에 이어 쓰고, 크기(max_bytes) 또는 날짜가 바뀌면 회전
+- 회전된 세그먼트는 <name>_YYYYmmdd_HHMMSS.log.gz 로 압축(스레드에서 수행)
+- 보존 기간(retention_days)/최대 세그먼트 수(max_segments)를 넘는 세그먼트는 삭제
+  (같은 디렉터리에 profiling.py가 남기는 .pstats/.collapsed 도 prune()으로 같은 기준을 적용)
+"""
+
+import asyncio
+import gzip
+import os
+import shutil
+import time
+from datetime import datetime, date
+from pathlib import Path
+
+LOG_DIR = Path("outputs/logs")
+PROFILE_SUFFIXES = (".pstats", ".collapsed")  # profiling.py 출력
+
+
+def prune(directory: Path, pattern: str, retention_days: int | None, max_files: int | None):
+    """directory에서 pattern에 맞는 파일 중 보존 기간이 지났거나 최신 max_files개 밖인 파일을 삭제합니다."""
+    files = []
+    for p in Path(directory).glob(pattern):
+        try:
+            files.append((p.stat().st_mtime, p))
+        except FileNotFoundError:  # 다른 스레드에서 압축 중 삭제된 원본
+            continue
+    files.sort(reverse=True)
+    cutoff = time.time() - retention_days * 86400 if retention_days else None
+    for i, (mtime, p) in enumerate(files):
+        too_many = max_files is not None and i >= max_files
+        too_old = cutoff is not None and mtime < cutoff
+        if too_many or too_old:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+class AsyncLogSink:
+    def __init__(self,
+                 name: str,
+                 log_dir: Path = LOG_DIR,
+                 flush_bytes: int = 64 * 1024,
+                 flush_interval: float = 1.0,
+                 max_bytes: int = 10 * 1024 * 1024,
+                 rotate_daily: bool = True,
+                 retention_days: int | None = 14,
+                 max_segments: int | None = 50,
+                 compress: bool = True):
+        self.name = name
+        self.log_dir = Path(log_dir)
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.retention_days = retention_days
+        self.max_segments = max_segments
+        self.compress = compress
+
+        self.path = self.log_dir / f"{name}.log"
+        self.bytes_written = 0
+        self._buf: list[str] = []
+        self._buf_bytes = 0
+        self._f = None
+        self._opened_on: date | None = None
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._flusher: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    # ── public ──
+    async def start(self) -> "AsyncLogSink":
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._open()
+        # 이전 실행에서 남은 활성 파일이 어제 날짜면 바로 회전
+        if self._needs_rotation(0):
+            self._rotate()
+        else:
+            self._spawn(asyncio.to_thread(self._enforce_retention))
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return self
+
+    def write(self, line: str):
+        """라인 하나를 버퍼에 추가합니다. (line은 개행 포함)"""
+        self._buf.append(line)
+        self._buf_bytes += len(line)
+        if self._buf_bytes >= self.flush_bytes:
+            self._wakeup.set()
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._flusher:
+            await self._flusher
+        self._flush()
+        if self._f:
+            self._f.close()
+            self._f = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ── private ──
+    async def _flush_loop(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._flush()
+
+    def _open(self):
+        self._f = self.path.open("a", encoding="utf-8")
+        if self.path.stat().st_size:
+            self._opened_on = date.fromtimestamp(self.path.stat().st_mtime)
+        else:
+            self._opened_on = date.today()
+
+    def _needs_rotation(self, incoming: int) -> bool:
+        if self.rotate_daily and self._opened_on != date.today() and self._f.tell():
+            return True
+        return bool(self.max_bytes) and self._f.tell() > 0 and self._f.tell() + incoming > self.max_bytes
+
+    def _flush(self):
+        if not self._buf:
+            return
+        data = "".join(self._buf)
+        self._buf.clear()
+        self._buf_bytes = 0
+        if self._needs_rotation(len(data)):
+            self._rotate()
+        self._f.write(data)
+        self._f.flush()
+        self.bytes_written += len(data)
+
+    def _rotate(self):
+        self._f.close()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        segment = self.log_dir / f"{self.name}_{stamp}.log"
+        n = 1
+        while segment.exists() or segment.with_suffix(".log.gz").exists():
+            segment = self.log_dir / f"{self.name}_{stamp}_{n}.log"
+            n += 1
+        os.replace(self.path, segment)
+        self._f = self.path.open("a", encoding="utf-8")
+        self._opened_on = date.today()
+
+        self._spawn(asyncio.to_thread(self._finalize_segment, segment))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _finalize_segment(self, segment: Path):
+        if self.compress:
+            gz = segment.with_suffix(".log.gz")
+            with segment.open("rb") as src, gzip.open(gz, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            segment.unlink()
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        # 회전된 세그먼트 + 이전 버전 러너가 남긴 <name>_<stamp>.log 모두 대상
+        prune(self.log_dir, f"{self.name}_*.log*", self.retention_days, self.max_segments)
+        # 같은 이름의 프로파일 파일(profiling.py)도 같은 기준으로 (확장자별로 max_segments개)
+        for suffix in PROFILE_SUFFIXES:
+            prune(self.log_dir, f"{self.name}_*{suffix}", self.retention_days, self.max_segments)
@@ -0,0 +1,127 @@
+# mirrors.py
+"""
+여러 onion 미러를 가진 유출 사이트용 미러 선택/경쟁/장애 전환.
+
+- 첫 요청은 happy-eyeballs 방식으로 경쟁: 가장 유망한 미러부터 보내고, STAGGER초 안에 응답이 없거나
+  실패하면 다음 미러에도 보내서 먼저 성공한 미러를 채택 (나머지 요청은 취소)
+  경쟁 요청은 재시도 없이 보내지만, 시도할 미러가 하나뿐이면 경쟁 없이 Fetcher 기본 재시도로 요청
+- 이후 요청은 채택한 미러에 고정. 전송 오류/5xx가 나면 그 미러를 빼고 다시 경쟁해 자동으로 전환
+- 미러별 건강 상태(up/down, 지연)는 onion_prober의 outputs/onion_health.json 에 호스트별로 남으므로
+  다음 실행에서는 살아 있고 빠른 미러부터 시도하고, down 으로 기록된 미러는 맨 뒤로 보냄
+- 미러 목록은 크롤러 상수(MIRRORS) 또는 환경 변수 <이름>_MIRRORS=url1,url2 로 지정
+
+레코드의 id/details_url은 크롤러의 대표 URL로 만들므로 어느 미러에서 받았든 중복 제거 결과는 같습니다.
+"""
+
+import asyncio
+import os
+import statistics
+from typing import Iterable, List, Optional, Set
+
+import httpx
+
+import onion_prober
+from fetch import Fetcher
+
+STAGGER = 3.0  # 다음 미러에 경쟁 요청을 보내기 전 대기(초)
+
+
+class MirrorsExhausted(httpx.ConnectError):
+    """시도할 미러가 남아 있지 않음"""
+
+
+def mirror_list(default: List[str], env: Optional[str] = None) -> List[str]:
+    """환경 변수(쉼표 구분)가 있으면 그 목록, 없으면 기본 목록 (끝의 / 제거, 중복 제거)"""
+    raw = os.environ.get(env, "") if env else ""
+    urls = [u.strip() for u in raw.split(",") if u.strip()] or default
+    return list(dict.fromkeys(u.rstrip("/") for u in urls))
+
+
+def _rank(url: str):
+    """정렬 키: 알려진 down은 맨 뒤, up은 지연 중앙값 순, 기록 없는 미러는 그 사이"""
+    if onion_prober.known_dead(url):
+        return (2, 0.0)
+    e = onion_prober.store().get(url)
+    if e and e["status"] == "up" and e.get("latency_ms"):
+        return (0, statistics.median(e["latency_ms"]))
+    return (1, 0.0)
+
+
+class MirrorSet:
+    """한 소스의 미러 목록. 같은 Fetcher(이벤트 루프) 안에서만 사용"""
+    def __init__(self, name: str, mirrors: Iterable[str], fetcher: Fetcher, stagger: float = STAGGER):
+        self.name = name
+        self.mirrors = list(mirrors)
+        self.fetcher = fetcher
+        self.stagger = stagger
+        self.current: Optional[str] = None
+        self.failovers = 0
+
+    def ordered(self, exclude: Set[str] = frozenset()) -> List[str]:
+        return sorted((m for m in self.mirrors if m not in exclude), key=_rank)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        """현재 미러로 요청하고, 미러가 죽었으면 다른 미러로 전환해서 응답을 반환합니다."""
+        if self.current is None:
+            return await self.race(path, **kwargs)
+        failed = self.current
+        try:
+            response = await self.fetcher.get(failed + path, **kwargs)
+            if response.status_code < 500 or len(self.mirrors) == 1:
+                return response
+            reason = f"HTTP {response.status_code}"
+        except httpx.TransportError as e:
+            if len(self.mirrors) == 1:
+                raise
+            reason = str(e) or type(e).__name__
+        self.failovers += 1
+        print(f"[mirrors] {self.name}: {failed} 실패({reason}) → 다른 미러로 전환")
+        self.current = None
+        return await self.race(path, exclude={failed}, **kwargs)
+
+    async def race(self, path: str, exclude: Set[str] = frozenset(), **kwargs) -> httpx.Response:
+        """happy-eyeballs: 유망한 순서로 STAGGER초 간격(앞 요청이 실패하면 즉시) 요청을 겹쳐 보내고 먼저 성공한 미러 채택"""
+        candidates = self.ordered(exclude)
+        if not candidates:
+            raise MirrorsExhausted(f"{self.name}: 시도할 미러 없음")
+        if len(candidates) == 1:
+            # 경쟁할 상대가 없으면 Fetcher의 기본 재시도(백오프/Retry-After)를 그대로 사용
+            mirror = candidates[0]
+            response = await self.fetcher.get(mirror + path, **kwargs)
+            if response.status_code < 500 or len(self.mirrors) == 1:
+                self.current = mirror
+                return response
+            raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+        tasks = {}
+        pending: Set[asyncio.Task] = set()
+        error: Optional[BaseException] = None
+        try:
+            for i, mirror in enumerate(candidates):
+                # 경쟁 중에는 미러 하나에 매달리지 않도록 재시도 없이 보내고, 실패하면 다음 미러로 넘어감
+                task = asyncio.ensure_future(self.fetcher.get(mirror + path, retries=0, **kwargs))
+                tasks[task] = mirror
+                pending.add(task)
+                last = i == len(candidates) - 1
+                while pending:
+                    done, pending = await asyncio.wait(pending, timeout=None if last else self.stagger,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break  # 응답이 늦음 → 다음 미러도 출발
+                    for t in done:
+                        exc = t.exception()
+                        if exc is None and t.result().status_code < 500:
+                            self.current = tasks[t]
+                            print(f"[mirrors] {self.name}: {self.current} 채택")
+                            return t.result()
+                        error = exc or httpx.HTTPStatusError(
+                            f"HTTP {t.result().status_code}", request=t.result().request, response=t.result())
+                    if not last:
+                        break  # 앞 요청이 실패 → 기다리지 않고 다음 미러 출발
+            if error is not None:
+                raise error
+            raise MirrorsExhausted(f"{self.name}: 모든 미러 실패")
+        finally:
+            for t in pending:
+                t.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
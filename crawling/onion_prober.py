@@ -0,0 +1,305 @@
+# onion_prober.py
+"""
+.onion 대상의 가용성(up/down) 상태와 지연 시간 이력을 관리하는 경량 프로버.
+
+서비스가 내려가 있으면 크롤러는 요청마다 timeout(dragonforce 60s, coinbase 30s)을 다 채우고 실패하므로,
+죽은 것으로 알려진 대상은 건너뛰거나 뒤로 미룹니다.
+
+- 수동 기록: 크롤러가 실제 요청 결과를 record_success()/record_failure()로 남김
+  (호스트와 함께 요청한 크롤러 이름도 저장 → 러너가 크롤러별 대상을 알 수 있음)
+- 능동 확인: probe()는 Tor SOCKS5 CONNECT 핸드셰이크만 수행 (HTTP 요청 없이 서비스 도달 여부/지연 측정)
+- 로컬 tor(SOCKS 포트) 자체가 꺼져 있을 때의 실패는 대상 장애로 기록하지 않음
+- 성공 없이 이어진 실패가 FAIL_THRESHOLD회 이상이고 그 연속 실패가 FAIL_WINDOW초 넘게 이어지면 down
+  (상세 페이지 gather처럼 한꺼번에 보낸 요청 몇 개가 같이 실패한 것만으로는 사이트 전체를 내리지 않음).
+  마지막 실패 후 backoff(10분부터 2배씩, 최대 6시간) 동안은
+  known_dead() = True → 크롤러/러너가 즉시 건너뜀. backoff가 지나면 러너가 실행 전에 한 번 probe
+- 상태: outputs/onion_health.json (러너와 subprocess 크롤러가 함께 쓰므로 원자적 교체 + 변경 시 다시 읽기)
+
+`python3 onion_prober.py` 로 현재 상태를 출력하고, `--probe` 를 주면 기록된 모든 대상을 지금 확인합니다.
+"""
+
+import asyncio
+import json
+import os
+import platform
+import socket
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+STATE_PATH = Path("outputs/onion_health.json")
+
+# TOR_SOCKS_PORTS(tor_circuits.py)를 쓰면 그 첫 포트로 확인 (testbed.py 대역 서버 포함)
+PORT = int(os.environ.get("TOR_SOCKS_PORTS", "").split(",")[0].strip()
+           or (9150 if platform.system() == "Windows" else 9050))
+SOCKS_ADDR = ("127.0.0.1", PORT)
+
+FAIL_THRESHOLD = 5            # 성공 없이 이어진 실패가 이 횟수 이상이고
+FAIL_WINDOW = 120.0           # 첫 실패부터 이 시간(초) 넘게 이어지면 down
+BASE_BACKOFF = 10 * 60        # down 판정 후 첫 재확인까지 (초)
+MAX_BACKOFF = 6 * 3600
+LATENCY_HISTORY = 50          # 호스트별 보관할 최근 지연 시간 수
+PROBE_TIMEOUT = 45.0
+SAVE_INTERVAL = 30.0          # 상태 변화 없는 성공 기록은 이 간격으로만 파일에 반영
+
+# 대상이 down 이라 실행하지 않은 경우의 rc (sysexits EX_UNAVAILABLE)
+RC_TARGET_DOWN = 69
+
+# SOCKS5 응답 코드 (Tor가 onion 접속 실패 시 주로 0x04/0x06 반환)
+SOCKS_REPLIES = {
+    0x01: "general failure", 0x02: "not allowed", 0x03: "network unreachable",
+    0x04: "host unreachable", 0x05: "connection refused", 0x06: "TTL expired",
+    0x07: "command not supported", 0x08: "address type not supported",
+}
+
+
+def _host(url: str) -> str:
+    return urlsplit(url if "//" in url else f"//{url}").hostname or url
+
+
+def _socks_alive(addr: Tuple[str, int] = SOCKS_ADDR) -> bool:
+    """로컬 tor SOCKS 포트가 열려 있는지 (꺼져 있으면 실패를 대상 서비스 탓으로 기록하지 않기 위함)"""
+    try:
+        with socket.create_connection(addr, timeout=1.0):
+            return True
+    except OSError:
+        return False
+
+
+def _fmt(epoch: Optional[float]) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S") if epoch else "-"
+
+
+class HealthStore:
+    """호스트별 가용성 상태. 스레드 안전하며, 다른 프로세스가 파일을 바꿨으면 갱신 전에 다시 읽습니다."""
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._saved_at = 0.0
+        self.hosts: Dict[str, dict] = {}
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                self.hosts = json.load(f)
+            self._mtime = mtime
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.hosts, f, indent=4, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+        self._saved_at = time.monotonic()
+
+    def _entry(self, host: str) -> dict:
+        return self.hosts.setdefault(host, {
+            "status": "unknown", "consecutive_failures": 0, "failing_since": None, "down_trips": 0, "crawlers": [],
+            "last_ok": None, "last_failure": None, "last_error": "", "retry_after": None, "latency_ms": [],
+        })
+
+    def record_success(self, url: str, latency: Optional[float] = None, crawler: Optional[str] = None):
+        with self._lock:
+            self._reload()
+            e = self._entry(_host(url))
+            was_down = e["status"] == "down"
+            changed = e["status"] != "up" or e["consecutive_failures"] > 0
+            e.update(status="up", consecutive_failures=0, failing_since=None, down_trips=0,
+                     last_ok=time.time(), retry_after=None)
+            if latency is not None:
+                e["latency_ms"] = (e["latency_ms"] + [round(latency * 1000)])[-LATENCY_HISTORY:]
+            if crawler and crawler not in e["crawlers"]:
+                e["crawlers"].append(crawler)
+                changed = True
+            if changed or time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+                self._save()
+        if was_down:
+            print(f"[onion_prober] {_host(url)}: 다시 응답함 → up")
+
+    def record_failure(self, url: str, error: str = "", crawler: Optional[str] = None):
+        if not _socks_alive():
+            return
+        with self._lock:
+            self._reload()
+            e = self._entry(_host(url))
+            now = time.time()
+            e["consecutive_failures"] += 1
+            if not e.get("failing_since"):
+                e["failing_since"] = now
+            e.update(last_failure=now, last_error=str(error)[:200])
+            if crawler and crawler not in e["crawlers"]:
+                e["crawlers"].append(crawler)
+            became_down = False
+            if e["consecutive_failures"] >= FAIL_THRESHOLD and now - e["failing_since"] >= FAIL_WINDOW:
+                became_down = e["status"] != "down"
+                if not (e["retry_after"] and now < e["retry_after"]):
+                    # backoff는 실패 요청 수가 아니라 down 판정(재확인 실패) 횟수마다 2배
+                    e["down_trips"] = e.get("down_trips", 0) + 1
+                    backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (e["down_trips"] - 1))
+                    e["retry_after"] = now + backoff
+                e["status"] = "down"
+            self._save()
+        if became_down:
+            print(f"[onion_prober] {_host(url)}: {now - e['failing_since']:.0f}초 동안 연속 {e['consecutive_failures']}회 실패 → down "
+                  f"(재확인 {_fmt(e['retry_after'])})")
+
+    def known_dead(self, url: str) -> bool:
+        """down 이고 아직 backoff 중이면 True (요청하지 말고 건너뛸 것)"""
+        with self._lock:
+            self._reload()
+            e = self.hosts.get(_host(url))
+        return bool(e and e["status"] == "down" and e["retry_after"] and time.time() < e["retry_after"])
+
+    def due_for_probe(self, url: str) -> bool:
+        """down 이었지만 backoff가 끝나 다시 확인할 차례"""
+        with self._lock:
+            self._reload()
+            e = self.hosts.get(_host(url))
+        return bool(e and e["status"] == "down" and not (e["retry_after"] and time.time() < e["retry_after"]))
+
+    def hosts_for(self, crawler: str) -> List[str]:
+        with self._lock:
+            self._reload()
+            return [h for h, e in self.hosts.items() if crawler in e.get("crawlers", [])]
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            self._reload()
+            return self.hosts.get(_host(url))
+
+
+_store: Optional[HealthStore] = None
+_store_lock = threading.Lock()
+
+
+def store() -> HealthStore:
+    """프로세스 공용 HealthStore (in-process 모드에서는 러너와 크롤러가 같은 객체를 사용)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HealthStore()
+        return _store
+
+
+def _current_crawler() -> Optional[str]:
+    try:
+        from tor_budget import CURRENT_CRAWLER
+    except ImportError:
+        return None
+    name = CURRENT_CRAWLER.get()
+    return None if name == "unknown" else name
+
+
+# ── 크롤러 쪽 API ──
+def known_dead(url: str) -> bool:
+    return store().known_dead(url)
+
+
+def record_success(url: str, latency: Optional[float] = None):
+    store().record_success(url, latency, crawler=_current_crawler())
+
+
+def record_failure(url: str, error="") -> None:
+    store().record_failure(url, error, crawler=_current_crawler())
+
+
+# ── 능동 확인 ──
+async def probe(url: str, timeout: float = PROBE_TIMEOUT, socks_addr: Tuple[str, int] = SOCKS_ADDR) -> Tuple[bool, float, str]:
+    """
+    Tor SOCKS5로 대상 호스트:포트에 CONNECT만 시도합니다. (성공 여부, 소요 시간, 오류)
+    CONNECT가 성공하면 onion 서비스 descriptor 조회와 rendezvous까지 끝난 것이므로 서비스가 살아 있음.
+    """
+    parts = urlsplit(url if "//" in url else f"http://{url}")
+    host = parts.hostname or url
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    t0 = time.monotonic()
+    writer = None
+    try:
+        async def handshake():
+            nonlocal writer
+            reader, writer = await asyncio.open_connection(*socks_addr)
+            writer.write(b"\x05\x01\x00")  # SOCKS5, 인증 방식 1개: 없음
+            if await reader.readexactly(2) != b"\x05\x00":
+                return "SOCKS 인증 협상 실패"
+            name = host.encode("idna")
+            writer.write(b"\x05\x01\x00\x03" + bytes([len(name)]) + name + struct.pack(">H", port))
+            rep = await reader.readexactly(4)
+            return "" if rep[1] == 0 else SOCKS_REPLIES.get(rep[1], f"SOCKS 오류 0x{rep[1]:02x}")
+
+        error = await asyncio.wait_for(handshake(), timeout=timeout)
+    except asyncio.TimeoutError:
+        error = f"timeout({timeout:.0f}s)"
+    except (OSError, asyncio.IncompleteReadError) as e:
+        error = f"SOCKS 프록시 연결 실패: {e}"
+    finally:
+        if writer is not None:
+            writer.close()
+    return (not error), time.monotonic() - t0, error
+
+
+async def probe_and_record(url: str, timeout: float = PROBE_TIMEOUT, crawler: Optional[str] = None) -> bool:
+    ok, elapsed, error = await probe(url, timeout)
+    s = store()
+    if ok:
+        await asyncio.to_thread(s.record_success, url, elapsed, crawler)
+    else:
+        await asyncio.to_thread(s.record_failure, url, error, crawler)
+    return ok
+
+
+async def preflight(crawler: str, timeout: float = PROBE_TIMEOUT) -> Tuple[bool, str]:
+    """
+    러너가 크롤러 실행 전에 호출. 크롤러가 쓰는 대상이 모두 죽은 것으로 알려져 있으면 (False, 사유).
+    미러가 여러 개인 크롤러는 하나라도 살아 있으면 실행합니다 (mirrors.py가 살아 있는 미러로 전환).
+    backoff가 끝난 down 대상은 지금 probe 해보고 결과에 따라 결정합니다.
+    """
+    s = store()
+    reasons = []
+    for host in s.hosts_for(crawler):
+        if s.known_dead(host):
+            e = s.get(host)
+            reasons.append(f"{host} down (연속 실패 {e['consecutive_failures']}회, 재확인 {_fmt(e['retry_after'])})")
+            continue
+        if s.due_for_probe(host):
+            if not await probe_and_record(host, timeout, crawler):
+                e = s.get(host)
+                reasons.append(f"{host} 재확인 실패({e['last_error']}), 재확인 {_fmt(e['retry_after'])}")
+                continue
+        return True, ""
+    return (False, "; ".join(reasons)) if reasons else (True, "")
+
+
+def print_status(s: HealthStore):
+    print(f"{'host':<64} {'status':<8} {'fails':>5} {'p50(ms)':>8} {'last_ok':<19}  {'retry_after':<19}  crawlers")
+    for host, e in sorted(s.hosts.items()):
+        lat = sorted(e.get("latency_ms") or [])
+        p50 = str(lat[len(lat) // 2]) if lat else "-"
+        print(f"{host:<64} {e['status']:<8} {e['consecutive_failures']:>5} {p50:>8} {_fmt(e['last_ok']):<19}  "
+              f"{_fmt(e['retry_after']):<19}  {','.join(e.get('crawlers', []))}")
+
+
+if __name__ == "__main__":
+    st = store()
+    if "--probe" in sys.argv:
+        async def probe_all():
+            for host in list(st.hosts):
+                ok = await probe_and_record(host)
+                print(f"[probe] {host}: {'up' if ok else 'down'}")
+        asyncio.run(probe_all())
+    print_status(st)
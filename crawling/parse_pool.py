@@ -0,0 +1,112 @@
+# parse_pool.py
+"""
+HTML 파싱을 이벤트 루프 밖에서 실행하는 풀. 파싱하는 동안에도 다른 Tor 요청이 계속 진행되도록 합니다.
+
+- 파서 함수는 html 문자열을 받아 필드 dict(또는 그 목록/튜플)만 돌려주는 모듈 수준 함수여야 함
+  (process 모드는 함수와 인자/결과를 pickle로 주고받으므로 트리 객체는 넘기지 않음)
+- CRAWL_PARSE_EXECUTOR: auto(기본) | process | thread | inline
+  · process: spawn 방식 ProcessPoolExecutor. BeautifulSoup(html.parser/lxml)처럼 GIL을 잡는 파서용
+  · thread : ThreadPoolExecutor. selectolax(lexbor)는 파싱 중 GIL을 놓으므로 스레드로 충분 (IPC 비용 없음)
+  · inline : 이벤트 루프에서 바로 실행 (기존 동작, 디버깅용)
+  · auto   : html_backend의 기본 백엔드가 selectolax면 thread, 아니면 process
+- CRAWL_PARSE_WORKERS: 워커 수 (기본 CPU 수 - 1, 최소 1. 나머지 한 코어는 이벤트 루프용)
+- CRAWL_PARSE_MAX_PENDING: 풀에 동시에 넣는 파싱 작업 수 (기본 워커 수 × 2). 넘으면 run()이 대기하므로
+  파싱이 밀릴 때 받아 둔 html이 메모리에 끝없이 쌓이지 않음
+fetch 동시성(요청 수)은 Fetcher/AIMD가 따로 정하므로 두 값을 독립적으로 조정할 수 있습니다.
+
+    with ParsePool() as pool:
+        details = await pool.run(parse_post_details, response.text, url)
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+import html_backend
+
+EXECUTOR_ENV = "CRAWL_PARSE_EXECUTOR"
+WORKERS_ENV = "CRAWL_PARSE_WORKERS"
+PENDING_ENV = "CRAWL_PARSE_MAX_PENDING"
+MODES = ("auto", "process", "thread", "inline")
+
+T = TypeVar("T")
+
+log = logging.getLogger("parse_pool")
+
+
+def _default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def _init_process_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C는 부모(크롤러)가 처리하고 풀을 닫음
+
+
+class ParsePool:
+    """크롤러 1회 실행 동안 유지하는 파싱 풀. run()은 같은 이벤트 루프 안에서만 사용"""
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        mode = (mode or os.environ.get(EXECUTOR_ENV) or "auto").strip().lower()
+        if mode not in MODES:
+            raise ValueError(f"{EXECUTOR_ENV}={mode}: {', '.join(MODES)} 중 하나여야 합니다")
+        if mode == "auto":
+            mode = "thread" if html_backend.default_backend() == "selectolax" else "process"
+        self.mode = mode
+        self.workers = workers or int(os.environ.get(WORKERS_ENV) or _default_workers())
+        self.max_pending = max_pending or int(os.environ.get(PENDING_ENV) or self.workers * 2)
+        self._executor: Optional[Executor] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self.jobs = 0
+        self.wait_sec = 0.0   # max_pending에 막혀 기다린 시간 합계
+        self.run_sec = 0.0    # 풀에 넣은 뒤 결과를 받을 때까지 걸린 시간 합계
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # 크롤러 프로세스에는 로그/회로 감시 스레드가 돌고 있어 fork 대신 spawn
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_process_worker)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="parse")
+            log.info(f"[parse] {self.describe()}")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """func(*args, **kwargs)를 풀에서 실행하고 결과를 돌려줍니다 (예외도 그대로 전파)."""
+        self.jobs += 1
+        if self.mode == "inline":
+            return func(*args, **kwargs)
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self.max_pending)
+        t0 = time.perf_counter()
+        async with self._pending:
+            t1 = time.perf_counter()
+            self.wait_sec += t1 - t0
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._pool(), functools.partial(func, *args, **kwargs))
+            finally:
+                self.run_sec += time.perf_counter() - t1
+
+    def describe(self) -> str:
+        if self.mode == "inline":
+            return f"inline (이벤트 루프에서 실행), 작업 {self.jobs}건"
+        return (f"{self.mode} × {self.workers} (동시 작업 ≤ {self.max_pending}), 작업 {self.jobs}건, "
+                f"풀 처리 {self.run_sec:.1f}초, 대기 {self.wait_sec:.1f}초")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,147 @@
+# pipeline.py
+"""
+크롤링 이후 단계(병합/중복 제거/점수화/내보내기/알림)를 DAG로 실행하는 최소 엔진.
+
+- Stage는 이름, 의존 단계(deps), 입력/출력 파일, 실제 작업 함수(func, 스레드에서 실행)로 정의
+- 의존 단계가 끝나는 즉시 시작하므로, 서로 독립적인 단계는 병렬로 실행됨
+- 입력 파일 내용의 해시(fingerprint, Stage.extra_key 값 포함)가 지난 실행과 같고 출력이 모두 있으면 해당 단계는 건너뜀
+  (상태: outputs/pipeline_state.json)
+- 앞 단계가 실패하면 뒤 단계는 blocked 처리
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+STATE_PATH = Path("outputs/pipeline_state.json")
+
+# 단계 실행 결과
+OK, SKIPPED, FAILED, BLOCKED = "ok", "skipped", "failed", "blocked"
+
+
+@dataclasses.dataclass
+class Stage:
+    """파이프라인의 한 단계"""
+    name: str
+    func: Callable[[], None]
+    inputs: List[Path]
+    outputs: List[Path]
+    deps: List[str] = dataclasses.field(default_factory=list)
+    version: str = "1"  # 단계 로직이 바뀌면 올려서 강제로 다시 실행
+    extra_key: Optional[Callable[[], str]] = None  # 입력 파일 외에 fingerprint에 넣을 값 (예: 실행 날짜)
+
+
+@dataclasses.dataclass
+class StageResult:
+    name: str
+    status: str
+    elapsed: float = 0.0
+    error: str = ""
+
+
+def fingerprint(stage: Stage) -> str:
+    """단계 이름/버전(+extra_key) + 입력 파일 내용 해시 (없는 입력은 'missing'으로 반영)"""
+    h = hashlib.sha256(f"{stage.name}:{stage.version}".encode())
+    if stage.extra_key is not None:
+        h.update(f"extra:{stage.extra_key()}".encode())
+    for p in stage.inputs:
+        p = Path(p)
+        h.update(str(p).encode())
+        if not p.is_file():
+            h.update(b"missing")
+            continue
+        with p.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], state_path: Path = STATE_PATH, log: Callable[[str], None] = print):
+        self.stages: Dict[str, Stage] = {s.name: s for s in stages}
+        self.state_path = Path(state_path)
+        self.log = log
+        self._validate()
+
+    def _validate(self):
+        for s in self.stages.values():
+            for d in s.deps:
+                if d not in self.stages:
+                    raise ValueError(f"stage '{s.name}': 알 수 없는 의존 단계 '{d}'")
+        # 순환 의존 검사 (DFS)
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"순환 의존이 있습니다: {name}")
+            visiting.add(name)
+            for d in self.stages[name].deps:
+                visit(d)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with self.state_path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state: Dict[str, str]):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp, self.state_path)
+
+    async def run(self, force: bool = False) -> Dict[str, StageResult]:
+        state = self._load_state()
+        results: Dict[str, StageResult] = {}
+        done: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in self.stages}
+
+        async def run_stage(stage: Stage):
+            try:
+                for d in stage.deps:
+                    await done[d].wait()
+                if any(results[d].status in (FAILED, BLOCKED) for d in stage.deps):
+                    results[stage.name] = StageResult(stage.name, BLOCKED)
+                    self.log(f"[pipeline] {stage.name}: 앞 단계 실패로 건너뜀(blocked)")
+                    return
+
+                started = time.perf_counter()
+                fp = await asyncio.to_thread(fingerprint, stage)
+                outputs_ok = all(Path(p).exists() for p in stage.outputs)
+                if not force and outputs_ok and state.get(stage.name) == fp:
+                    results[stage.name] = StageResult(stage.name, SKIPPED)
+                    self.log(f"[pipeline] {stage.name}: 입력 변경 없음 → 건너뜀")
+                    return
+
+                self.log(f"[pipeline] {stage.name}: 시작")
+                try:
+                    await asyncio.to_thread(stage.func)
+                except Exception as e:
+                    traceback.print_exc()
+                    results[stage.name] = StageResult(stage.name, FAILED, time.perf_counter() - started, str(e))
+                    self.log(f"[pipeline] {stage.name}: 실패 - {e}")
+                    return
+                state[stage.name] = fp
+                elapsed = time.perf_counter() - started
+                results[stage.name] = StageResult(stage.name, OK, elapsed)
+                self.log(f"[pipeline] {stage.name}: 완료 ({elapsed:.2f}s)")
+            finally:
+                done[stage.name].set()
+
+        await asyncio.gather(*(run_stage(s) for s in self.stages.values()))
+        self._save_state(state)
+        return results
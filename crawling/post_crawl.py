@@ -0,0 +1,198 @@
+# post_crawl.py
+"""
+크롤링 후 파이프라인 단계 정의 (pipeline.py 엔진에서 실행).
+
+    merge → dedupe → score → export
+                          └→ alert
+
+- merge : 각 크롤러의 *_unified.csv 를 헤더 합집합으로 병합 → outputs/merged_unified.csv
+- dedupe: (source, id) 기준 중복 제거, crawled_at_utc 가 가장 최신인 행 유지 → outputs/merged_dedup.csv
+- score : 대시보드와 같은 규칙(dashboard/lib/scoring.py)·기본 가중치(weights_presets.py)로 심각도 점수 계산
+          → outputs/scored_unified.csv. 최근성 점수가 날짜에 따라 달라지므로 날짜(UTC)가 바뀌면 다시 실행
+- export: 대시보드 업로드용 사본 → outputs/dashboard/scored_unified.csv
+- alert : 처음 보는 HIGH/CRITICAL 항목을 outputs/alerts.jsonl 에 기록하고 콘솔에 출력
+"""
+
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from pipeline import Stage
+
+DASHBOARD_DIR = Path(__file__).resolve().parent.parent / "dashboard"
+if str(DASHBOARD_DIR) not in sys.path:
+    sys.path.append(str(DASHBOARD_DIR))
+from lib import scoring, weights_presets  # noqa: E402  (dashboard/lib: 대시보드와 같은 점수 규칙)
+
+OUTPUT_DIR = Path("outputs")
+MERGED_PATH = OUTPUT_DIR / "merged_unified.csv"
+DEDUP_PATH = OUTPUT_DIR / "merged_dedup.csv"
+SCORED_PATH = OUTPUT_DIR / "scored_unified.csv"
+EXPORT_PATH = OUTPUT_DIR / "dashboard" / "scored_unified.csv"
+ALERTS_PATH = OUTPUT_DIR / "alerts.jsonl"
+ALERT_STATE_PATH = OUTPUT_DIR / "alert_state.json"
+
+ALERT_LEVELS = {"CRITICAL", "HIGH"}
+
+
+def _read_rows(path: Path) -> List[Dict[str, str]]:
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with Path(path).open("r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _write_rows(path: Path, rows: List[Dict[str, str]], headers: List[str]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    os.replace(tmp, path)
+
+
+# ── merge / dedupe ──
+def merge(inputs: List[Path], out: Path = MERGED_PATH):
+    headers: List[str] = []
+    rows: List[Dict[str, str]] = []
+    for p in inputs:
+        if not Path(p).is_file():
+            continue
+        part = _read_rows(p)
+        if part:
+            for h in part[0].keys():
+                if h not in headers:
+                    headers.append(h)
+        rows.extend(part)
+    _write_rows(out, rows, headers or ["source", "id"])
+    print(f"[merge] {len(rows)}행 → {out}")
+
+
+def dedupe(src: Path = MERGED_PATH, out: Path = DEDUP_PATH):
+    rows = _read_rows(src)
+    headers = list(rows[0].keys()) if rows else ["source", "id"]
+    latest: Dict[tuple, Dict[str, str]] = {}
+    for r in rows:
+        key = (r.get("source", ""), r.get("id", ""))
+        prev = latest.get(key)
+        if prev is None or r.get("crawled_at_utc", "") >= prev.get("crawled_at_utc", ""):
+            latest[key] = r
+    _write_rows(out, list(latest.values()), headers)
+    print(f"[dedupe] {len(rows)}행 → {len(latest)}행 → {out}")
+
+
+# ── score (규칙/가중치는 dashboard/lib/scoring.py, weights_presets.py 를 대시보드와 함께 사용) ──
+TEXT_FIELDS = ["record_type", "description", "content", "title", "hashtags", "notes", "source", "actor",
+               "ransomware_group", "company", "details_url", "website", "attachment_urls"]
+TS_FIELDS = ["posted_at_utc", "crawled_at_utc", "discovery_date"]
+
+
+def _text(row: Dict[str, str]) -> str:
+    return " | ".join(row[c] for c in TEXT_FIELDS if row.get(c)).lower()
+
+
+def _size_gib(row: Dict[str, str]):
+    for key, div in (("size_gib", 1), ("size_bytes", 1024**3)):
+        try:
+            return float(row[key]) / div
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _ts(row: Dict[str, str]):
+    for c in TS_FIELDS:
+        v = row.get(c)
+        if not v:
+            continue
+        try:
+            dt = datetime.fromisoformat(v.replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return None
+
+
+def score(src: Path = DEDUP_PATH, out: Path = SCORED_PATH, weights: Dict[str, float] = None):
+    rows = _read_rows(src)
+    norm_w = weights_presets.normalize(weights or weights_presets.DEFAULT_WEIGHTS)
+    now = datetime.now(timezone.utc)
+
+    def company_norm(r):
+        return re.sub(r"[^a-z0-9]+", "", r.get("company", "").lower())
+
+    sources_by_company: Dict[str, set] = {}
+    for r in rows:
+        if company_norm(r):
+            sources_by_company.setdefault(company_norm(r), set()).add(r.get("source", ""))
+
+    for r in rows:
+        t = _text(r)
+        stage = scoring.exp_stage(t, r)
+        comp = {
+            "sensitivity": scoring.sens_score(t),
+            "volume": scoring.vol_score(_size_gib(r)),
+            "actor": scoring.actor_score(t),
+            "exposure": scoring.exp_score(stage),
+            "recency": scoring.rec_score(_ts(r), now),
+            "evidence": scoring.evid_score(r, t),
+            "mentions": scoring.mentions_score(t),
+            "cross": scoring.cross_score(len(sources_by_company.get(company_norm(r), ()))),
+        }
+        s = scoring.severity(comp, norm_w)
+        r["exposure_stage"] = stage
+        r["severity_score"] = f"{s:.2f}"
+        r["severity_level"] = scoring.sev_level(s)
+
+    headers = (list(rows[0].keys()) if rows else ["source", "id", "exposure_stage", "severity_score", "severity_level"])
+    rows.sort(key=lambda r: float(r["severity_score"]), reverse=True)
+    _write_rows(out, rows, headers)
+    print(f"[score] {len(rows)}행 점수화 → {out}")
+
+
+# ── export / alert ──
+def export(src: Path = SCORED_PATH, out: Path = EXPORT_PATH):
+    out.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(src, out)
+    print(f"[export] 대시보드용 → {out}")
+
+
+def alert(src: Path = SCORED_PATH, alerts_path: Path = ALERTS_PATH, state_path: Path = ALERT_STATE_PATH):
+    try:
+        seen = set(json.loads(state_path.read_text(encoding="utf-8")))
+    except (OSError, json.JSONDecodeError):
+        seen = set()
+    fresh = [r for r in _read_rows(src)
+             if r.get("severity_level") in ALERT_LEVELS and f'{r.get("source")}|{r.get("id")}' not in seen]
+    if fresh:
+        alerts_path.parent.mkdir(parents=True, exist_ok=True)
+        now = datetime.now(timezone.utc).isoformat()
+        with alerts_path.open("a", encoding="utf-8") as f:
+            for r in fresh:
+                rec = {k: r.get(k, "") for k in ("source", "id", "company", "ransomware_group",
+                                                 "severity_level", "severity_score", "details_url")}
+                rec["alerted_at_utc"] = now
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                print(f"[alert] {rec['severity_level']} {rec['severity_score']} {rec['source']} {rec['company'] or rec['id']}")
+        seen.update(f'{r.get("source")}|{r.get("id")}' for r in fresh)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(sorted(seen), ensure_ascii=False), encoding="utf-8")
+    print(f"[alert] 신규 {len(fresh)}건")
+
+
+def build_stages(unified_inputs: List[Path]) -> List[Stage]:
+    return [
+        Stage("merge", lambda: merge(unified_inputs), inputs=list(unified_inputs), outputs=[MERGED_PATH]),
+        Stage("dedupe", dedupe, inputs=[MERGED_PATH], outputs=[DEDUP_PATH], deps=["merge"]),
+        # recency 는 실행 시각 기준이라 입력이 같아도 날짜가 바뀌면 다시 계산
+        Stage("score", score, inputs=[DEDUP_PATH], outputs=[SCORED_PATH], deps=["dedupe"],
+              extra_key=lambda: datetime.now(timezone.utc).date().isoformat()),
+        Stage("export", export, inputs=[SCORED_PATH], outputs=[EXPORT_PATH], deps=["score"]),
+        Stage("alert", alert, inputs=[SCORED_PATH], outputs=[ALERT_STATE_PATH], deps=["score"]),
+    ]
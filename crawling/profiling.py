@@ -0,0 +1,153 @@
+# profiling.py
+"""
+크롤러/러너용 선택적 프로파일링.
+
+켜는 방법
+- 러너: script.py --profile (또는 환경 변수 CRAWL_PROFILE=1)
+- 크롤러 단독 실행: CRAWL_PROFILE=1 python3 crawler_xxx.py  (CRAWL_PROFILE=<디렉터리> 로 저장 위치 지정)
+
+run(func)은 func을 현재 스레드에서 실행하면서
+- cProfile → <log_dir>/<name>_<YYYYmmdd_HHMMSS>.pstats  (python -m pstats / snakeviz 등으로 확인)
+- 스택 샘플러 → 같은 이름의 .collapsed  (flamegraph.pl / speedscope 에 바로 넣을 수 있는 "a;b;c 횟수" 형식)
+를 남깁니다. in-process 모드에서는 크롤러마다 자기 스레드에서 실행되므로 서로 섞이지 않습니다.
+꺼져 있으면 func을 그대로 호출합니다.
+프로파일 파일은 로그 세그먼트와 같은 기준으로 정리합니다: 보존 일수(CRAWL_PROFILE_RETENTION_DAYS, 러너는
+--log-retention-days, 기본 14) + 이름/확장자별 최신 MAX_PROFILES개. 어느 쪽이든 func이 쓴 스레드 CPU 시간은 crawl_metrics.thread_cpu로 누적합니다.
+"""
+
+import contextvars
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import crawl_metrics
+import log_sink
+
+PROFILE_ENV = "CRAWL_PROFILE"
+RETENTION_ENV = "CRAWL_PROFILE_RETENTION_DAYS"  # 러너가 --log-retention-days 값으로 설정 (subprocess 크롤러도 상속)
+DEFAULT_RETENTION_DAYS = 14
+MAX_PROFILES = 50  # 이름/확장자별로 남길 최대 파일 수 (로그 세그먼트 max_segments와 같음)
+DEFAULT_DIR = Path("outputs/logs")
+SAMPLE_INTERVAL = 0.005  # 스택 샘플링 간격(초)
+
+# 러너가 in-process 크롤러 태스크마다 설정하는 저장 디렉터리 (None이면 환경 변수 확인)
+_PROFILE_DIR: contextvars.ContextVar[Optional[Path]] = contextvars.ContextVar("profile_dir", default=None)
+
+
+def enable(log_dir: Path):
+    """현재 컨텍스트(러너가 띄운 크롤러 태스크)에서 프로파일링을 켭니다."""
+    _PROFILE_DIR.set(Path(log_dir))
+
+
+def profile_dir() -> Optional[Path]:
+    d = _PROFILE_DIR.get()
+    if d is not None:
+        return d
+    env = os.environ.get(PROFILE_ENV, "").strip()
+    if not env or env.lower() in {"0", "false", "no"}:
+        return None
+    return DEFAULT_DIR if env.lower() in {"1", "true", "yes"} else Path(env)
+
+
+class StackSampler:
+    """대상 스레드의 호출 스택을 주기적으로 떠서 collapsed stack 형식으로 집계합니다."""
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path):
+        with path.open("w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def run(func: Callable, *args, name: Optional[str] = None, **kwargs):
+    """프로파일링이 켜져 있으면 cProfile + 스택 샘플러로 감싸서 func을 실행합니다."""
+    with crawl_metrics.thread_cpu():
+        return _run(func, args, kwargs, name)
+
+
+def _run(func: Callable, args: tuple, kwargs: dict, name: Optional[str]):
+    out_dir = profile_dir()
+    if out_dir is None:
+        return func(*args, **kwargs)
+
+    if name is None:
+        try:
+            from tor_budget import CURRENT_CRAWLER
+            name = CURRENT_CRAWLER.get()
+        except ImportError:
+            name = "unknown"
+        if name == "unknown":
+            name = Path(sys.argv[0]).stem or func.__name__
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+: cProfile은 프로세스에 하나만 켤 수 있음 (다른 크롤러가 이미 사용 중) → 샘플러만 사용
+        profiler = None
+    sampler = StackSampler(threading.get_ident()).start()
+    t0 = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        sampler.stop()
+        files = _dump(out_dir, name, profiler, sampler)
+        print(f"[profiling] {name}: {time.perf_counter() - t0:.1f}s 프로파일 저장 → {', '.join(files)}")
+
+
+def _dump(out_dir: Path, name: str, profiler: Optional[cProfile.Profile], sampler: StackSampler) -> List[str]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    files = []
+    if profiler is not None:
+        profiler.dump_stats(stem.with_suffix(".pstats"))
+        files.append(str(stem.with_suffix(".pstats").resolve()))
+    sampler.write(stem.with_suffix(".collapsed"))
+    files.append(str(stem.with_suffix(".collapsed").resolve()))
+    m = crawl_metrics.current()
+    if m is not None:
+        m.profile_files.extend(files)
+    _enforce_retention(out_dir, name)
+    return files
+
+
+def _enforce_retention(out_dir: Path, name: str):
+    """로그 세그먼트와 같은 기준(보존 일수, 최대 개수)으로 이 이름의 오래된 프로파일 파일을 삭제"""
+    try:
+        days = int(os.environ.get(RETENTION_ENV, DEFAULT_RETENTION_DAYS))
+    except ValueError:
+        days = DEFAULT_RETENTION_DAYS
+    for suffix in log_sink.PROFILE_SUFFIXES:
+        log_sink.prune(out_dir, f"{name}_*{suffix}", days or None, MAX_PROFILES)
@@ -0,0 +1,249 @@
+# run_history.py
+"""
+크롤러 실행 이력(SQLite)과 성능 회귀 감지.
+
+- 실행마다 크롤러별 지표(소요 시간, 가져온 페이지 수, 결과 행 수, 오류 수, 요청 지연 p50/p90/p99,
+  peak RSS, CPU)를 outputs/run_history.sqlite 의 runs 테이블에 기록
+  (in-process 모드는 크롤러별 RSS가 없어 비워 두고, CPU는 크롤러 워커 스레드 시간)
+- 직전 성공 실행 BASELINE_RUNS회의 중앙값을 기준선으로, 이번 실행이 크게 나빠졌으면 회귀로 보고
+  (예: pages/sec 절반 이하, 오류율 급증, p90 지연 2배) regressions 테이블에도 남김
+- 요청 없이 HTTP 캐시로 대부분 처리한 실행(cache_fresh_rate ≥ CACHED_RUN)은 pages/sec 판정과 그 기준선에서 제외
+
+`python3 run_history.py [crawler]` 로 최근 실행과 감지된 회귀를 볼 수 있습니다.
+"""
+
+import dataclasses
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from run_stats import CrawlerRunResult, count_csv_rows
+
+DB_PATH = Path("outputs/run_history.sqlite")
+
+BASELINE_RUNS = 10      # 기준선으로 쓸 직전 성공 실행 수
+MIN_BASELINE_RUNS = 3   # 이보다 이력이 적으면 판정하지 않음
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawler         TEXT NOT NULL,
+    started_at      REAL NOT NULL,
+    mode            TEXT,
+    rc              INTEGER,
+    duration_sec    REAL,
+    pages           INTEGER,
+    rows_out        INTEGER,
+    errors          INTEGER,
+    pages_per_sec   REAL,
+    error_rate      REAL,
+    latency_p50_ms  REAL,
+    latency_p90_ms  REAL,
+    latency_p99_ms  REAL,
+    peak_rss_bytes  INTEGER,
+    cpu_sec         REAL,
+    bytes_emitted   INTEGER,
+    cache_fresh_rate REAL
+);
+CREATE INDEX IF NOT EXISTS runs_crawler_started ON runs (crawler, started_at);
+CREATE TABLE IF NOT EXISTS regressions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      INTEGER NOT NULL REFERENCES runs (id),
+    crawler     TEXT NOT NULL,
+    metric      TEXT NOT NULL,
+    value       REAL,
+    baseline    REAL,
+    detected_at REAL NOT NULL
+);
+"""
+
+
+@dataclasses.dataclass
+class Rule:
+    """회귀 판정 규칙. worse_when='higher'면 값이 커질 때, 'lower'면 작아질 때 나빠진 것"""
+    metric: str
+    worse_when: str
+    ratio: float          # 기준선 대비 배율 (higher: value > baseline*ratio, lower: value < baseline*ratio)
+    min_delta: float = 0  # 절대 차이가 이보다 작으면 무시 (짧은 실행의 잡음 방지)
+    skip_cached: bool = False  # 요청 없이 캐시로 처리한 비율이 CACHED_RUN 이상인 실행은 판정/기준선에서 제외
+
+
+# 요청 없이 HTTP 캐시(TTL 안 저장본)로 처리한 비율이 이 이상이면 "캐시 실행" — pages가 거의 0이라 pages/sec 비교 불가
+CACHED_RUN = 0.5
+
+RULES = [
+    Rule("pages_per_sec", "lower", 0.5, skip_cached=True),
+    Rule("rows_out", "lower", 0.5, min_delta=5),
+    Rule("duration_sec", "higher", 2.0, min_delta=30),
+    Rule("error_rate", "higher", 2.0, min_delta=0.1),
+    Rule("latency_p90_ms", "higher", 2.0, min_delta=1000),
+]
+
+
+@dataclasses.dataclass
+class Regression:
+    crawler: str
+    metric: str
+    value: float
+    baseline: float
+
+    def describe(self) -> str:
+        ratio = self.value / self.baseline if self.baseline else float("inf")
+        return f"{self.crawler}: {self.metric} {self.value:.3g} (기준선 {self.baseline:.3g}, x{ratio:.2f})"
+
+
+class RunHistory:
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 러너는 asyncio.to_thread로 호출하므로 스레드 간 공유 허용 (동시에 쓰지는 않음)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(runs)")}
+        if "cache_fresh_rate" not in columns:  # 이전 버전에서 만든 DB
+            with self.conn:
+                self.conn.execute("ALTER TABLE runs ADD COLUMN cache_fresh_rate REAL")
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, r: CrawlerRunResult) -> int:
+        attempts = (r.pages or 0) + (r.errors or 0)
+        cpu = (r.cpu_user_sec or 0) + (r.cpu_system_sec or 0) if r.cpu_user_sec is not None else r.cpu_thread_sec
+        row = {
+            "crawler": r.name,
+            "started_at": r.started_at or time.time(),
+            "mode": r.mode,
+            "rc": r.rc,
+            "duration_sec": r.wall_sec,
+            "pages": r.pages,
+            "rows_out": r.rows_out,
+            "errors": r.errors,
+            "pages_per_sec": r.pages / r.wall_sec if r.pages is not None and r.wall_sec > 0 else None,
+            "error_rate": r.errors / attempts if r.errors is not None and attempts else None,
+            "latency_p50_ms": r.latency_p50_ms,
+            "latency_p90_ms": r.latency_p90_ms,
+            "latency_p99_ms": r.latency_p99_ms,
+            "peak_rss_bytes": r.peak_rss_bytes,
+            "cpu_sec": cpu,
+            "bytes_emitted": r.bytes_emitted,
+            "cache_fresh_rate": r.cache_fresh_rate,
+        }
+        cols = ", ".join(row)
+        marks = ", ".join(f":{k}" for k in row)
+        with self.conn:
+            cur = self.conn.execute(f"INSERT INTO runs ({cols}) VALUES ({marks})", row)
+        return cur.lastrowid
+
+    def check(self, run_id: int) -> List[Regression]:
+        """run_id 실행을 같은 크롤러의 직전 성공 실행들과 비교해 회귀 목록을 반환(및 기록)합니다."""
+        run = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if run is None or run["rc"] != 0:
+            return []
+        history = self.conn.execute(
+            "SELECT * FROM runs WHERE crawler = ? AND rc = 0 AND id < ? ORDER BY id DESC LIMIT ?",
+            (run["crawler"], run_id, BASELINE_RUNS),
+        ).fetchall()
+        if len(history) < MIN_BASELINE_RUNS:
+            return []
+
+        found = []
+        def cached(row) -> bool:
+            return (row["cache_fresh_rate"] or 0) >= CACHED_RUN
+
+        for rule in RULES:
+            if rule.skip_cached and cached(run):
+                continue
+            value = run[rule.metric]
+            past = [h[rule.metric] for h in history
+                    if h[rule.metric] is not None and not (rule.skip_cached and cached(h))]
+            if value is None or len(past) < MIN_BASELINE_RUNS:
+                continue
+            baseline = statistics.median(past)
+            if abs(value - baseline) < rule.min_delta:
+                continue
+            if rule.worse_when == "higher":
+                worse = value > baseline * rule.ratio if baseline > 0 else value > rule.min_delta
+            else:
+                worse = value < baseline * rule.ratio
+            if worse:
+                found.append(Regression(run["crawler"], rule.metric, value, baseline))
+
+        if found:
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO regressions (run_id, crawler, metric, value, baseline, detected_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(run_id, g.crawler, g.metric, g.value, g.baseline, now) for g in found],
+                )
+        return found
+
+    def record_and_check(self, results: List[CrawlerRunResult]) -> List[Regression]:
+        found = []
+        for r in results:
+            found.extend(self.check(self.record(r)))
+        return found
+
+
+def apply_metrics(result: CrawlerRunResult, summary: dict):
+    """crawl_metrics 요약(dict)을 실행 결과에 반영"""
+    result.pages = summary.get("pages")
+    result.errors = summary.get("errors")
+    result.latency_p50_ms = summary.get("latency_p50_ms")
+    result.latency_p90_ms = summary.get("latency_p90_ms")
+    result.latency_p99_ms = summary.get("latency_p99_ms")
+    result.spans = summary.get("spans")
+    result.profile_files = summary.get("profile_files") or []
+    result.bytes_fetched = summary.get("bytes_fetched")
+    result.cache_lookups = summary.get("cache_lookups")
+    result.cache_hit_rate = summary.get("cache_hit_rate")
+    result.cache_fresh_rate = summary.get("cache_fresh_rate")
+    result.host_latency = summary.get("host_latency")
+    result.cpu_thread_sec = summary.get("thread_cpu_sec")
+
+
+def record_standalone(name: str, started_at: float, metrics, rc: int = 0,
+                      output_csv: Optional[Path] = None) -> List[Regression]:
+    """러너 없이 단독 실행한 크롤러의 결과를 이력에 기록하고 감지된 회귀를 반환합니다."""
+    result = CrawlerRunResult(name, rc, Path("/dev/null"), mode="standalone", started_at=started_at,
+                              wall_sec=time.time() - started_at, rows_out=count_csv_rows(output_csv))
+    apply_metrics(result, metrics.summary())
+    history = RunHistory()
+    try:
+        return history.record_and_check([result])
+    finally:
+        history.close()
+
+
+def _fmt(v, spec: str) -> str:
+    return "-" if v is None else format(v, spec)
+
+
+def print_history(history: RunHistory, crawler: Optional[str] = None, last_n: int = 15):
+    where, params = ("WHERE crawler = ?", (crawler,)) if crawler else ("", ())
+    rows = history.conn.execute(f"SELECT * FROM runs {where} ORDER BY id DESC LIMIT ?", (*params, last_n)).fetchall()
+    print(f"{'started':<19} {'crawler':<17} {'rc':>3} {'sec':>7} {'pages':>6} {'p/s':>7} {'rows':>6} "
+          f"{'err':>4} {'p50ms':>7} {'p90ms':>7}")
+    for r in reversed(rows):
+        print(f"{datetime.fromtimestamp(r['started_at']).strftime('%Y-%m-%d %H:%M:%S'):<19} {r['crawler']:<17} "
+              f"{r['rc']:>3} {_fmt(r['duration_sec'], '.1f'):>7} {_fmt(r['pages'], 'd'):>6} "
+              f"{_fmt(r['pages_per_sec'], '.2f'):>7} {_fmt(r['rows_out'], 'd'):>6} {_fmt(r['errors'], 'd'):>4} "
+              f"{_fmt(r['latency_p50_ms'], '.0f'):>7} {_fmt(r['latency_p90_ms'], '.0f'):>7}")
+    regs = history.conn.execute(
+        f"SELECT * FROM regressions {where} ORDER BY id DESC LIMIT ?", (*params, last_n)).fetchall()
+    if regs:
+        print(f"\n최근 감지된 회귀 {len(regs)}건:")
+        for g in reversed(regs):
+            print(f"  {datetime.fromtimestamp(g['detected_at']).strftime('%Y-%m-%d %H:%M:%S')} "
+                  f"{Regression(g['crawler'], g['metric'], g['value'], g['baseline']).describe()}")
+
+
+if __name__ == "__main__":
+    h = RunHistory()
+    print_history(h, sys.argv[1] if len(sys.argv) > 1 else None)
+    h.close()
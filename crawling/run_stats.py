@@ -0,0 +1,241 @@
+# run_stats.py
+"""
+러너(script.py)의 크롤러별 자원 사용량 집계와 실행 요약 출력.
+
+- ProcessSampler: psutil로 subprocess 크롤러 프로세스(+자식 프로세스) RSS/CPU를 주기적으로 샘플링
+  (in-process 모드는 크롤러들이 러너 프로세스를 함께 쓰므로 크롤러별 RSS는 기록하지 않고,
+  CPU는 크롤러 워커 스레드의 time.thread_time()만 cpu_thread_sec 로 기록 — crawl_metrics.thread_cpu)
+- CrawlerRunResult: 크롤러 1회 실행 결과 (rc, 벽시계 시간, peak RSS, CPU user/sys, 출력 바이트/라인, 결과 행 수,
+  공유 Tor 예산 사용량, 크롤러가 보고한 페이지/오류 수와 요청 지연 분위수, 받은 바이트/HTTP 캐시 적중률,
+  호스트별 요청 지연 히스토그램, 구간별 시간, 프로파일 파일)
+- RunSummaryWriter: outputs/run_summary.json 과 Prometheus textfile collector용
+  outputs/metrics/crawler_runner.prom 을 실행마다 원자적으로 갱신
+"""
+
+import asyncio
+import csv
+import dataclasses
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import tracing
+
+try:
+    import psutil
+except ImportError:  # psutil이 없으면 자원 샘플링 없이 시간/출력 통계만 기록
+    psutil = None
+
+SUMMARY_PATH = Path("outputs/run_summary.json")
+PROM_PATH = Path("outputs/metrics/crawler_runner.prom")
+
+
+@dataclasses.dataclass
+class CrawlerRunResult:
+    """크롤러 1회 실행의 결과와 자원 사용량"""
+    name: str
+    rc: int
+    log_path: Path
+    mode: str = "in-process"
+    started_at: float = 0.0
+    wall_sec: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    cpu_user_sec: Optional[float] = None
+    cpu_system_sec: Optional[float] = None
+    cpu_thread_sec: Optional[float] = None  # 크롤러 워커 스레드 CPU(user+sys). 다른 스레드/프로세스로 넘긴 작업은 제외
+    bytes_emitted: int = 0
+    lines_emitted: int = 0
+    rows_out: Optional[int] = None
+    tor_requests: Optional[int] = None    # 공유 Tor 예산(tor_budget.py)에서 받은 슬롯 수
+    tor_wait_sec: Optional[float] = None  # 슬롯을 기다린 시간 합
+    tor_busy_sec: Optional[float] = None  # 슬롯을 점유한 시간 합
+    pages: Optional[int] = None           # 크롤러가 보고한 성공 요청 수 (crawl_metrics.py)
+    errors: Optional[int] = None          # 실패한 요청 + 파싱/저장 오류 수
+    latency_p50_ms: Optional[float] = None
+    latency_p90_ms: Optional[float] = None
+    latency_p99_ms: Optional[float] = None
+    spans: Optional[Dict[str, dict]] = None  # 구간 이름 → {"count", "total_sec"} (fetch/parse/write 등)
+    bytes_fetched: Optional[int] = None      # 네트워크로 받은 응답 바이트
+    cache_lookups: Optional[int] = None      # HTTP 캐시(http_cache.py) 대상 요청 수
+    cache_hit_rate: Optional[float] = None   # 그중 저장본을 쓴 비율
+    cache_fresh_rate: Optional[float] = None  # 그중 요청 없이 TTL 안 저장본을 쓴 비율 (pages에 안 잡힘)
+    # 호스트 → {"buckets": 구간별 개수(tracing.LATENCY_BUCKETS_MS, 마지막은 초과), "count", "sum_sec"}
+    host_latency: Optional[Dict[str, dict]] = None
+    profile_files: List[str] = dataclasses.field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        d = dataclasses.asdict(self)
+        d["log_path"] = str(self.log_path)
+        d["started_at"] = datetime.fromtimestamp(self.started_at, timezone.utc).isoformat() if self.started_at else ""
+        return d
+
+
+class ProcessSampler:
+    """pid(와 그 자식들)의 RSS 합계 최댓값과 누적 CPU 시간을 추적합니다."""
+    def __init__(self, pid: int, interval: float = 0.5, include_children: bool = True):
+        self.pid = pid
+        self.interval = interval
+        self.include_children = include_children
+        self.peak_rss = 0
+        self._cpu: Dict[int, tuple] = {}   # pid → (user, system) 마지막 관측값 (종료된 자식 포함)
+        self._task: Optional[asyncio.Task] = None
+        self._proc = None
+        if psutil is not None:
+            try:
+                self._proc = psutil.Process(pid)
+            except psutil.Error:
+                self._proc = None
+
+    def start(self) -> "ProcessSampler":
+        if self._proc is not None:
+            self._task = asyncio.create_task(self._loop())
+        return self
+
+    async def stop(self):
+        if self._task:
+            self.sample()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def sample(self):
+        if self._proc is None:
+            return
+        procs = [self._proc]
+        try:
+            if self.include_children:
+                procs += self._proc.children(recursive=True)
+        except psutil.Error:
+            pass
+        rss = 0
+        for p in procs:
+            try:
+                with p.oneshot():
+                    rss += p.memory_info().rss
+                    t = p.cpu_times()
+                    self._cpu[p.pid] = (t.user, t.system)
+            except psutil.Error:
+                continue  # 샘플 사이에 종료된 프로세스
+        self.peak_rss = max(self.peak_rss, rss)
+
+    async def _loop(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    @property
+    def available(self) -> bool:
+        return self._proc is not None
+
+    def cpu_times(self) -> tuple:
+        return sum(u for u, _ in self._cpu.values()), sum(s for _, s in self._cpu.values())
+
+    def fill(self, result: CrawlerRunResult):
+        if not self.available:
+            return
+        result.peak_rss_bytes = self.peak_rss
+        result.cpu_user_sec, result.cpu_system_sec = self.cpu_times()
+
+
+def count_csv_rows(csv_path: Optional[Path]) -> Optional[int]:
+    """헤더를 제외한 CSV 행 수 (파일이 없으면 None)"""
+    if csv_path is None or not Path(csv_path).is_file():
+        return None
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with Path(csv_path).open("r", encoding="utf-8", newline="") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def _atomic_write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _prom_escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RunSummaryWriter:
+    """크롤러별 최신 실행 결과를 모아 JSON 요약과 Prometheus textfile을 기록합니다."""
+    METRICS = [
+        # (이름, 타입, 도움말, 결과 속성)
+        ("crawler_last_run_exit_code", "gauge", "Exit code of the last run", "rc"),
+        ("crawler_last_run_wall_seconds", "gauge", "Wall clock time of the last run", "wall_sec"),
+        ("crawler_last_run_peak_rss_bytes", "gauge", "Peak RSS of the last run", "peak_rss_bytes"),
+        ("crawler_last_run_cpu_user_seconds", "gauge", "User CPU time of the last run", "cpu_user_sec"),
+        ("crawler_last_run_cpu_system_seconds", "gauge", "System CPU time of the last run", "cpu_system_sec"),
+        ("crawler_last_run_thread_cpu_seconds", "gauge", "CPU time of the crawler worker thread in the last run", "cpu_thread_sec"),
+        ("crawler_last_run_output_bytes", "gauge", "Bytes written to stdout/stderr by the last run", "bytes_emitted"),
+        ("crawler_last_run_output_lines", "gauge", "Lines written to stdout/stderr by the last run", "lines_emitted"),
+        ("crawler_last_run_rows", "gauge", "Rows in the unified CSV after the last run", "rows_out"),
+        ("crawler_last_run_tor_requests", "gauge", "Requests admitted by the shared Tor budget in the last run", "tor_requests"),
+        ("crawler_last_run_tor_wait_seconds", "gauge", "Time spent waiting for Tor budget slots in the last run", "tor_wait_sec"),
+        ("crawler_last_run_tor_busy_seconds", "gauge", "Time Tor budget slots were held in the last run", "tor_busy_sec"),
+        ("crawler_last_run_pages", "gauge", "Successful requests reported by the crawler in the last run", "pages"),
+        ("crawler_last_run_errors", "gauge", "Failed requests and parse/write errors in the last run", "errors"),
+        ("crawler_last_run_latency_p50_milliseconds", "gauge", "Median request latency in the last run", "latency_p50_ms"),
+        ("crawler_last_run_latency_p90_milliseconds", "gauge", "90th percentile request latency in the last run", "latency_p90_ms"),
+        ("crawler_last_run_fetched_bytes", "gauge", "Response bytes received over the network in the last run", "bytes_fetched"),
+        ("crawler_last_run_http_cache_hit_ratio", "gauge", "Share of cacheable requests served from the HTTP cache in the last run", "cache_hit_rate"),
+        ("crawler_last_run_start_timestamp_seconds", "gauge", "Unix time the last run started", "started_at"),
+    ]
+
+    def __init__(self, summary_path: Path = SUMMARY_PATH, prom_path: Path = PROM_PATH):
+        self.summary_path = Path(summary_path)
+        self.prom_path = Path(prom_path)
+        self.results: Dict[str, CrawlerRunResult] = {}
+
+    def update(self, results: List[CrawlerRunResult], runner: Optional[dict] = None):
+        for r in results:
+            self.results[r.name] = r
+        self._write_json(runner or {})
+        self._write_prom()
+
+    def _write_json(self, runner: dict):
+        doc = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "runner": runner,
+            "crawlers": {name: r.to_dict() for name, r in self.results.items()},
+        }
+        _atomic_write(self.summary_path, json.dumps(doc, indent=4, ensure_ascii=False) + "\n")
+
+    def _write_prom(self):
+        lines = []
+        for metric, mtype, help_text, attr in self.METRICS:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {mtype}")
+            for name, r in self.results.items():
+                value = getattr(r, attr)
+                if value is None:
+                    continue
+                labels = f'crawler="{_prom_escape(name)}",mode="{r.mode}"'
+                lines.append(f"{metric}{{{labels}}} {float(value)}")
+        lines.append("# HELP crawler_last_run_span_seconds Time spent in named crawler spans (fetch/parse/write) in the last run")
+        lines.append("# TYPE crawler_last_run_span_seconds gauge")
+        for name, r in self.results.items():
+            for span, s in (r.spans or {}).items():
+                lines.append(f'crawler_last_run_span_seconds{{crawler="{_prom_escape(name)}",span="{_prom_escape(span)}"}} {float(s["total_sec"])}')
+        lines.append("# HELP crawler_last_run_request_latency_seconds Request latency per target host in the last run")
+        lines.append("# TYPE crawler_last_run_request_latency_seconds histogram")
+        bounds = [f"{le / 1000:g}" for le in tracing.LATENCY_BUCKETS_MS] + ["+Inf"]
+        for name, r in self.results.items():
+            for host, h in (r.host_latency or {}).items():
+                labels = f'crawler="{_prom_escape(name)}",host="{_prom_escape(host)}"'
+                cumulative = 0
+                for le, n in zip(bounds, h["buckets"]):
+                    cumulative += n
+                    lines.append(f'crawler_last_run_request_latency_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"crawler_last_run_request_latency_seconds_sum{{{labels}}} {float(h['sum_sec'])}")
+                lines.append(f"crawler_last_run_request_latency_seconds_count{{{labels}}} {h['count']}")
+        lines.append("# HELP crawler_runner_summary_timestamp_seconds Unix time this file was written")
+        lines.append("# TYPE crawler_runner_summary_timestamp_seconds gauge")
+        lines.append(f"crawler_runner_summary_timestamp_seconds {time.time()}")
+        _atomic_write(self.prom_path, "\n".join(lines) + "\n")
@@ -0,0 +1,224 @@
+# scheduler.py
+"""
+러너(script.py --daemon)용 스케줄러.
+
+- 크롤러별 실행 주기(interval)와 지터(jitter)
+- 같은 크롤러는 이전 실행이 끝나기 전에는 다시 시작하지 않음
+  (프로세스 내: 실행 중 태스크 추적 / 프로세스 간(cron 등): outputs/locks/<name>.lock 파일 락)
+- 전체 동시 실행 수 제한(max_concurrent)
+- 다음 실행 시각 테이블을 outputs/schedule_state.json 에 저장해,
+  재시작 시 밀린 크롤러들이 한꺼번에 몰리지 않도록 분산(startup_spread)
+- policy(예: adaptive_scheduler.AdaptivePoller)를 주면 회차마다 다음 주기를 정책이 결정
+"""
+
+import asyncio
+import dataclasses
+import json
+import os
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl  # 프로세스 간 중복 실행 방지 (Unix 전용)
+except ImportError:
+    fcntl = None
+
+STATE_PATH = Path("outputs/schedule_state.json")
+LOCK_DIR = Path("outputs/locks")
+
+# 이전 실행이 아직 진행 중이라 건너뛴 경우의 rc (sysexits EX_TEMPFAIL)
+RC_SKIPPED_OVERLAP = 75
+
+
+@dataclasses.dataclass
+class CrawlerSchedule:
+    """크롤러 1개의 실행 주기 설정 (초 단위)"""
+    name: str
+    interval: float
+    jitter: float = 0.0
+
+    def __post_init__(self):
+        # 지터가 주기의 절반을 넘으면 순서가 뒤집히므로 제한
+        self.jitter = min(self.jitter, self.interval / 2)
+
+    def next_delay(self) -> float:
+        return max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+
+class CrawlLock:
+    """
+    outputs/locks/<name>.lock 에 대한 비차단 파일 락.
+    cron으로 띄운 단발 실행과 데몬이 같은 크롤러를 동시에 돌리지 않도록 합니다.
+    """
+    def __init__(self, name: str, lock_dir: Path = LOCK_DIR):
+        self.path = Path(lock_dir) / f"{name}.lock"
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def load_schedule_state(path: Path = STATE_PATH) -> Dict[str, dict]:
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_schedule_state(state: Dict[str, dict], path: Path = STATE_PATH):
+    """임시 파일에 쓴 뒤 교체하여, 중간에 죽어도 테이블이 깨지지 않도록 합니다."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _fmt(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class CrawlScheduler:
+    """
+    launch(name) 코루틴을 스케줄에 맞춰 반복 실행하는 데몬 루프.
+    launch는 rc(int)를 반환해야 합니다.
+    """
+    def __init__(self,
+                 schedules: Dict[str, CrawlerSchedule],
+                 launch: Callable[[str], Awaitable[int]],
+                 max_concurrent: int,
+                 state_path: Path = STATE_PATH,
+                 startup_spread: float = 60.0,
+                 policy=None,
+                 log: Callable[[str], None] = print):
+        self.schedules = schedules
+        self.launch = launch
+        self.state_path = Path(state_path)
+        self.startup_spread = startup_spread
+        self.policy = policy
+        self.log = log
+        self._sem = asyncio.Semaphore(max(1, max_concurrent))
+        self._running: Dict[str, asyncio.Task] = {}
+        self._changed = asyncio.Event()
+        self._stopping = False
+        self.state = load_schedule_state(self.state_path)
+
+    # ── 다음 실행 시각 관리 ──
+    def _init_table(self):
+        """저장된 테이블을 불러오고, 밀린(overdue) 크롤러는 startup_spread 안에 분산 배치합니다."""
+        now = time.time()
+        overdue = []
+        for name in self.schedules:
+            entry = self.state.setdefault(name, {})
+            next_run = entry.get("next_run")
+            if next_run is None or next_run <= now:
+                overdue.append(name)
+            elif next_run > now + self.schedules[name].interval + self.schedules[name].jitter:
+                # 주기가 짧아진 경우 예전 테이블 값 때문에 너무 오래 기다리지 않도록 보정
+                entry["next_run"] = now + self.schedules[name].next_delay()
+        random.shuffle(overdue)
+        slot = self.startup_spread / max(1, len(overdue))
+        for i, name in enumerate(overdue):
+            self.state[name]["next_run"] = now + i * slot + random.uniform(0, slot)
+        # 스케줄에서 빠진 크롤러 정리
+        for name in list(self.state):
+            if name not in self.schedules:
+                del self.state[name]
+        save_schedule_state(self.state, self.state_path)
+        for name in self.schedules:
+            self.log(f"[scheduler] {name}: 다음 실행 {_fmt(self.state[name]['next_run'])}")
+
+    def _reschedule(self, name: str, started: float, rc: int, delay: Optional[float] = None):
+        sched = self.schedules[name]
+        finished = time.time()
+        if delay is None:
+            delay = sched.next_delay()
+        else:
+            # 정책이 준 간격에도 지터를 섞되, 간격의 10%를 넘지 않도록
+            j = min(sched.jitter, delay * 0.1)
+            delay = max(0.0, delay + random.uniform(-j, j))
+        # 주기는 시작 시각 기준, 단 실행이 주기보다 길었으면 종료 시각 기준
+        next_run = max(started + delay, finished + sched.jitter * random.random())
+        self.state[name].update({
+            "next_run": next_run,
+            "last_start": started,
+            "last_end": finished,
+            "last_rc": rc,
+        })
+        save_schedule_state(self.state, self.state_path)
+        self.log(f"[scheduler] {name}: 종료 rc={rc} ({finished - started:.1f}s), 다음 실행 {_fmt(next_run)}")
+
+    # ── 실행 ──
+    async def _run_guarded(self, name: str):
+        started = time.time()
+        rc = 1
+        delay = None
+        try:
+            async with self._sem:
+                started = time.time()
+                lock = CrawlLock(name)
+                if not lock.acquire():
+                    self.log(f"[scheduler] {name}: 다른 프로세스에서 실행 중(락 보유) → 이번 회차 건너뜀")
+                    rc = RC_SKIPPED_OVERLAP
+                    return
+                try:
+                    if self.policy:
+                        await asyncio.to_thread(self.policy.before_run, name)
+                    rc = await self.launch(name)
+                    if self.policy:
+                        delay = await asyncio.to_thread(self.policy.after_run, name, rc, started)
+                finally:
+                    lock.release()
+        finally:
+            self._running.pop(name, None)
+            self._reschedule(name, started, rc, delay)
+            self._changed.set()
+
+    def stop(self):
+        self._stopping = True
+        self._changed.set()
+
+    async def run_forever(self):
+        self._init_table()
+        while not self._stopping:
+            now = time.time()
+            for name in self.schedules:
+                if name in self._running:
+                    continue  # 이전 실행이 끝나지 않았으면 절대 다시 시작하지 않음
+                if self.state[name]["next_run"] <= now:
+                    self._running[name] = asyncio.create_task(self._run_guarded(name))
+
+            waiting = [self.state[n]["next_run"] for n in self.schedules if n not in self._running]
+            timeout = max(0.5, min(waiting) - time.time()) if waiting else None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._running:
+            self.log(f"[scheduler] 종료 요청: 실행 중인 {len(self._running)}개 크롤러 대기...")
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
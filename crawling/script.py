@@ -7,16 +7,78 @@ run concurrently:
 - crawler_coinbase_cartel.py
 
 --verbose로 전체 콘솔 출력 가능, --add-pattern으로 허용 패턴 추가 가능.
+기본은 in-process 모드(각 크롤러 모듈의 main_async를 러너의 이벤트 루프에서 태스크로 실행),
+--subprocess로 기존처럼 크롤러마다 python3 프로세스를 띄우는 모드로 되돌릴 수 있음.
+로그는 outputs/logs/<name>.log 에 배치 기록되며 크기/날짜 기준으로 회전·gzip 압축됨(log_sink.py).
+--daemon으로 크롤러별 주기(SCHEDULES, --schedule)에 맞춰 계속 실행하는 상주 모드 사용 가능(scheduler.py).
+--daemon --adaptive는 소스별 변경률을 학습해 주기를 자동 조정(adaptive_scheduler.py, --show-adaptive로 확인).
+실행마다 크롤러별 시간/peak RSS/CPU/출력량/결과 행 수를 outputs/run_summary.json 과
+outputs/metrics/crawler_runner.prom(Prometheus textfile)으로 기록(run_stats.py).
+in-process 모드는 크롤러들이 러너 프로세스 하나를 함께 쓰므로 크롤러별 RSS는 없고(러너 전체 peak RSS만 기록),
+CPU는 각 크롤러의 to_thread 워커 스레드 시간(time.thread_time)만 기록. 정확한 크롤러별 RSS/CPU는 --subprocess.
+크롤링이 끝나면 merge → dedupe → score → export/alert 후처리 DAG를 실행(pipeline.py, post_crawl.py).
+--no-pipeline으로 끄고, --pipeline-only로 후처리만 실행할 수 있음.
+모든 Tor 요청은 러너가 소유한 전역/호스트별 token bucket 예산에서 슬롯을 받아 전송(tor_budget.py,
+in-process는 공유 객체, --subprocess는 유닉스 소켓 서버). 크롤러별 사용량은 실행 요약에 기록.
+실행 전에 크롤러가 쓰는 .onion 대상의 기록된 가용성을 확인해 모두 down 이면 timeout을 기다리지 않고 건너뜀(onion_prober.py).
+크롤러별 페이지 수/오류/요청 지연 분위수(crawl_metrics.py)를 outputs/run_history.sqlite 에 쌓고,
+직전 실행들의 중앙값 대비 크게 나빠지면 성능 회귀로 표시(run_history.py).
+--profile(또는 CRAWL_PROFILE=1)로 러너와 각 크롤러를 cProfile + 스택 샘플러로 감싸 로그 옆에
+.pstats / .collapsed(flamegraph) 파일을 남기고, fetch/parse/write 구간 시간을 요약에 표시(profiling.py).
+모든 크롤러는 공통 비동기 수집 계층(fetch.py)으로 요청: Tor SOCKS keep-alive 연결 풀, 압축 전송,
+제한된 재시도(백오프/Retry-After), 같은 URL 동시 요청 합치기(single-flight).
+Tor 요청은 SOCKS 인증 격리로 만든 여러 회로(--tor-circuits, 기본 4)에 관측 지연 기준으로 분산(tor_circuits.py).
+회로별 최근 지연/오류율이 나빠지면 새 회로로 교체하고 control port로 CLOSECIRCUIT/NEWNYM(쿨다운 적용, tor_control.py).
+요청 timeout은 호스트별 관측 p99로 조정하고, p95를 넘긴 Tor 요청은 다른 회로로 hedge 요청(--no-hedge로 끔).
+미러가 여러 개인 유출 사이트는 첫 요청을 미러끼리 경쟁시켜 빠른 미러를 쓰고, 죽으면 다른 미러로 전환(mirrors.py).
+응답은 outputs/http_cache 에 저장하고 ETag/Last-Modified 조건부 GET으로 바뀌었을 때만 본문을 받음(소스별 TTL 기본 0:
+주기 실행마다 서버에 확인해야 새 게시물/적응형 주기 추정이 맞으므로, TTL을 주면 데몬은 주기보다 긴 TTL을 경고).
+크롤러별 받은 바이트와 캐시 적중률을 요약에 표시(http_cache.py, --no-http-cache로 끔).
+--warc-record로 요청/응답을 WARC로 남기고, --warc-replay로 네트워크 없이 그 응답으로 다시 실행(warc_archive.py).
+--trace로 크롤러 실행 → fetch(호스트/상태/바이트/회로) → parse → write 구간을 span으로 outputs/traces 에 기록하고,
+호스트별 요청 지연 히스토그램을 run_summary.json / Prometheus 파일에 남김(tracing.py).
 """
 
 import asyncio
+import contextvars
+import signal
+import importlib
+import io
 import os
 import sys
 import re
+import time
+import traceback
 import argparse
+import dataclasses
 from pathlib import Path
 from datetime import datetime
 
+from log_sink import AsyncLogSink, LOG_DIR
+from scheduler import CrawlerSchedule, CrawlLock, CrawlScheduler, RC_SKIPPED_OVERLAP
+from adaptive_scheduler import AdaptivePoller, print_summary as print_adaptive_summary
+from run_stats import CrawlerRunResult, ProcessSampler, RunSummaryWriter, count_csv_rows
+from pipeline import Pipeline, FAILED
+from post_crawl import build_stages
+import crawl_metrics
+import fetch
+import html_backend
+import http_cache
+import onion_prober
+import profiling
+from run_history import RunHistory, apply_metrics
+import tor_budget
+import tor_circuits
+import tor_control
+import tracing
+import warc_archive
+from tor_budget import TorBudget, BudgetServer
+
+try:
+    import resource  # peak RSS 측정용 (Unix 전용)
+except ImportError:
+    resource = None
+
 # ── OPTIONS ──
 CRAWLERS = [
     ("dragonforce",       ["python3", "-u", "crawler_dragonforce.py"]),
@@ -24,8 +86,29 @@ CRAWLERS = [
     ("coinbase_cartel",   ["python3", "-u", "crawler_coinbase_cartel.py"]),
 ]
 
-LOG_DIR = Path("outputs/logs")
+# 크롤러별 통합 CSV (신규 id 수 관측용)
+UNIFIED_OUTPUTS = {
+    "dragonforce":     Path("outputs/dragonforce_unified.csv"),
+    "ransomware_live": Path("outputs/ransomware_live_unified.csv"),
+    "coinbase_cartel": Path("outputs/coinbase_cartel_unified.csv"),
+}
+# 후처리 병합 대상 (러너가 돌리지 않는 darkforums 결과도 있으면 포함)
+PIPELINE_INPUTS = list(UNIFIED_OUTPUTS.values()) + [Path("outputs/dark_forums_unified.csv")]
+
+# --daemon 모드 기본 주기/지터 (초). --schedule name=1h:5m 형식으로 덮어쓸 수 있음
+SCHEDULES = {
+    "dragonforce":     CrawlerSchedule("dragonforce",     interval=6 * 3600, jitter=15 * 60),
+    "ransomware_live": CrawlerSchedule("ransomware_live", interval=1 * 3600, jitter=5 * 60),
+    "coinbase_cartel": CrawlerSchedule("coinbase_cartel", interval=6 * 3600, jitter=15 * 60),
+}
+
 LOG_DIR.mkdir(parents=True, exist_ok=True)
+LOG_FLUSH_BYTES = 64 * 1024       # 버퍼가 이 크기를 넘으면 즉시 기록
+LOG_FLUSH_INTERVAL = 1.0          # 최소 이 주기(초)마다 기록
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 활성 로그 파일 회전 크기
+LOG_RETENTION_DAYS = 14           # 압축 세그먼트 보존 기간
+LOG_MAX_SEGMENTS = 50             # 크롤러별 최대 세그먼트 수
+PROFILE_DIR: Path | None = None   # --profile/CRAWL_PROFILE 이면 .pstats/.collapsed 저장 위치
 
 RESET = "\033[0m"
 COLORS = {
@@ -47,26 +130,37 @@ DEFAULT_ALLOW_PATTERNS = [
     r"(ERROR|Error|Exception|Traceback|오류|에러|실패|failed|timeout|타임아웃)"
 ]
 
+_ts_cache: tuple[int, str] = (0, "")
+
 def ts() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # 초 단위 포맷이므로 같은 초 안에서는 캐시된 문자열을 재사용
+    global _ts_cache
+    now = int(time.time())
+    if _ts_cache[0] != now:
+        _ts_cache = (now, datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"))
+    return _ts_cache[1]
 
 def colorize(s: str, color_key: str | None) -> str:
     if not COLORS_ENABLED or not color_key:
         return s
     return f"{COLORS.get(color_key,'')}{s}{RESET}"
 
-def log_path(name: str) -> Path:
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return LOG_DIR / f"{name}_{stamp}.log"
+def peak_rss_mb(who: int) -> float | None:
+    """RUSAGE_SELF / RUSAGE_CHILDREN의 peak RSS(MB). Linux는 KB, macOS는 byte 단위."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
 
 async def _read_stream(
     stream: asyncio.StreamReader,
     name: str,
     kind: str,
-    f,
+    sink: AsyncLogSink,
     allow_re: re.Pattern,
     verbose: bool,
     max_len: int,
+    stats: CrawlerRunResult | None = None,
 ):
     prefix = f"[{name}][{kind}]"
     suppressed = 0
@@ -75,22 +169,28 @@ async def _read_stream(
         line = await stream.readline()
         if not line:
             break
+        if stats is not None:
+            stats.bytes_emitted += len(line)
+            stats.lines_emitted += 1
         try:
             text = line.decode(errors="replace").rstrip("\n")
         except Exception:
             text = str(line).rstrip("\n")
 
-        file_line = f"{ts()} {prefix} {text}\n"
-        f.write(file_line)
-        f.flush()
+        if stats is not None and (metrics := crawl_metrics.parse_line(text)) is not None:
+            apply_metrics(stats, metrics)  # subprocess 크롤러가 종료 시 보낸 지표 줄
+            continue
+
+        now = ts()
+        sink.write(f"{now} {prefix} {text}\n")
 
         to_print = verbose or (allow_re.search(text) and (len(text) <= max_len))
         if to_print:
-            console_line = f"{ts()} {prefix} {text}"
+            console_line = f"{now} {prefix} {text}"
             color_key = "ERR" if kind == "ERR" else name
             print(colorize(console_line, color_key))
             if suppressed:
-                summary = f"{ts()} [{name}] … {suppressed} line(s) filtered"
+                summary = f"{now} [{name}] … {suppressed} line(s) filtered"
                 print(colorize(summary, "OUT"))
                 suppressed = 0
         else:
@@ -100,26 +200,99 @@ async def _read_stream(
         summary = f"{ts()} [{name}] … {suppressed} line(s) filtered (final)"
         print(colorize(summary, "OUT"))
 
-async def run_one(
-    name: str,
-    cmd: list[str],
-    allow_re: re.Pattern,
-    verbose: bool,
-    max_len: int,
-    env: dict | None = None,
-) -> tuple[str, int, Path]:
-    script = cmd[-1]
-    if not Path(script).exists():
-        err = f"{ts()} [{name}][ERR] 스크립트 없음: {script}"
-        print(colorize(err, "ERR"))
-        return name, 127, Path("/dev/null")
+# ── in-process 모드: 크롤러 print 출력을 태스크별 StreamReader로 라우팅 ──
+# 크롤러 태스크(및 asyncio.to_thread로 넘어간 스레드)는 컨텍스트를 상속하므로
+# ContextVar에 담긴 sink로 stdout/stderr를 구분해 보낼 수 있다.
+_OUT_SINK: contextvars.ContextVar = contextvars.ContextVar("crawler_out_sink", default=None)
+_ERR_SINK: contextvars.ContextVar = contextvars.ContextVar("crawler_err_sink", default=None)
 
-    lp = log_path(name)
-    print(colorize(f"{ts()} [{name}] 실행 시작 → {' '.join(cmd)}", name))
-    print(colorize(f"{ts()} [{name}] 로그 파일: {lp.resolve()}", "HDR"))
+class _RoutedStream(io.TextIOBase):
+    """sys.stdout/stderr 대체 객체. 현재 컨텍스트에 sink가 없으면 원래 스트림으로 출력합니다."""
+    def __init__(self, fallback, sink_var: contextvars.ContextVar):
+        self._fallback = fallback
+        self._sink_var = sink_var
+
+    def write(self, s: str) -> int:
+        sink = self._sink_var.get()
+        if sink is None:
+            return self._fallback.write(s)
+        sink(s)
+        return len(s)
+
+    def flush(self):
+        if self._sink_var.get() is None:
+            self._fallback.flush()
+
+    def isatty(self) -> bool:
+        return self._sink_var.get() is None and self._fallback.isatty()
+
+def _install_routed_streams():
+    if not isinstance(sys.stdout, _RoutedStream):
+        sys.stdout = _RoutedStream(sys.stdout, _OUT_SINK)
+    if not isinstance(sys.stderr, _RoutedStream):
+        sys.stderr = _RoutedStream(sys.stderr, _ERR_SINK)
 
+def _make_sink(loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader):
+    """어느 스레드에서 호출되어도 안전하게 reader에 데이터를 밀어 넣는 sink"""
+    def sink(s: str):
+        loop.call_soon_threadsafe(reader.feed_data, s.encode("utf-8", errors="replace"))
+    return sink
+
+def load_entry(script: str):
+    """크롤러 스크립트에 대응하는 모듈을 import하고 공통 진입점(main_async)을 반환합니다."""
+    module = importlib.import_module(Path(script).stem)
+    entry = getattr(module, "main_async", None)
+    if entry is None or not asyncio.iscoroutinefunction(entry):
+        raise AttributeError(f"{script}: async def main_async() 진입점이 없습니다.")
+    return entry
+
+async def _run_entry(name, entry, out_sink, err_sink, metrics) -> int:
+    # 이 태스크 전용 컨텍스트에서만 sink가 설정됨 (러너의 다른 태스크 출력에는 영향 없음)
+    _OUT_SINK.set(out_sink)
+    _ERR_SINK.set(err_sink)
+    tor_budget.CURRENT_CRAWLER.set(name)
+    crawl_metrics.install(metrics)
+    if PROFILE_DIR is not None:
+        profiling.enable(PROFILE_DIR)
+    try:
+        rc = await entry()
+        return rc if isinstance(rc, int) else 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+async def _run_inprocess(name, entry, sink, allow_re, verbose, max_len, stats) -> int:
+    loop = asyncio.get_running_loop()
+    out_reader = asyncio.StreamReader()
+    err_reader = asyncio.StreamReader()
+
+    # 러너 프로세스를 함께 쓰므로 RSS/CPU 샘플링은 하지 않음 (CPU는 워커 스레드 시간만 metrics로 받음)
+    metrics = crawl_metrics.CrawlMetrics()
+    t_out = asyncio.create_task(_read_stream(out_reader, name, "OUT", sink, allow_re, verbose, max_len, stats))
+    t_err = asyncio.create_task(_read_stream(err_reader, name, "ERR", sink, allow_re, verbose, max_len, stats))
+    t_main = asyncio.create_task(
+        _run_entry(name, entry, _make_sink(loop, out_reader), _make_sink(loop, err_reader), metrics)
+    )
+    try:
+        rc = await t_main
+    finally:
+        # 스레드에서 예약된 feed_data 뒤에 EOF가 오도록 같은 경로로 예약
+        loop.call_soon_threadsafe(out_reader.feed_eof)
+        loop.call_soon_threadsafe(err_reader.feed_eof)
+        apply_metrics(stats, metrics.summary())
+    await asyncio.gather(t_out, t_err)
+    return rc
+
+async def _run_subprocess(name, cmd, sink, allow_re, verbose, max_len, env, stats) -> int:
     env2 = os.environ.copy()
     env2["PYTHONUNBUFFERED"] = "1"
+    env2[crawl_metrics.EMIT_ENV] = "1"
+    if PROFILE_DIR is not None:
+        env2[profiling.PROFILE_ENV] = str(PROFILE_DIR.resolve())
     if env:
         env2.update(env)
 
@@ -130,29 +303,89 @@ async def run_one(
         env=env2,
     )
 
-    with lp.open("a", encoding="utf-8") as f:
-        t_out = asyncio.create_task(_read_stream(proc.stdout, name, "OUT", f, allow_re, verbose, max_len))
-        t_err = asyncio.create_task(_read_stream(proc.stderr, name, "ERR", f, allow_re, verbose, max_len))
+    sampler = ProcessSampler(proc.pid).start()
+    t_out = asyncio.create_task(_read_stream(proc.stdout, name, "OUT", sink, allow_re, verbose, max_len, stats))
+    t_err = asyncio.create_task(_read_stream(proc.stderr, name, "ERR", sink, allow_re, verbose, max_len, stats))
 
+    try:
+        rc = await proc.wait()
+        await asyncio.gather(t_out, t_err)
+    except asyncio.CancelledError:
         try:
-            rc = await proc.wait()
-            await asyncio.gather(t_out, t_err)
-        except asyncio.CancelledError:
+            proc.terminate()
+        except ProcessLookupError:
+            pass
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=3)
+        except asyncio.TimeoutError:
             try:
-                proc.terminate()
+                proc.kill()
             except ProcessLookupError:
                 pass
-            try:
-                await asyncio.wait_for(proc.wait(), timeout=3)
-            except asyncio.TimeoutError:
-                try:
-                    proc.kill()
-                except ProcessLookupError:
-                    pass
-            raise
+        raise
+    finally:
+        await sampler.stop()
+        sampler.fill(stats)
+    return rc
 
-    print(colorize(f"{ts()} [{name}] 종료 (rc={rc})", name))
-    return name, rc, lp
+async def run_one(
+    name: str,
+    cmd: list[str],
+    allow_re: re.Pattern,
+    verbose: bool,
+    max_len: int,
+    env: dict | None = None,
+    in_process: bool = True,
+    budget: TorBudget | None = None,
+) -> CrawlerRunResult:
+    script = cmd[-1]
+    if not Path(script).exists():
+        err = f"{ts()} [{name}][ERR] 스크립트 없음: {script}"
+        print(colorize(err, "ERR"))
+        return CrawlerRunResult(name, 127, Path("/dev/null"))
+
+    started_at = time.time()
+    started = time.perf_counter()
+    entry = None
+    if in_process:
+        try:
+            entry = load_entry(script)
+        except Exception as e:
+            # import 실패/진입점 없음 → subprocess 모드로 폴백
+            print(colorize(f"{ts()} [{name}][ERR] in-process 로드 실패({e}), subprocess로 폴백", "ERR"))
+
+    sink = AsyncLogSink(
+        name,
+        flush_bytes=LOG_FLUSH_BYTES,
+        flush_interval=LOG_FLUSH_INTERVAL,
+        max_bytes=LOG_MAX_BYTES,
+        retention_days=LOG_RETENTION_DAYS,
+        max_segments=LOG_MAX_SEGMENTS,
+    )
+    lp = sink.path
+    stats = CrawlerRunResult(name, 0, lp, mode="in-process" if entry else "subprocess", started_at=started_at)
+    if entry is not None:
+        load_sec = time.perf_counter() - started
+        print(colorize(f"{ts()} [{name}] 실행 시작 (in-process, 모듈 로드 {load_sec:.2f}s) → {Path(script).stem}.main_async()", name))
+    else:
+        print(colorize(f"{ts()} [{name}] 실행 시작 → {' '.join(cmd)}", name))
+    print(colorize(f"{ts()} [{name}] 로그 파일: {lp.resolve()}", "HDR"))
+
+    tor_before = budget.snapshot(name) if budget else None
+    async with sink:
+        if entry is not None:
+            rc = await _run_inprocess(name, entry, sink, allow_re, verbose, max_len, stats)
+        else:
+            rc = await _run_subprocess(name, cmd, sink, allow_re, verbose, max_len, env, stats)
+
+    stats.rc = rc
+    stats.wall_sec = time.perf_counter() - started
+    if budget:
+        tor = budget.snapshot(name).delta(tor_before)
+        stats.tor_requests, stats.tor_wait_sec, stats.tor_busy_sec = tor.requests, tor.wait_sec, tor.busy_sec
+    stats.rows_out = await asyncio.to_thread(count_csv_rows, UNIFIED_OUTPUTS.get(name))
+    print(colorize(f"{ts()} [{name}] 종료 (rc={rc}, {stats.wall_sec:.1f}s)", name))
+    return stats
 
 async def main_async(args):
     patterns = list(DEFAULT_ALLOW_PATTERNS)
@@ -160,16 +393,85 @@ async def main_async(args):
         patterns.extend(args.add_pattern)
     allow_re = re.compile("|".join(patterns))
 
-    global COLORS_ENABLED
+    global COLORS_ENABLED, LOG_MAX_BYTES, LOG_RETENTION_DAYS
     if args.no_color:
         COLORS_ENABLED = False
+    LOG_MAX_BYTES = int(args.log_max_mb * 1024 * 1024)
+    LOG_RETENTION_DAYS = args.log_retention_days
+    os.environ[profiling.RETENTION_ENV] = str(LOG_RETENTION_DAYS)  # .pstats/.collapsed 도 같은 보존 기간
+
+    in_process = not args.subprocess
+    if in_process:
+        _install_routed_streams()
 
-    tasks = [
-        asyncio.create_task(
-            run_one(name, cmd, allow_re, args.verbose, args.max_len, env=None)
+    if args.pipeline_only:
+        await run_pipeline(args)
+        return
+
+    commands = dict(CRAWLERS)
+    writer = RunSummaryWriter()
+    mode = "in-process" if in_process else "subprocess"
+
+    budget = None
+    server = None
+    if not args.no_tor_budget:
+        budget = TorBudget(
+            rate=args.tor_rate,
+            burst=args.tor_burst,
+            per_host_rate=args.tor_host_rate,
+            per_host_burst=args.tor_host_burst,
+            max_inflight=args.tor_max_inflight,
+            per_host_inflight=args.tor_host_inflight,
         )
-        for name, cmd in CRAWLERS
-    ]
+        if in_process:
+            tor_budget.install(budget)
+        else:
+            server = await BudgetServer(budget).start()
+
+    async def launch(name: str) -> CrawlerRunResult:
+        if not args.no_probe:
+            ok, reason = await onion_prober.preflight(name, args.probe_timeout)
+            if not ok:
+                print(colorize(f"{ts()} [{name}][ERR] 대상 서비스 down → 이번 회차 건너뜀: {reason}", "ERR"))
+                return CrawlerRunResult(name, onion_prober.RC_TARGET_DOWN, Path("/dev/null"), mode=mode)
+        env = {tor_budget.CRAWLER_ENV: name}
+        if server:
+            env[tor_budget.SOCKET_ENV] = str(server.path.resolve())
+        # 크롤러 1회 실행 = trace 하나 (in-process는 컨텍스트로, subprocess는 환경 변수로 부모 span 전달)
+        tor_budget.CURRENT_CRAWLER.set(name)
+        with tracing.span("crawl", mode=mode) as sp:
+            if sp.trace_id:
+                env[tracing.TRACE_ID_ENV], env[tracing.PARENT_ENV] = sp.trace_id, sp.span_id
+            result = await run_one(name, commands[name], allow_re, args.verbose, args.max_len,
+                                   env=env, in_process=in_process, budget=budget)
+            sp.set(rc=result.rc, pages=result.pages, errors=result.errors, rows=result.rows_out)
+            return result
+
+    try:
+        if args.daemon:
+            await run_daemon(args, launch, writer, mode, budget)
+        else:
+            await run_once(args, launch, writer, mode, budget)
+    finally:
+        tor_budget.install(None)
+        if server:
+            await server.close()
+
+async def run_once(args, launch, writer: RunSummaryWriter, mode: str, budget: TorBudget | None):
+    sem = asyncio.Semaphore(max(1, args.max_concurrent))
+
+    async def launch_once(name: str) -> CrawlerRunResult:
+        async with sem:
+            lock = CrawlLock(name)
+            if not lock.acquire():
+                print(colorize(f"{ts()} [{name}][ERR] 이전 실행이 아직 진행 중(락: {lock.path}) → 건너뜀", "ERR"))
+                return CrawlerRunResult(name, RC_SKIPPED_OVERLAP, Path("/dev/null"), mode=mode)
+            try:
+                return await launch(name)
+            finally:
+                lock.release()
+
+    tasks = [asyncio.create_task(launch_once(name)) for name, _ in CRAWLERS]
 
     results = []
     try:
@@ -184,20 +486,259 @@ async def main_async(args):
             pass
         sys.exit(130)
 
+    runner_info = runner_usage(mode, budget)
+    regressions = await record_history(args, results)
+    runner_info["regressions"] = [dataclasses.asdict(g) for g in regressions]
+    writer.update(results, runner_info)
+
     print("\n" + "=" * 80)
     print(colorize("종료 요약:", "HDR"))
-    for name, rc, lp in results:
-        status = "OK" if rc == 0 else f"FAIL({rc})"
-        line = f"- {name:<17} rc={rc:<3} status={status:<10} log={lp.resolve()}"
-        print(colorize(line, name if rc == 0 else "ERR"))
+    for r in results:
+        status = "OK" if r.rc == 0 else {RC_SKIPPED_OVERLAP: "SKIP", onion_prober.RC_TARGET_DOWN: "DOWN"}.get(r.rc, f"FAIL({r.rc})")
+        line = f"- {r.name:<17} rc={r.rc:<3} status={status:<10} time={r.wall_sec:>7.1f}s {format_usage(r)} log={r.log_path.resolve()}"
+        print(colorize(line, r.name if r.rc == 0 else "ERR"))
+    if runner_info.get("peak_rss_mb") is not None:
+        print(colorize(f"- mode={mode} peak_rss(runner)={runner_info['peak_rss_mb']:.1f}MB "
+                       f"peak_rss(children max)={runner_info['children_peak_rss_mb']:.1f}MB", "HDR"))
+    if mode == "in-process":
+        print(colorize("- in-process 모드: 크롤러별 RSS는 측정하지 않음(위 러너 전체 값 참고), "
+                       "cpu(thread)는 크롤러 워커 스레드 CPU만 포함", "HDR"))
+    if budget:
+        limits = runner_info["tor_budget"]["limits"]
+        print(colorize(f"- tor budget: {limits['rate']}req/s (burst {limits['burst']}), "
+                       f"host {limits['per_host_rate']}req/s, in-flight {limits['max_inflight']}/{limits['per_host_inflight']}", "HDR"))
+    used = [c for c in runner_info.get("tor_circuits", []) if c["requests"]]
+    if used:
+        print(colorize("- tor circuits: " + " ".join(
+            f"#{c['circuit']}={c['requests']}req/{c['latency_ms'] if c['latency_ms'] is not None else '-'}ms"
+            + (f"/fail {c['failures']}" if c['failures'] else "")
+            + (f"/renew {c['renewals']}" if c['renewals'] else "") for c in used), "HDR"))
+    for e in runner_info.get("tor_circuit_events", []):
+        print(colorize(f"- [tor circuit] {e}", "HDR"))
+    for g in regressions:
+        print(colorize(f"- [성능 회귀] {g.describe()}", "ERR"))
+    for r in results:
+        for f in r.profile_files:
+            print(colorize(f"- [profile] {r.name}: {f}", "HDR"))
+    print(colorize(f"- summary={writer.summary_path.resolve()} prom={writer.prom_path.resolve()}", "HDR"))
     print("=" * 80 + "\n")
 
+    if not args.no_pipeline:
+        await run_pipeline(args)
+
+async def record_history(args, results: list[CrawlerRunResult]) -> list:
+    """실행 결과를 이력 DB에 기록하고 기준선 대비 회귀 목록을 반환 (겹쳐서 건너뛴 실행은 제외)"""
+    results = [r for r in results if r.rc != RC_SKIPPED_OVERLAP]
+    if args.no_history or not results:
+        return []
+
+    def work():
+        history = RunHistory()
+        try:
+            return history.record_and_check(results)
+        finally:
+            history.close()
+
+    try:
+        return await asyncio.to_thread(work)
+    except Exception as e:  # 이력 기록 실패가 크롤링 결과를 막지 않도록
+        print(colorize(f"{ts()} [runner][ERR] 실행 이력 기록 실패: {e}", "ERR"))
+        return []
+
+async def run_pipeline(args) -> bool:
+    pipeline = Pipeline(build_stages(PIPELINE_INPUTS), log=lambda msg: print(colorize(f"{ts()} {msg}", "HDR")))
+    results = await pipeline.run(force=args.force_pipeline)
+    summary = ", ".join(f"{r.name}={r.status}" for r in results.values())
+    failed = any(r.status == FAILED for r in results.values())
+    print(colorize(f"{ts()} [pipeline] {summary}", "ERR" if failed else "HDR"))
+    return not failed
+
+class PipelineTrigger:
+    """데몬 모드에서 크롤러가 끝날 때마다 후처리를 요청. 실행 중에 들어온 요청은 한 번으로 합쳐 재실행"""
+    def __init__(self, args):
+        self.args = args
+        self._task: asyncio.Task | None = None
+        self._dirty = False
+
+    def request(self):
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while self._dirty:
+            self._dirty = False
+            await run_pipeline(self.args)
+
+    async def wait(self):
+        if self._task:
+            await self._task
+
+def runner_usage(mode: str, budget: TorBudget | None = None) -> dict:
+    info = {
+        "mode": mode,
+        "pid": os.getpid(),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+    }
+    if budget:
+        info["tor_budget"] = budget.report()
+    if mode == "in-process":
+        # subprocess 모드에서는 크롤러 프로세스마다 자기 풀을 가지므로 러너에서 볼 수 없음
+        info["tor_circuits"] = tor_circuits.default_pool().snapshot()
+        if tor_control.monitor():
+            info["tor_circuit_events"] = list(tor_control.monitor().events)
+    return info
+
+def format_usage(r: CrawlerRunResult) -> str:
+    parts = []
+    if r.peak_rss_bytes is not None:
+        parts.append(f"rss={r.peak_rss_bytes / (1024 * 1024):.1f}MB")
+        parts.append(f"cpu={r.cpu_user_sec:.1f}u/{r.cpu_system_sec:.1f}s")
+    elif r.cpu_thread_sec is not None:
+        parts.append(f"cpu(thread)={r.cpu_thread_sec:.1f}s")
+    parts.append(f"out={r.bytes_emitted}B")
+    if r.pages is not None:
+        parts.append(f"pages={r.pages} err={r.errors}")
+    if r.latency_p90_ms is not None:
+        parts.append(f"p50/p90={r.latency_p50_ms:.0f}/{r.latency_p90_ms:.0f}ms")
+    if r.bytes_fetched is not None:
+        parts.append(f"fetched={r.bytes_fetched / 1024:.1f}KB")
+    if r.cache_lookups:
+        parts.append(f"cache={r.cache_hit_rate:.0%} of {r.cache_lookups}")
+    if r.spans:
+        parts.append("spans[" + " ".join(f"{k}={v['total_sec']:.1f}s" for k, v in r.spans.items()) + "]")
+    if r.rows_out is not None:
+        parts.append(f"rows={r.rows_out}")
+    if r.tor_requests:
+        parts.append(f"tor={r.tor_requests}req/wait {r.tor_wait_sec:.1f}s/busy {r.tor_busy_sec:.1f}s")
+    return " ".join(parts)
+
+def parse_duration(s: str) -> float:
+    """'90', '30s', '15m', '6h', '1d' → 초"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    s = s.strip().lower()
+    if s and s[-1] in units:
+        return float(s[:-1]) * units[s[-1]]
+    return float(s)
+
+def apply_schedule_overrides(overrides: list[str]) -> dict[str, CrawlerSchedule]:
+    """--schedule name=interval[:jitter] 값을 SCHEDULES에 반영합니다."""
+    schedules = {name: SCHEDULES.get(name, CrawlerSchedule(name, interval=6 * 3600))
+                 for name, _ in CRAWLERS}
+    for item in overrides:
+        name, _, spec = item.partition("=")
+        if name not in schedules or not spec:
+            raise SystemExit(f"--schedule 형식 오류 또는 알 수 없는 크롤러: {item}")
+        interval, _, jitter = spec.partition(":")
+        schedules[name] = CrawlerSchedule(
+            name,
+            interval=parse_duration(interval),
+            jitter=parse_duration(jitter) if jitter else schedules[name].jitter,
+        )
+    return schedules
+
+def build_adaptive_poller(args, schedules: dict[str, CrawlerSchedule]) -> AdaptivePoller:
+    return AdaptivePoller(
+        outputs=UNIFIED_OUTPUTS,
+        target_staleness=args.staleness_target,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        baseline_intervals={name: s.interval for name, s in schedules.items()},
+    )
+
+def warn_cache_ttl(schedules: dict[str, CrawlerSchedule], min_interval: float | None = None):
+    """HTTP 캐시 TTL이 실행 주기 이상인 소스 경고: 그 사이 실행은 서버에 묻지 않아 새 게시물을 못 봄"""
+    if not http_cache.enabled():
+        return
+    for name, s in schedules.items():
+        shortest = min(s.interval, min_interval) if min_interval else s.interval
+        ttl = http_cache.ttl_for(name)
+        if ttl and ttl >= shortest:
+            print(colorize(f"{ts()} [runner][ERR] {name}: HTTP 캐시 TTL {ttl:.0f}s ≥ 실행 주기 {shortest:.0f}s "
+                           f"→ 주기 실행이 저장본만 보게 됨 ({http_cache.TTL_ENV}로 주기보다 짧게)", "ERR"))
+
+async def run_daemon(args, launch, writer: RunSummaryWriter, mode: str, budget: TorBudget | None = None):
+    trigger = None if args.no_pipeline else PipelineTrigger(args)
+
+    async def launch_rc(name: str) -> int:
+        result = await launch(name)
+        info = runner_usage(mode, budget)
+        regressions = await record_history(args, [result])
+        for g in regressions:
+            print(colorize(f"{ts()} [{name}][ERR] [성능 회귀] {g.describe()}", "ERR"))
+        info["regressions"] = [dataclasses.asdict(g) for g in regressions]
+        writer.update([result], info)
+        if trigger and result.rc == 0:
+            trigger.request()
+        return result.rc
+
+    schedules = apply_schedule_overrides(args.schedule)
+    policy = build_adaptive_poller(args, schedules) if args.adaptive else None
+    warn_cache_ttl(schedules, args.min_interval if args.adaptive else None)
+    scheduler = CrawlScheduler(
+        schedules,
+        launch_rc,
+        max_concurrent=args.max_concurrent,
+        startup_spread=args.startup_spread,
+        policy=policy,
+        log=lambda msg: print(colorize(f"{ts()} {msg}", "HDR")),
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, scheduler.stop)
+        except (NotImplementedError, AttributeError):
+            pass  # Windows: KeyboardInterrupt 경로로 종료
+    print(colorize(f"{ts()} [runner] 데몬 모드 시작 (동시 실행 최대 {args.max_concurrent}개)", "HDR"))
+    await scheduler.run_forever()
+    if trigger:
+        await trigger.wait()
+    print(colorize(f"{ts()} [runner] 데몬 모드 종료", "HDR"))
+
 def parse_args():
     p = argparse.ArgumentParser(description="Run crawlers concurrently with console log filtering.")
     p.add_argument("--verbose", action="store_true", help="콘솔에 전체 로그 출력(필터 비활성화)")
     p.add_argument("--add-pattern", action="append", default=[], help="콘솔 허용 추가 패턴(정규식). 여러 번 지정 가능")
     p.add_argument("--max-len", type=int, default=220, help="콘솔에 출력할 최대 라인 길이(기본 220)")
     p.add_argument("--no-color", action="store_true", help="콘솔 색상 비활성화")
+    p.add_argument("--log-max-mb", type=float, default=LOG_MAX_BYTES / (1024 * 1024), help="로그 파일 회전 크기(MB, 기본 10)")
+    p.add_argument("--log-retention-days", type=int, default=LOG_RETENTION_DAYS, help="압축된 로그 세그먼트/프로파일 파일 보존 일수(기본 14)")
+    p.add_argument("--subprocess", action="store_true", help="크롤러마다 python3 자식 프로세스를 띄우는 기존 방식으로 실행(폴백)")
+    p.add_argument("--no-pipeline", action="store_true", help="크롤링 후 후처리(merge/dedupe/score/export/alert) 생략")
+    p.add_argument("--pipeline-only", action="store_true", help="크롤러 없이 후처리 DAG만 실행")
+    p.add_argument("--force-pipeline", action="store_true", help="입력 변경 여부와 상관없이 모든 후처리 단계 재실행")
+    p.add_argument("--max-concurrent", type=int, default=len(CRAWLERS), help="동시에 실행할 최대 크롤러 수")
+    p.add_argument("--tor-rate", type=float, default=4.0, help="전체 크롤러 합산 Tor 요청 속도(req/s, 기본 4)")
+    p.add_argument("--tor-burst", type=float, default=8.0, help="전체 Tor 요청 burst 크기(기본 8)")
+    p.add_argument("--tor-host-rate", type=float, default=2.0, help="호스트(.onion)별 Tor 요청 속도(req/s, 기본 2)")
+    p.add_argument("--tor-host-burst", type=float, default=4.0, help="호스트별 Tor 요청 burst 크기(기본 4)")
+    p.add_argument("--tor-max-inflight", type=int, default=8, help="전체 동시 Tor 요청 수 상한(기본 8)")
+    p.add_argument("--tor-host-inflight", type=int, default=4, help="호스트별 동시 Tor 요청 수 상한(기본 4)")
+    p.add_argument("--tor-circuits", type=int, default=None, help="Tor 요청을 나눠 보낼 격리 회로 수(SOCKS 인증 격리, 기본 4, 1이면 단일 회로)")
+    p.add_argument("--no-circuit-monitor", action="store_true", help="회로 지연/오류 감시와 자동 교체(NEWNYM/CLOSECIRCUIT) 끄기")
+    p.add_argument("--no-hedge", action="store_true", help="느린 Tor 요청을 다른 회로로 한 번 더 보내는 hedging 끄기")
+    p.add_argument("--no-http-cache", action="store_true", help="디스크 HTTP 캐시(조건부 GET) 없이 매번 전체를 받기")
+    p.add_argument("--warc-record", nargs="?", const=str(warc_archive.DEFAULT_DIR), metavar="DIR",
+                   help="요청/응답을 WARC로 기록 (기본 outputs/warc)")
+    p.add_argument("--warc-replay", metavar="PATH", help="네트워크 대신 WARC 파일/디렉터리의 응답으로 재생 (가용성 확인/실행 이력 생략)")
+    p.add_argument("--trace", nargs="?", const="jsonl", choices=tracing.FORMATS,
+                   help="fetch/parse/write 구간을 span으로 outputs/traces 에 기록 (jsonl 기본, otlp)")
+    p.add_argument("--html-parser", choices=html_backend.BACKENDS,
+                   help="HTML 파서 백엔드 (기본: 설치된 것 중 selectolax > lxml > html.parser)")
+    p.add_argument("--no-tor-budget", action="store_true", help="공유 Tor 예산 없이 크롤러가 각자 요청")
+    p.add_argument("--no-probe", action="store_true", help="실행 전 .onion 대상 가용성 확인 생략")
+    p.add_argument("--probe-timeout", type=float, default=onion_prober.PROBE_TIMEOUT, help="down 대상 재확인(SOCKS CONNECT) 제한 시간(초, 기본 45)")
+    p.add_argument("--no-history", action="store_true", help="실행 이력(outputs/run_history.sqlite) 기록과 회귀 감지 생략")
+    p.add_argument("--profile", action="store_true", help="러너와 각 크롤러를 프로파일링(.pstats/.collapsed를 outputs/logs에 저장)")
+    p.add_argument("--daemon", action="store_true", help="상주 모드: 크롤러별 주기에 맞춰 반복 실행")
+    p.add_argument("--schedule", action="append", default=[], help="데몬 주기 덮어쓰기 name=interval[:jitter] (예: dragonforce=6h:15m). 여러 번 지정 가능")
+    p.add_argument("--adaptive", action="store_true", help="데몬 주기를 소스별 변경률 추정에 따라 자동 조정")
+    p.add_argument("--staleness-target", type=float, default=0.1, help="허용할 평균 staleness 비율 0~1 (기본 0.1)")
+    p.add_argument("--min-interval", type=parse_duration, default=15 * 60, help="적응형 주기 하한(기본 15m)")
+    p.add_argument("--max-interval", type=parse_duration, default=24 * 3600, help="적응형 주기 상한(기본 24h)")
+    p.add_argument("--show-adaptive", action="store_true", help="적응형 스케줄 추정치와 결정 로그를 출력하고 종료")
+    p.add_argument("--startup-spread", type=parse_duration, default=60.0, help="데몬 재시작 시 밀린 크롤러를 분산시킬 구간(기본 60s)")
     return p.parse_args()
 
 def main():
@@ -205,8 +746,42 @@ def main():
         print("PY !>= Python 3.8")
         sys.exit(2)
     args = parse_args()
+    if args.show_adaptive:
+        print_adaptive_summary(build_adaptive_poller(args, apply_schedule_overrides(args.schedule)))
+        return
+    if args.tor_circuits is not None:
+        # in-process 크롤러와 subprocess 자식 모두 환경 변수로 회로 풀 크기를 읽음
+        os.environ[tor_circuits.CIRCUITS_ENV] = str(args.tor_circuits)
+    if args.no_circuit_monitor:
+        os.environ[tor_control.MONITOR_ENV] = "0"
+    if args.no_hedge:
+        os.environ[fetch.HEDGE_ENV] = "0"
+    if args.no_http_cache:
+        os.environ[http_cache.ENABLE_ENV] = "0"
+    if args.trace:
+        os.environ[tracing.TRACE_ENV] = args.trace
+        os.environ.setdefault(tracing.TRACE_DIR_ENV, str(tracing.DEFAULT_DIR.resolve()))
+    if args.html_parser:
+        os.environ[html_backend.PARSER_ENV] = args.html_parser
+    if args.warc_record and args.warc_replay:
+        raise SystemExit("--warc-record 와 --warc-replay 는 함께 쓸 수 없습니다")
+    if args.warc_record:
+        os.environ[warc_archive.RECORD_ENV] = str(Path(args.warc_record).resolve())
+    if args.warc_replay:
+        os.environ[warc_archive.REPLAY_ENV] = str(Path(args.warc_replay).resolve())
+        # 재생 실행은 대상 가용성과 무관하고, 실제 실행 기준선(회귀 감지)을 흐리지 않도록 이력에서 제외
+        args.no_probe = args.no_history = True
+    global PROFILE_DIR
+    if args.profile:
+        PROFILE_DIR = LOG_DIR
+    elif profiling.profile_dir() is not None:
+        PROFILE_DIR = profiling.profile_dir()
     try:
-        asyncio.run(main_async(args))
+        if PROFILE_DIR is not None:
+            profiling.enable(PROFILE_DIR)
+            profiling.run(asyncio.run, main_async(args), name="runner")
+        else:
+            asyncio.run(main_async(args))
     except KeyboardInterrupt:
         print(colorize(f"{ts()} [runner][ERR] 강제 종료", "ERR"))
         sys.exit(130)
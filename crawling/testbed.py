@@ -0,0 +1,693 @@
+# testbed.py
+"""
+Tor/실제 사이트 없이 크롤러 처리량을 재현 가능하게 측정하기 위한 로컬 대역 서버와 벤치마크 (표준 라이브러리만 사용).
+
+- 대역 서버: 포트 하나로 SOCKS5(Tor 대신)와 평문 HTTP를 함께 받음. SOCKS CONNECT의 호스트 이름으로 사이트를 고름
+  · DragonForce  : /api/guest/blog/posts?page=N JSON (페이지 수/페이지당 게시물 수 설정)
+  · Coinbase Cartel: / 의 div.companies-grid > article 목록
+  · darkforums   : MyBB 형식 게시판 목록(/Forum-*, div.pagination, span#tid_*)과 게시물(/Thread-*, #posts > .post.classic)
+  · ransomware.live: 평문 HTTP로 직접 접속 (크롤러는 RANSOMWARE_LIVE_URL=http://127.0.0.1:<포트>/)
+  · check.torproject.org/api/ip: {"IsTor": true} (darkforums는 DARKFORUMS_TOR_CHECK_URL로 http 주소 사용)
+  내용은 --seed 기준으로 결정적이며 ETag/If-None-Match(304)를 지원
+- 장애 주입: 요청마다 응답 지연(--latency 분포), 대역폭 제한(--bandwidth), 503(--error-rate),
+  응답 없이 연결 끊기(--drop-rate), 200 챌린지 페이지(--challenge-rate, darkforums의 CHALLENGE_MARKERS 문구).
+  --require-clearance 면 darkforums는 clearance 쿠키(CLEARANCE_COOKIE) 없는 요청에 항상 챌린지 페이지
+  (bench는 이때 clearance.py 저장본을 미리 넣어 두고 CRAWL_CLEARANCE=saved 로 실행해 인계 경로를 측정)
+- 벤치마크: 서버를 띄우고 크롤러를 하나씩 임시 작업 디렉터리에서 실행(출력/상태 파일은 실제 outputs와 분리).
+  크롤러의 trace span(tracing.py)으로 성공 페이지 수/초와 fetch 지연 p50/p95를, 서버 기록으로 요청/주입 수를 집계.
+  TOR_BUDGET_*, TOR_CIRCUITS 등 환경 변수는 그대로 전달되므로 동시성 설정을 바꿔 가며 비교할 수 있음
+
+    python3 testbed.py serve --port 19050 --latency lognormal:0.8,0.6
+    python3 testbed.py bench --crawlers dragonforce,darkforums --latency lognormal:0.5,0.5 --challenge-rate 0.05 --json bench.json
+
+--latency 형식: none | fixed:초 | uniform:최소,최대 | exp:평균 | lognormal:중앙값,sigma (기본 lognormal:0.6,0.5)
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import clearance
+import tracing
+
+HERE = Path(__file__).resolve().parent
+
+# 크롤러 모듈의 대상 주소와 같은 호스트 (crawler_*.py의 URL/BASE_URL)
+DRAGONFORCE_HOST = "z3wqggtxft7id3ibr7srivv5gjof5fwg76slewnzwwakjuf3nlhukdid.onion"
+COINBASE_HOST = "fjg4zi4opkxkvdz7mvwp7h6goe4tcby3hhkrz43pht4j3vakhy75znyd.onion"
+DARKFORUMS_HOST = "qeei4m7a2tve6ityewnezvcnf647onsqbmdbmlcw4y5pr6uwwfwa35yd.onion"
+TOR_CHECK_HOST = "check.torproject.org"
+RANSOMWARE_HOSTS = {"www.ransomware.live", "127.0.0.1", "localhost"}
+
+SITES = {
+    DRAGONFORCE_HOST: "dragonforce",
+    COINBASE_HOST: "coinbase_cartel",
+    DARKFORUMS_HOST: "darkforums",
+    TOR_CHECK_HOST: "tor_check",
+    **{h: "ransomware_live" for h in RANSOMWARE_HOSTS},
+}
+
+# 벤치마크 대상: 이름 → (스크립트, 트래픽을 받는 사이트)
+BENCH_CRAWLERS = {
+    "dragonforce": ("crawler_dragonforce.py", "dragonforce"),
+    "ransomware_live": ("crawler_ransomware_live.py", "ransomware_live"),
+    "coinbase_cartel": ("crawler_coinbase_cartel.py", "coinbase_cartel"),
+    "darkforums": ("crawler_beautifulsoup_darkforums.py", "darkforums"),
+}
+
+CHALLENGE_BODY = (b"<html><head><title>DDoS protection by DDoS-Guard</title></head>"
+                  b"<body><h1>Checking your browser before accessing the site.</h1>"
+                  b"<p>Please complete the security check to continue.</p></body></html>")
+
+WORDS = ("data", "access", "network", "leak", "customer", "database", "internal", "finance", "backup",
+         "records", "employee", "contract", "server", "invoice", "archive", "credentials", "project",
+         "report", "private", "export", "source", "update", "payment", "system", "client", "mail")
+INDUSTRIES = ("Manufacturing", "Healthcare", "Education", "Retail", "Finance", "Logistics", "Legal", "Energy")
+GROUPS = ("lockbit3", "akira", "play", "qilin", "medusa", "dragonforce", "safepay", "incransom")
+COUNTRIES = ("US", "DE", "FR", "GB", "IT", "CA", "BR", "KR", "JP", "ES")
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+CLEARANCE_COOKIE = ("tb_clearance", "testbed-ok")
+
+
+@dataclasses.dataclass
+class Latency:
+    """응답 지연 분포 (초)"""
+    kind: str = "lognormal"
+    a: float = 0.6
+    b: float = 0.5
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.strip().partition(":")
+        values = [float(v) for v in args.split(",") if v.strip()]
+        if kind == "none":
+            return cls("fixed", 0.0)
+        if kind in ("fixed", "exp") and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ("uniform", "lognormal") and len(values) == 2:
+            return cls(kind, *values)
+        raise ValueError(f"지연 분포 형식 오류: {spec!r} (예: fixed:0.5, uniform:0.2,1.5, exp:0.8, lognormal:0.6,0.5)")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.a) if self.a > 0 else 0.0
+        return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+
+    def __str__(self):
+        if self.kind in ("fixed", "exp"):
+            return f"{self.kind}:{self.a:g}"
+        return f"{self.kind}:{self.a:g},{self.b:g}"
+
+
+@dataclasses.dataclass
+class TestbedConfig:
+    latency: Latency = dataclasses.field(default_factory=Latency)
+    bandwidth_kbps: float = 0.0      # 연결당 KB/s (0이면 제한 없음)
+    error_rate: float = 0.0          # 503 + Retry-After: 1
+    drop_rate: float = 0.0           # 응답 없이 연결 끊기
+    challenge_rate: float = 0.0      # 200 챌린지 페이지
+    seed: int = 0
+    dragonforce_pages: int = 5
+    dragonforce_per_page: int = 20
+    coinbase_victims: int = 60
+    ransomware_victims: int = 100
+    forums: Tuple[str, ...] = ("Forum-Announcements", "Forum-Databases", "Forum-Malware")
+    forum_pages: int = 3
+    threads_per_page: int = 20
+    replies: int = 10                # 게시물 페이지당 첫 글 외 답글 수
+    require_clearance: bool = False  # darkforums: clearance 쿠키가 없으면 항상 챌린지
+
+
+@dataclasses.dataclass
+class SiteStats:
+    requests: int = 0
+    outcomes: Counter = dataclasses.field(default_factory=Counter)   # ok / not_modified / error / drop / challenge / not_found
+    service_sec: List[float] = dataclasses.field(default_factory=list)
+    bytes_sent: int = 0
+
+
+# ── 사이트 내용 생성 ──
+def _rng(*key) -> random.Random:
+    return random.Random(":".join(map(str, key)))
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _company(rng: random.Random) -> str:
+    return f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {rng.choice(('Inc', 'GmbH', 'Ltd', 'SA', 'LLC'))}"
+
+
+def _domain(name: str) -> str:
+    return name.split()[0].lower() + name.split()[1].lower() + ".com"
+
+
+class Content:
+    """--seed 기준으로 결정적인 사이트 내용 (같은 URL은 같은 본문)"""
+    def __init__(self, config: TestbedConfig):
+        self.c = config
+
+    def dragonforce_posts(self, page: int) -> bytes:
+        c = self.c
+        pubs = []
+        if 1 <= page <= c.dragonforce_pages:
+            for i in range(c.dragonforce_per_page):
+                n = (page - 1) * c.dragonforce_per_page + i
+                rng = _rng(c.seed, "dragonforce", n)
+                name = _company(rng)
+                created = BASE_TIME - timedelta(hours=7 * n)
+                pubs.append({
+                    "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "name": name,
+                    "website": _domain(name),
+                    "address": f"{rng.randint(1, 999)} {rng.choice(WORDS).title()} Street",
+                    "weight": rng.randint(10 ** 8, 5 * 10 ** 11),
+                    "description": _words(rng, 60),
+                    "created_at": created.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "timer_publication": (created + timedelta(days=rng.randint(1, 20))).isoformat(),
+                    "is_transfering": False,
+                })
+        return json.dumps({"data": {"pages": c.dragonforce_pages, "publications": pubs}}).encode()
+
+    def coinbase_index(self) -> bytes:
+        cards = []
+        for n in range(self.c.coinbase_victims):
+            rng = _rng(self.c.seed, "coinbase", n)
+            name = _company(rng)
+            cards.append(
+                f'<article class="company-card"><h3 class="card-name">{escape(name)}</h3>'
+                f'<div class="card-meta"><span><b>Industry:</b> {rng.choice(INDUSTRIES)}</span>'
+                f'<span><b>Revenue:</b> ${rng.randint(2, 900)}M</span>'
+                f'<a href="https://{_domain(name)}" rel="nofollow">{_domain(name)}</a></div>'
+                f'<p class="card-desc">{_words(rng, 30)}</p>'
+                f'<a class="view-detail" href="/company/{n}">View details</a></article>')
+        return (f'<!DOCTYPE html><html><head><title>Coinbase Cartel</title></head><body>'
+                f'<header><nav><a href="/">Home</a> <a href="/contact">Contact</a></nav></header>'
+                f'<main><div class="companies-grid">{"".join(cards)}</div></main></body></html>').encode()
+
+    def ransomware_index(self) -> bytes:
+        items = []
+        for n in range(self.c.ransomware_victims):
+            rng = _rng(self.c.seed, "ransomware_live", n)
+            name = _company(rng)
+            found = (BASE_TIME - timedelta(days=n // 5)).date()
+            items.append(
+                f'<div class="victim-item list-group-item"><strong>{escape(name)}</strong>'
+                f'<small> by <a href="/group/{rng.choice(GROUPS)}"><span class="badge bg-danger">{rng.choice(GROUPS)}</span></a></small>'
+                f'<div class="text-body-secondary small">Discovery Date: {found} '
+                f'Estimated Attack Date: {found - timedelta(days=rng.randint(0, 6))}</div>'
+                f'<div class="bg-body-secondary p-2">{_words(rng, 40)}</div>'
+                f'<img src="/flags/{rng.choice(COUNTRIES).lower()}.svg" alt="{rng.choice(COUNTRIES)}" style="width: 32px">'
+                f'<a href="https://{_domain(name)}"><i class="fa-solid fa-globe-americas"></i></a>'
+                f'<a href="/id/{hashlib.sha1(name.encode()).hexdigest()[:16]}">details</a></div>')
+        counters = ("animateCounter('groupsCounter', 0, 312, 2000);"
+                    f"animateCounter('victimsCounter', 0, {20000 + self.c.ransomware_victims:,}, 2000);"
+                    "animateCounter('victimsThisYearCounter', 0, 5,871, 2000);"
+                    "animateCounter('victimsThisMonthCounter', 0, 402, 2000);")
+        return (f'<!DOCTYPE html><html><head><title>Ransomware.live</title></head><body>'
+                f'<nav class="navbar">{"".join(f"<a href=/{w}>{w}</a>" for w in WORDS[:12])}</nav>'
+                f'<div id="victim-list" class="list-group">{"".join(items)}</div>'
+                f'<script>function animateCounter(id, s, e, d) {{}}\n{counters}</script></body></html>').encode()
+
+    def forum_page(self, forum: str, page: int) -> Optional[bytes]:
+        c = self.c
+        if forum not in c.forums or not 1 <= page <= c.forum_pages:
+            return None
+        fi = c.forums.index(forum)
+        rows = []
+        for i in range(c.threads_per_page):
+            tid = fi * 100000 + (page - 1) * c.threads_per_page + i + 1
+            rng = _rng(c.seed, "thread", tid)
+            rows.append(
+                f'<tr class="inline_row"><td class="trow1"><span id="tid_{tid}"><a href="Thread-{tid}">'
+                f'{escape(_words(rng, 5).title())}</a></span><div class="author smalltext">'
+                f'<a href="User-u{rng.randint(1, 5000)}">u{rng.randint(1, 5000)}</a></div></td>'
+                f'<td class="trow2">{rng.randint(0, 80)}</td><td class="trow1">{rng.randint(10, 9000)}</td></tr>')
+        pagination = ""
+        if c.forum_pages > 1:
+            links = "".join(f'<a href="{forum}?page={p}" class="pagination_page">{p}</a>'
+                            for p in range(1, min(c.forum_pages, 4) + 1) if p != page)
+            if c.forum_pages > 4:
+                links += f' ... <a href="{forum}?page={c.forum_pages}" class="pagination_last">{c.forum_pages}</a>'
+            pagination = f'<div class="pagination"><span class="pages">Pages ({c.forum_pages}):</span>{links}</div>'
+        return (f'<!DOCTYPE html><html><head><title>{forum}</title></head><body><div id="container">'
+                f'{pagination}<table class="tborder">{"".join(rows)}</table>{pagination}</div></body></html>').encode()
+
+    def _post(self, rng: random.Random, tid: int, n: int, first: bool) -> str:
+        posted = BASE_TIME - timedelta(days=tid % 300, minutes=37 * n)
+        edited = (f'\n<span class="post_edit"><em>(This post was last modified: '
+                  f'{posted.strftime("%d-%m-%y, %I:%M %p")} by u{tid % 97}.)</em></span>') if first and tid % 3 == 0 else ""
+        stats = "".join(f'<div class="post_stats-bit group"><span>{k}</span><span>{v}</span></div>'
+                        for k, v in (("Posts", rng.randint(1, 3000)), ("Threads", rng.randint(1, 300)),
+                                     ("Joined", f"{rng.choice(('Jan', 'Mar', 'Jul', 'Oct'))} {rng.randint(2021, 2025)}")))
+        rep = rng.choice(("reputation_positive", "reputation_neutral", "reputation_negative"))
+        return (f'<div class="post classic" id="post_{tid * 100 + n}"><div class="post_author">'
+                f'<div class="post_user-profile"><a href="User-u{rng.randint(1, 5000)}">u{rng.randint(1, 5000)}</a></div>'
+                f'<div class="post_user-title">{rng.choice(("Member", "Junior Member", "Elite", "GOD"))}</div>'
+                f'<div class="post_author-stats">{stats}</div>'
+                f'<div class="post_reputation"><strong class="{rep}">{rng.randint(-5, 90)}</strong></div></div>'
+                f'<div class="post_content"><div class="post_head">'
+                f'<span class="post_date">{posted.strftime("%d-%m-%y, %I:%M %p")}{edited}</span></div>'
+                f'<div class="post_body scaleimages">{"<br>".join(_words(rng, 25) for _ in range(rng.randint(2, 8)))}'
+                f'</div></div></div>')
+
+    def thread_page(self, tid: int) -> Optional[bytes]:
+        c = self.c
+        fi, rest = divmod(tid - 1, 100000)
+        if fi >= len(c.forums) or rest >= c.forum_pages * c.threads_per_page:
+            return None
+        rng = _rng(c.seed, "thread", tid)
+        title = escape(_words(rng, 5).title())
+        posts = "".join(self._post(rng, tid, n, n == 0) for n in range(c.replies + 1))
+        return (f'<!DOCTYPE html><html><head><title>{title}</title></head><body><div id="container">'
+                f'<div class="thread-info"><h1 class="thread-info__name">{title}</h1></div>'
+                f'<div id="posts">{posts}</div></div></body></html>').encode()
+
+
+# ── 서버 ──
+class Testbed:
+    """SOCKS5 + HTTP 대역 서버. start() 후 port 사용, 같은 이벤트 루프에서 close()"""
+    def __init__(self, config: TestbedConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.host = host
+        self.port = port
+        self.content = Content(config)
+        self.rng = random.Random(config.seed)
+        self.stats: Dict[str, SiteStats] = defaultdict(SiteStats)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._bodies: Dict[Tuple[str, str], Optional[bytes]] = {}
+
+    async def start(self) -> "Testbed":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            first = await reader.readexactly(1)
+            if first == b"\x05":
+                host = await self._socks_handshake(reader, writer)
+                if host is not None:
+                    await self._serve_http(reader, writer, b"", host)
+            else:
+                await self._serve_http(reader, writer, first, None)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _socks_handshake(self, reader, writer) -> Optional[str]:
+        """SOCKS5 인증 협상(없음/사용자명 — tor_circuits 격리용 인증은 그대로 수락) 후 CONNECT 호스트 반환"""
+        methods = await reader.readexactly((await reader.readexactly(1))[0])
+        if 2 in methods:
+            writer.write(b"\x05\x02")
+            ver_ulen = await reader.readexactly(2)
+            await reader.readexactly(ver_ulen[1])
+            await reader.readexactly((await reader.readexactly(1))[0])
+            writer.write(b"\x01\x00")
+        else:
+            writer.write(b"\x05\x00")
+        head = await reader.readexactly(4)
+        if head[3] == 3:
+            host = (await reader.readexactly((await reader.readexactly(1))[0])).decode("idna")
+        elif head[3] == 1:
+            host = ".".join(map(str, await reader.readexactly(4)))
+        else:
+            await reader.readexactly(16)
+            host = "::1"
+        await reader.readexactly(2)  # 포트
+        ok = host in SITES
+        # Tor처럼 모르는 onion은 host unreachable(0x04)
+        writer.write(bytes([5, 0 if ok else 4, 0, 1, 0, 0, 0, 0, 0, 0]))
+        await writer.drain()
+        return host if ok else None
+
+    async def _serve_http(self, reader, writer, prefix: bytes, socks_host: Optional[str]):
+        while True:
+            request_line = prefix + await reader.readline()
+            prefix = b""
+            if not request_line.strip():
+                return
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            method, target = request_line.decode("latin-1").split()[:2]
+            host = socks_host or headers.get("host", "").split(":")[0]
+            if not await self._respond(writer, method, host, target, headers):
+                return
+            if headers.get("connection", "").lower() == "close":
+                return
+
+    def _route(self, site: Optional[str], path: str, query: Dict[str, List[str]]) -> Optional[bytes]:
+        if site == "dragonforce" and path == "/api/guest/blog/posts":
+            return self.content.dragonforce_posts(int(query.get("page", ["1"])[0]))
+        if site == "coinbase_cartel" and path == "/":
+            return self.content.coinbase_index()
+        if site == "ransomware_live" and path == "/":
+            return self.content.ransomware_index()
+        if site == "darkforums" and path.startswith("/Forum-"):
+            return self.content.forum_page(path[1:], int(query.get("page", ["1"])[0]))
+        if site == "darkforums" and path.startswith("/Thread-"):
+            return self.content.thread_page(int(path.rsplit("-", 1)[-1]))
+        return None
+
+    def _body(self, site: Optional[str], target: str) -> Optional[bytes]:
+        key = (site, target)
+        if key not in self._bodies:
+            parts = urlsplit(target)
+            try:
+                self._bodies[key] = self._route(site, parts.path, parse_qs(parts.query))
+            except ValueError:
+                self._bodies[key] = None
+        return self._bodies[key]
+
+    async def _respond(self, writer, method: str, host: str, target: str, headers: Dict[str, str]) -> bool:
+        """응답 하나를 보냄. 연결을 끊어야 하면 False"""
+        site = SITES.get(host)
+        t0 = time.monotonic()
+        if site == "tor_check":
+            return await self._send(writer, 200, b'{"IsTor": true, "IP": "127.0.0.1"}', "application/json")
+        stats = self.stats[site or host]
+        stats.requests += 1
+        await asyncio.sleep(self.config.latency.sample(self.rng))
+        roll = self.rng.random()
+        c = self.config
+        if roll < c.drop_rate:
+            stats.outcomes["drop"] += 1
+            return False
+        roll -= c.drop_rate
+        if roll < c.error_rate:
+            stats.outcomes["error"] += 1
+            ok = await self._send(writer, 503, b"Service Unavailable", extra={"Retry-After": "1"})
+        elif (roll - c.error_rate < c.challenge_rate and site != "dragonforce") or \
+                (c.require_clearance and site == "darkforums" and "=".join(CLEARANCE_COOKIE) not in headers.get("cookie", "")):
+            stats.outcomes["challenge"] += 1
+            ok = await self._send(writer, 200, CHALLENGE_BODY)
+        else:
+            body = self._body(site, target) if method == "GET" else None
+            if body is None:
+                stats.outcomes["not_found"] += 1
+                ok = await self._send(writer, 404, b"<html><body>Not Found</body></html>")
+            else:
+                etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+                if headers.get("if-none-match") == etag:
+                    stats.outcomes["not_modified"] += 1
+                    ok = await self._send(writer, 304, b"", extra={"ETag": etag})
+                else:
+                    stats.outcomes["ok"] += 1
+                    ctype = "application/json" if site == "dragonforce" else "text/html; charset=utf-8"
+                    ok = await self._send(writer, 200, body, ctype, {"ETag": etag})
+                    stats.bytes_sent += len(body)
+        stats.service_sec.append(time.monotonic() - t0)
+        return ok
+
+    async def _send(self, writer, status: int, body: bytes, ctype: str = "text/html; charset=utf-8",
+                    extra: Optional[Dict[str, str]] = None) -> bool:
+        reason = {200: "OK", 304: "Not Modified", 404: "Not Found", 503: "Service Unavailable"}[status]
+        head = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {ctype}", f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        bw = self.config.bandwidth_kbps * 1024
+        chunk = 16384 if bw else len(body) or 1
+        for i in range(0, len(body), chunk):
+            writer.write(body[i:i + chunk])
+            await writer.drain()
+            if bw:
+                await asyncio.sleep(len(body[i:i + chunk]) / bw)
+        await writer.drain()
+        return True
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {site: {"requests": s.requests, "outcomes": dict(s.outcomes), "bytes_sent": s.bytes_sent,
+                       "service_samples": len(s.service_sec)}
+                for site, s in self.stats.items()}
+
+
+class BackgroundTestbed:
+    """별도 스레드의 이벤트 루프에서 도는 대역 서버 (벤치마크용)"""
+    def __init__(self, config: TestbedConfig, port: int = 0):
+        self.testbed = Testbed(config, port=port)
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="testbed", daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self.testbed.start())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def __enter__(self) -> Testbed:
+        self._thread.start()
+        self._ready.wait()
+        return self.testbed
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.testbed.close(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+
+
+# ── 벤치마크 ──
+@dataclasses.dataclass
+class BenchResult:
+    crawler: str
+    run: int
+    rc: int
+    wall_sec: float
+    pages_ok: int            # 상태 < 400 인 fetch span 수 (챌린지 재시도 포함 최종 응답 기준)
+    pages_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    fetch_errors: int
+    rows: int
+    server_requests: int
+    server_outcomes: Dict[str, int]
+    log: str
+
+
+def _quantile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    v = sorted(values)
+    return v[min(len(v) - 1, int(len(v) * q))]
+
+
+def bench_env(port: int, crawler: str, trace_dir: Path) -> Dict[str, str]:
+    """크롤러를 대역 서버로 보내는 환경 변수 (나머지 설정은 호출한 셸의 값을 그대로 사용)"""
+    env = dict(os.environ)
+    env.update({
+        "TOR_SOCKS_PORTS": str(port),
+        "RANSOMWARE_LIVE_URL": f"http://127.0.0.1:{port}/",
+        "DARKFORUMS_TOR_CHECK_URL": f"http://{TOR_CHECK_HOST}/api/ip",
+        "TOR_CIRCUIT_MONITOR": "0",      # 대역 서버에는 control port가 없음
+        "TOR_BUDGET_CRAWLER": crawler,
+        tracing.TRACE_ENV: "jsonl",
+        tracing.TRACE_DIR_ENV: str(trace_dir),
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.setdefault("HTTP_CACHE", "0")   # 캐시 적중은 네트워크 처리량이 아니므로 기본은 끔
+    env.setdefault("DARKFORUMS_BREAKER_HARD_LIMIT", "120")
+    for key in ("TOR_BUDGET_SOCKET", "CRAWL_WARC_REPLAY", tracing.TRACE_ID_ENV, tracing.PARENT_ENV):
+        env.pop(key, None)
+    return env
+
+
+def run_crawler(testbed: Testbed, crawler: str, run: int, workdir: Path, timeout: float) -> BenchResult:
+    script, site = BENCH_CRAWLERS[crawler]
+    rundir = workdir / f"{crawler}-{run}"
+    trace_dir = rundir / "traces"
+    rundir.mkdir(parents=True)
+    env = bench_env(testbed.port, crawler, trace_dir)
+    if testbed.config.require_clearance and site == "darkforums":
+        # 사람이 브라우저로 받아 둔 것과 같은 저장본 (clearance.py 형식)
+        clearance.Clearance(DARKFORUMS_HOST, "Mozilla/5.0 (testbed)",
+                            [{"name": CLEARANCE_COOKIE[0], "value": CLEARANCE_COOKIE[1],
+                              "domain": DARKFORUMS_HOST, "path": "/"}],
+                            time.time()).save(rundir / clearance.CLEARANCE_DIR)
+        env[clearance.MODE_ENV] = "saved"
+    before = testbed.snapshot().get(site, {"requests": 0, "outcomes": {}})
+    log = rundir / "crawler.log"
+    t0 = time.monotonic()
+    with log.open("wb") as out:
+        try:
+            rc = subprocess.run([sys.executable, "-u", str(HERE / script)], cwd=rundir, stdout=out,
+                                stderr=subprocess.STDOUT, env=env,
+                                timeout=timeout).returncode
+        except subprocess.TimeoutExpired:
+            rc = -9
+    wall = time.monotonic() - t0
+    after = testbed.snapshot().get(site, {"requests": 0, "outcomes": {}})
+
+    latencies, ok, errors, rows = [], 0, 0, 0
+    if trace_dir.is_dir():
+        for sp in tracing.read_spans(trace_dir):
+            attrs = sp.get("attributes", {})
+            if sp["name"] == "fetch" and attrs.get("host") != TOR_CHECK_HOST:
+                latencies.append(sp["duration_ms"] or 0.0)
+                if sp.get("status") == "ok" and int(attrs.get("status") or 0) < 400:
+                    ok += 1
+                else:
+                    errors += 1
+            elif sp["name"] == "write":
+                rows += int(attrs.get("rows") or 0)
+    outcomes = {k: v - before["outcomes"].get(k, 0) for k, v in after["outcomes"].items()}
+    return BenchResult(crawler, run, rc, round(wall, 3), ok, round(ok / wall, 3) if wall else 0.0,
+                       round(_quantile(latencies, 0.5), 1), round(_quantile(latencies, 0.95), 1),
+                       errors, rows, after["requests"] - before["requests"],
+                       {k: v for k, v in outcomes.items() if v}, str(log))
+
+
+def print_results(results: List[BenchResult]):
+    print(f"\n{'crawler':<16} {'run':>3} {'rc':>4} {'wall(s)':>8} {'pages':>6} {'pages/s':>8} "
+          f"{'p50(ms)':>8} {'p95(ms)':>8} {'err':>5} {'rows':>6} {'srv req':>8}  injected")
+    for r in results:
+        injected = " ".join(f"{k}={v}" for k, v in sorted(r.server_outcomes.items()) if k != "ok") or "-"
+        print(f"{r.crawler:<16} {r.run:>3} {r.rc:>4} {r.wall_sec:>8.2f} {r.pages_ok:>6} {r.pages_per_sec:>8.2f} "
+              f"{r.p50_ms:>8.0f} {r.p95_ms:>8.0f} {r.fetch_errors:>5} {r.rows:>6} {r.server_requests:>8}  {injected}")
+
+
+def bench(config: TestbedConfig, crawlers: List[str], runs: int, timeout: float,
+          json_path: Optional[Path], keep: bool) -> List[BenchResult]:
+    workdir = Path(tempfile.mkdtemp(prefix="crawl-bench-"))
+    results = []
+    try:
+        with BackgroundTestbed(config) as testbed:
+            print(f"[testbed] 127.0.0.1:{testbed.port} latency={config.latency} "
+                  f"error={config.error_rate} drop={config.drop_rate} challenge={config.challenge_rate} "
+                  f"bandwidth={config.bandwidth_kbps or '-'}KB/s")
+            for run in range(1, runs + 1):
+                for crawler in crawlers:
+                    print(f"[bench] {crawler} (run {run}/{runs}) ...", flush=True)
+                    r = run_crawler(testbed, crawler, run, workdir, timeout)
+                    if r.rc != 0:
+                        print(f"[bench] {crawler}: rc={r.rc}, 로그 {r.log}")
+                        keep = True
+                    results.append(r)
+        print_results(results)
+        if json_path:
+            json_path.parent.mkdir(parents=True, exist_ok=True)
+            doc = {"generated_at": datetime.now().isoformat(timespec="seconds"),
+                   "config": {**dataclasses.asdict(config), "latency": str(config.latency)},
+                   "results": [dataclasses.asdict(r) for r in results]}
+            json_path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+            print(f"[bench] 결과 저장: {json_path}")
+    finally:
+        if keep:
+            print(f"[bench] 작업 디렉터리 유지: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _config(args) -> TestbedConfig:
+    return TestbedConfig(
+        latency=Latency.parse(args.latency), bandwidth_kbps=args.bandwidth,
+        error_rate=args.error_rate, drop_rate=args.drop_rate, challenge_rate=args.challenge_rate,
+        seed=args.seed, dragonforce_pages=args.dragonforce_pages, coinbase_victims=args.coinbase_victims,
+        ransomware_victims=args.ransomware_victims,
+        forums=tuple(f if f.startswith("Forum-") else f"Forum-{f}" for f in args.forums.split(",") if f),
+        forum_pages=args.forum_pages, threads_per_page=args.threads, replies=args.replies,
+        require_clearance=args.require_clearance)
+
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--latency", default="lognormal:0.6,0.5", help="응답 지연 분포 (기본 lognormal:0.6,0.5)")
+    common.add_argument("--bandwidth", type=float, default=0.0, help="연결당 전송 속도 KB/s (기본 제한 없음)")
+    common.add_argument("--error-rate", type=float, default=0.0, help="503 응답 비율")
+    common.add_argument("--drop-rate", type=float, default=0.0, help="응답 없이 연결을 끊는 비율")
+    common.add_argument("--challenge-rate", type=float, default=0.0, help="챌린지 페이지 비율 (DragonForce JSON 제외)")
+    common.add_argument("--require-clearance", action="store_true",
+                        help="darkforums: clearance 쿠키 없는 요청은 항상 챌린지 페이지")
+    common.add_argument("--seed", type=int, default=0)
+    common.add_argument("--dragonforce-pages", type=int, default=5)
+    common.add_argument("--coinbase-victims", type=int, default=60)
+    common.add_argument("--ransomware-victims", type=int, default=100)
+    common.add_argument("--forums", default="Announcements,Databases,Malware",
+                        help="내용을 채울 darkforums 게시판 (나머지는 404)")
+    common.add_argument("--forum-pages", type=int, default=3)
+    common.add_argument("--threads", type=int, default=20, help="게시판 페이지당 게시물 수")
+    common.add_argument("--replies", type=int, default=10, help="게시물 페이지당 답글 수")
+
+    p = argparse.ArgumentParser(description="로컬 대역 서버 / 크롤러 처리량 벤치마크")
+    sub = p.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("serve", parents=[common], help="대역 서버만 실행")
+    s.add_argument("--port", type=int, default=19050)
+    b = sub.add_parser("bench", parents=[common], help="크롤러별 처리량 측정")
+    b.add_argument("--crawlers", default=",".join(BENCH_CRAWLERS), help="쉼표로 구분 (기본 전체)")
+    b.add_argument("--runs", type=int, default=1)
+    b.add_argument("--timeout", type=float, default=900.0, help="크롤러 1회 실행 제한 시간(초)")
+    b.add_argument("--json", type=Path, default=None, help="결과 JSON 저장 경로")
+    b.add_argument("--keep", action="store_true", help="크롤러 작업 디렉터리(출력/로그/trace) 유지")
+    return p.parse_args(argv)
+
+
+async def _serve(config: TestbedConfig, port: int):
+    testbed = await Testbed(config, port=port).start()
+    print(f"[testbed] 127.0.0.1:{testbed.port} 에서 대기 (SOCKS5 + HTTP)")
+    print(f"  TOR_SOCKS_PORTS={testbed.port} RANSOMWARE_LIVE_URL=http://127.0.0.1:{testbed.port}/ "
+          f"DARKFORUMS_TOR_CHECK_URL=http://{TOR_CHECK_HOST}/api/ip TOR_CIRCUIT_MONITOR=0")
+    try:
+        await testbed.serve_forever()
+    finally:
+        print(json.dumps(testbed.snapshot(), indent=2))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        config = _config(args)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.command == "serve":
+        try:
+            asyncio.run(_serve(config, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+    crawlers = [c.strip() for c in args.crawlers.split(",") if c.strip()]
+    unknown = [c for c in crawlers if c not in BENCH_CRAWLERS]
+    if unknown:
+        sys.exit(f"알 수 없는 크롤러: {', '.join(unknown)} (가능: {', '.join(BENCH_CRAWLERS)})")
+    results = bench(config, crawlers, args.runs, args.timeout, args.json, args.keep)
+    sys.exit(1 if any(r.rc != 0 for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+# tor_budget.py
+"""
+러너(script.py)가 소유하는 Tor 요청 예산(token bucket) 서비스.
+
+각 크롤러가 로컬 tor 데몬(SOCKS 9050/9150)에 따로 연결을 열면 동시에 돌릴 때 tor가 과부하되어
+타임아웃이 늘어나므로, 모든 Tor 요청은 보내기 전에 여기서 슬롯을 받아야 합니다.
+
+- 전역 token bucket(초당 요청 수 + burst)과 호스트(.onion)별 token bucket
+- 전역/호스트별 동시 요청 수(in-flight) 상한
+- 크롤러별 사용량(요청 수, 대기 시간, 점유 시간, 최대 동시 요청) 집계
+
+백엔드
+- in-process 모드: 러너가 install()한 TorBudget 객체를 크롤러가 직접 사용
+  (크롤러 이름은 러너가 태스크 컨텍스트에 설정한 CURRENT_CRAWLER)
+- subprocess 모드: 러너가 BudgetServer(유닉스 소켓)를 띄우고 TOR_BUDGET_SOCKET / TOR_BUDGET_CRAWLER
+  환경 변수로 알려줌. 요청 하나당 연결 하나: "ACQUIRE <crawler> <host>" → "OK <대기초>", 연결 종료 = 반납
+  (크롤러가 죽어도 연결이 끊기면 슬롯이 돌아옴)
+- 둘 다 없으면(크롤러 단독 실행) 제한 없이 통과
+
+크롤러 쪽 사용법
+    with tor_budget.slot(url):          # requests 등 동기 코드
+        res = session.get(url)
+    async with tor_budget.aslot(url):   # 비동기 코드
+        ...
+    httpx.AsyncClient(transport=tor_budget.BudgetedAsyncTransport(HTTPX_TRANSPORT))
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import dataclasses
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:  # httpx를 쓰지 않는 크롤러(requests 기반)만 있는 환경
+    httpx = None
+
+SOCKET_ENV = "TOR_BUDGET_SOCKET"
+CRAWLER_ENV = "TOR_BUDGET_CRAWLER"
+SOCKET_PATH = Path("outputs/tor_budget.sock")
+
+# 현재 요청을 보내는 크롤러 이름 (in-process: 러너가 태스크별로 설정, subprocess: 환경 변수)
+CURRENT_CRAWLER: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "tor_budget_crawler", default=os.environ.get(CRAWLER_ENV, "unknown")
+)
+
+# 동시 요청 상한에 걸렸을 때 다시 확인하는 간격(초)
+_POLL_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """rate(토큰/초)로 채워지고 최대 burst개까지 쌓이는 버킷. 잠금은 호출 측(TorBudget)이 담당"""
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """토큰 1개를 쓸 수 있을 때까지 남은 시간(초, 0이면 즉시 가능)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+
+@dataclasses.dataclass
+class CrawlerUsage:
+    """크롤러 1개의 Tor 예산 사용량 (누적값)"""
+    requests: int = 0
+    wait_sec: float = 0.0     # 슬롯을 받기까지 기다린 시간 합
+    busy_sec: float = 0.0     # 슬롯을 점유한(요청이 진행 중이던) 시간 합
+    inflight: int = 0
+    peak_inflight: int = 0
+
+    def delta(self, before: "CrawlerUsage") -> "CrawlerUsage":
+        return CrawlerUsage(
+            requests=self.requests - before.requests,
+            wait_sec=self.wait_sec - before.wait_sec,
+            busy_sec=self.busy_sec - before.busy_sec,
+            inflight=self.inflight,
+            peak_inflight=self.peak_inflight,
+        )
+
+
+class TorBudget:
+    """전역/호스트별 token bucket + 동시 요청 상한. 스레드(requests)와 이벤트 루프(httpx) 양쪽에서 사용"""
+    def __init__(self,
+                 rate: float = 4.0,
+                 burst: float = 8.0,
+                 per_host_rate: float = 2.0,
+                 per_host_burst: float = 4.0,
+                 max_inflight: int = 8,
+                 per_host_inflight: int = 4):
+        self.rate = rate
+        self.burst = burst
+        self.per_host_rate = per_host_rate
+        self.per_host_burst = per_host_burst
+        self.max_inflight = max(1, max_inflight)
+        self.per_host_inflight = max(1, per_host_inflight)
+        self._lock = threading.Lock()
+        self._global = TokenBucket(rate, burst)
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._host_inflight: Dict[str, int] = {}
+        self._inflight = 0
+        self.usage: Dict[str, CrawlerUsage] = {}
+        self.started = time.monotonic()
+
+    def _try_acquire(self, host: str, crawler: str) -> Optional[float]:
+        """슬롯을 얻으면 None, 아니면 다시 시도할 때까지 기다릴 시간(초)"""
+        with self._lock:
+            if self._inflight >= self.max_inflight or \
+                    self._host_inflight.get(host, 0) >= self.per_host_inflight:
+                return _POLL_INTERVAL
+            now = time.monotonic()
+            bucket = self._hosts.get(host)
+            if bucket is None:
+                bucket = self._hosts[host] = TokenBucket(self.per_host_rate, self.per_host_burst)
+            wait = max(self._global.wait_time(now), bucket.wait_time(now))
+            if wait > 0:
+                return wait
+            self._global.take()
+            bucket.take()
+            self._inflight += 1
+            self._host_inflight[host] = self._host_inflight.get(host, 0) + 1
+            u = self.usage.setdefault(crawler, CrawlerUsage())
+            u.requests += 1
+            u.inflight += 1
+            u.peak_inflight = max(u.peak_inflight, u.inflight)
+            return None
+
+    def _record_wait(self, crawler: str, waited: float):
+        with self._lock:
+            self.usage.setdefault(crawler, CrawlerUsage()).wait_sec += waited
+
+    def acquire(self, host: str, crawler: str) -> float:
+        """슬롯을 받을 때까지 현재 스레드를 블록하고, 기다린 시간을 반환합니다."""
+        t0 = time.monotonic()
+        while (wait := self._try_acquire(host, crawler)) is not None:
+            time.sleep(wait)
+        waited = time.monotonic() - t0
+        self._record_wait(crawler, waited)
+        return waited
+
+    async def acquire_async(self, host: str, crawler: str) -> float:
+        t0 = time.monotonic()
+        while (wait := self._try_acquire(host, crawler)) is not None:
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - t0
+        self._record_wait(crawler, waited)
+        return waited
+
+    def release(self, host: str, crawler: str, busy: float):
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            self._host_inflight[host] = max(0, self._host_inflight.get(host, 0) - 1)
+            u = self.usage.setdefault(crawler, CrawlerUsage())
+            u.inflight = max(0, u.inflight - 1)
+            u.busy_sec += busy
+
+    def snapshot(self, crawler: str) -> CrawlerUsage:
+        with self._lock:
+            return dataclasses.replace(self.usage.get(crawler, CrawlerUsage()))
+
+    def report(self) -> dict:
+        """전체 대비 크롤러별 사용 비율. slot_utilization = 점유 시간 / (경과 시간 × max_inflight)"""
+        with self._lock:
+            elapsed = max(1e-9, time.monotonic() - self.started)
+            total = sum(u.requests for u in self.usage.values()) or 1
+            crawlers = {
+                name: {
+                    "requests": u.requests,
+                    "request_share": u.requests / total,
+                    "wait_sec": round(u.wait_sec, 3),
+                    "avg_wait_sec": round(u.wait_sec / u.requests, 3) if u.requests else 0.0,
+                    "busy_sec": round(u.busy_sec, 3),
+                    "slot_utilization": round(u.busy_sec / (elapsed * self.max_inflight), 4),
+                    "peak_inflight": u.peak_inflight,
+                }
+                for name, u in self.usage.items()
+            }
+            return {
+                "limits": {
+                    "rate": self.rate, "burst": self.burst,
+                    "per_host_rate": self.per_host_rate, "per_host_burst": self.per_host_burst,
+                    "max_inflight": self.max_inflight, "per_host_inflight": self.per_host_inflight,
+                },
+                "elapsed_sec": round(elapsed, 1),
+                "hosts": len(self._hosts),
+                "crawlers": crawlers,
+            }
+
+
+# ── subprocess 모드용 유닉스 소켓 서버/클라이언트 ──
+class BudgetServer:
+    """TorBudget을 유닉스 소켓으로 노출합니다. 연결 1개 = 요청 1개, 연결이 끊기면 슬롯 반납"""
+    def __init__(self, budget: TorBudget, path: Path = SOCKET_PATH):
+        self.budget = budget
+        self.path = Path(path)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "BudgetServer":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            self.path.unlink()
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.path))
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        with contextlib.suppress(FileNotFoundError):
+            self.path.unlink()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        acquired = None
+        try:
+            parts = (await reader.readline()).decode("utf-8", "replace").split()
+            if len(parts) != 3 or parts[0] != "ACQUIRE":
+                writer.write(b"ERR bad request\n")
+                return
+            _, crawler, host = parts
+            waited = await self.budget.acquire_async(host, crawler)
+            acquired = (host, crawler, time.monotonic())
+            writer.write(f"OK {waited:.3f}\n".encode())
+            await writer.drain()
+            await reader.read()  # 클라이언트가 요청을 마치고 연결을 닫을 때까지 점유
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if acquired:
+                host, crawler, t0 = acquired
+                self.budget.release(host, crawler, time.monotonic() - t0)
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+
+class _SocketLease:
+    """BudgetServer에서 받은 슬롯 1개 (close하면 반납)"""
+    def __init__(self, path: str, host: str, crawler: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.sock.sendall(f"ACQUIRE {crawler} {host}\n".encode())
+        reply = self.sock.makefile("rb").readline().decode().split()
+        if not reply or reply[0] != "OK":
+            self.sock.close()
+            raise ConnectionError(f"tor budget server: {' '.join(reply) or 'no reply'}")
+
+    def close(self):
+        self.sock.close()
+
+
+# ── 크롤러 쪽 API ──
+_installed: Optional[TorBudget] = None
+_server_warned = False
+
+
+def install(budget: Optional[TorBudget]):
+    """in-process 모드에서 러너가 공유 예산을 등록합니다 (None이면 해제)."""
+    global _installed
+    _installed = budget
+
+
+def _host(url) -> str:
+    host = urlsplit(str(url)).hostname
+    return host or "unknown"
+
+
+def _server_unavailable(e: Exception):
+    global _server_warned
+    if not _server_warned:
+        _server_warned = True
+        print(f"[tor_budget] 예산 서버에 연결할 수 없어 제한 없이 진행합니다: {e}")
+
+
+@contextlib.contextmanager
+def slot(url):
+    """동기 코드용: 요청 하나를 보내는 동안 Tor 예산 슬롯을 점유합니다."""
+    host, crawler = _host(url), CURRENT_CRAWLER.get()
+    if _installed is not None:
+        _installed.acquire(host, crawler)
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            _installed.release(host, crawler, time.monotonic() - t0)
+        return
+
+    path = os.environ.get(SOCKET_ENV)
+    lease = None
+    if path:
+        try:
+            lease = _SocketLease(path, host, crawler)
+        except OSError as e:
+            _server_unavailable(e)
+    try:
+        yield
+    finally:
+        if lease:
+            lease.close()
+
+
+@contextlib.asynccontextmanager
+async def aslot(url):
+    """비동기 코드용 slot()"""
+    host, crawler = _host(url), CURRENT_CRAWLER.get()
+    if _installed is not None:
+        await _installed.acquire_async(host, crawler)
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            _installed.release(host, crawler, time.monotonic() - t0)
+        return
+
+    path = os.environ.get(SOCKET_ENV)
+    lease = None
+    if path:
+        try:
+            # 대기는 서버 쪽에서 일어나므로 이벤트 루프를 막지 않도록 스레드에서 연결
+            lease = await asyncio.to_thread(_SocketLease, path, host, crawler)
+        except OSError as e:
+            _server_unavailable(e)
+    try:
+        yield
+    finally:
+        if lease:
+            lease.close()
+
+
+if httpx is not None:
+    class _ReleasingStream(httpx.AsyncByteStream):
+        """응답 본문을 다 읽고 닫을 때 슬롯을 반납하도록 감싼 스트림"""
+        def __init__(self, stream, cm):
+            self._stream = stream
+            self._cm = cm
+
+        async def __aiter__(self):
+            async for chunk in self._stream:
+                yield chunk
+
+        async def aclose(self):
+            try:
+                await self._stream.aclose()
+            finally:
+                cm, self._cm = self._cm, None
+                if cm is not None:
+                    await cm.__aexit__(None, None, None)
+
+    class BudgetedAsyncTransport(httpx.AsyncBaseTransport):
+        """httpx 전송 계층 래퍼: 요청 전송부터 응답 본문을 닫을 때까지 Tor 예산 슬롯을 점유"""
+        def __init__(self, inner: "httpx.AsyncBaseTransport"):
+            self._inner = inner
+
+        async def handle_async_request(self, request):
+            cm = aslot(request.url)
+            await cm.__aenter__()
+            try:
+                response = await self._inner.handle_async_request(request)
+            except BaseException as e:
+                await cm.__aexit__(type(e), e, e.__traceback__)
+                raise
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_ReleasingStream(response.stream, cm),
+                extensions=response.extensions,
+            )
+
+        async def aclose(self):
+            await self._inner.aclose()
@@ -0,0 +1,293 @@
+# tor_circuits.py
+"""
+Tor 회로 풀: 요청을 서로 격리된 여러 회로에 나눠 보내고, 관측된 지연으로 부하를 분산합니다.
+
+모든 요청이 socks5h://127.0.0.1:9050 하나로 나가면 tor가 같은 몇 개 회로를 공유하므로
+처리량이 가장 느린 릴레이에 묶입니다. tor의 SocksPort는 기본적으로 IsolateSOCKSAuth가 켜져 있어
+SOCKS 사용자명/비밀번호가 다르면 다른 회로를 쓰므로, 회로마다 고유한 인증 정보를 붙입니다.
+torrc에 SocksPort를 여러 개 열어 두었다면 TOR_SOCKS_PORTS=9050,9052 로 포트도 나눠 씁니다.
+
+- 회로 선택: 아직 관측이 없는 회로 우선, 그다음 지연 EWMA × (진행 중 요청 + 1) 이 가장 작은 회로
+- 연속 실패 ROTATE_AFTER회면 인증 정보 세대를 올려 tor가 새 회로를 만들게 함
+  (최근 지연/오류율 기반 교체와 control port 정리는 tor_control.py의 CircuitMonitor가 담당)
+- 환경 변수 TOR_CIRCUITS=<개수> (기본 4, 0 또는 1이면 격리 없이 단일 프록시), 러너는 --tor-circuits
+
+사용법
+    httpx (fetch.py가 자동 사용): PooledAsyncTransport(pool, verify=..., limits=...)
+    requests 등 동기 코드:
+        with pool.lease() as circuit:
+            requests.get(url, proxies=circuit.requests_proxies())
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import os
+import platform
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # requests 전용 환경에서도 lease()는 사용 가능
+    httpx = None
+
+CIRCUITS_ENV = "TOR_CIRCUITS"
+PORTS_ENV = "TOR_SOCKS_PORTS"
+DEFAULT_CIRCUITS = 4
+DEFAULT_PORT = "9150" if platform.system() == "Windows" else "9050"
+
+EWMA_ALPHA = 0.3     # 지연 EWMA 가중치
+ROTATE_AFTER = 3     # 연속 실패 시 회로 교체 기준
+FAILURE_PENALTY = 2  # 실패 1회당 점수 배율 (연속 실패가 이어질수록 덜 선택됨)
+ROTATE_COOLDOWN = 60  # 같은 회로를 다시 교체하기까지 최소 간격(초)
+WINDOW = 20          # 회로별로 기억하는 최근 요청 수 (CircuitMonitor 판정용)
+
+# httpx 요청 extensions 키: 고른 회로를 알려받을 dict / 피할 회로 번호 (fetch.py hedging)
+# 응답 extensions[CIRCUIT_EXT]에는 실제로 탄 회로 번호 (tracing.py fetch span)
+CIRCUIT_EXT = "tor_circuit"
+AVOID_EXT = "tor_circuit_avoid"
+
+
+@dataclasses.dataclass
+class Circuit:
+    """격리된 회로 하나 (SOCKS 인증 정보 + 포트)"""
+    index: int
+    port: str
+    isolate: bool = True
+    generation: int = 0      # 교체될 때마다 증가 → 새 인증 정보 → 새 회로
+    ewma: Optional[float] = None
+    inflight: int = 0
+    requests: int = 0
+    failures: int = 0        # 연속 실패
+    total_failures: int = 0
+    renewals: int = 0
+    renewed_at: float = 0.0  # 마지막 교체 시각 (monotonic)
+    recent: Deque[Tuple[float, bool]] = dataclasses.field(default_factory=lambda: deque(maxlen=WINDOW))
+
+    @property
+    def username(self) -> str:
+        return f"crawl-{os.getpid()}-{self.index}-{self.generation}"
+
+    @property
+    def proxy(self) -> str:
+        if not self.isolate:
+            return f"socks5h://127.0.0.1:{self.port}"
+        return f"socks5h://{self.username}:x@127.0.0.1:{self.port}"
+
+    def requests_proxies(self) -> Dict[str, str]:
+        return {"http": self.proxy, "https": self.proxy}
+
+    def score(self) -> float:
+        if self.ewma is None:
+            return -1.0 + self.inflight * 1e-3  # 미관측 회로 먼저 (그중 덜 바쁜 것)
+        return self.ewma * (self.inflight + 1) * FAILURE_PENALTY ** self.failures
+
+
+class CircuitPool:
+    """프로세스 안에서 공유하는 회로 목록 (스레드 안전). in-process 모드에서는 크롤러들이 함께 사용"""
+    def __init__(self, size: int = DEFAULT_CIRCUITS, ports: Optional[List[str]] = None):
+        ports = ports or [DEFAULT_PORT]
+        isolate = size > 1 or len(ports) > 1
+        size = max(size, len(ports), 1)
+        self.circuits = [Circuit(i, ports[i % len(ports)], isolate) for i in range(size)]
+        self.retired: List[str] = []  # 교체되어 control port로 닫을 회로의 SOCKS 사용자명
+        self._lock = threading.Lock()
+
+    def acquire(self, avoid: Optional[int] = None) -> Circuit:
+        with self._lock:
+            candidates = [c for c in self.circuits if c.index != avoid] or self.circuits
+            c = min(candidates, key=Circuit.score)
+            c.inflight += 1
+            c.requests += 1
+            return c
+
+    def release(self, c: Circuit, latency: float, ok: bool = True):
+        with self._lock:
+            c.inflight = max(0, c.inflight - 1)
+            c.recent.append((latency, ok))
+            if ok:
+                c.failures = 0
+                c.ewma = latency if c.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * c.ewma
+                return
+            c.failures += 1
+            c.total_failures += 1
+            if c.failures >= ROTATE_AFTER:
+                self._rotate_locked(c)
+
+    def rotate(self, c: Circuit, force: bool = False) -> bool:
+        """회로를 새 인증 정보로 교체합니다. 쿨다운 중이면(force가 아니면) 건너뛰고 False"""
+        with self._lock:
+            return self._rotate_locked(c, force)
+
+    def _rotate_locked(self, c: Circuit, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not c.isolate or (not force and c.renewed_at and now - c.renewed_at < ROTATE_COOLDOWN):
+            return False
+        self.retired.append(c.username)
+        c.generation += 1
+        c.renewals += 1
+        c.renewed_at = now
+        c.failures = 0
+        c.ewma = None
+        c.recent.clear()
+        return True
+
+    def take_retired(self) -> List[str]:
+        with self._lock:
+            retired, self.retired = self.retired, []
+            return retired
+
+    def cancel(self, c: Circuit):
+        """결과를 보기 전에 취소된 요청: 지연/실패로 기록하지 않고 진행 중 수만 되돌림"""
+        with self._lock:
+            c.inflight = max(0, c.inflight - 1)
+
+    @contextlib.contextmanager
+    def lease(self):
+        """동기 코드용: 회로를 하나 빌려 쓰고, 블록 실행 시간을 지연으로 기록 (예외면 실패)"""
+        c = self.acquire()
+        t0 = time.monotonic()
+        ok = False
+        try:
+            yield c
+            ok = True
+        finally:
+            self.release(c, time.monotonic() - t0, ok)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [{
+                "circuit": c.index,
+                "port": c.port,
+                "generation": c.generation,
+                "latency_ms": round(c.ewma * 1000, 1) if c.ewma is not None else None,
+                "inflight": c.inflight,
+                "requests": c.requests,
+                "failures": c.total_failures,
+                "renewals": c.renewals,
+            } for c in self.circuits]
+
+
+_default: Optional[CircuitPool] = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> CircuitPool:
+    """환경 변수(TOR_CIRCUITS, TOR_SOCKS_PORTS)로 설정한 프로세스 공용 풀"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            try:
+                size = int(os.environ.get(CIRCUITS_ENV, DEFAULT_CIRCUITS))
+            except ValueError:
+                size = DEFAULT_CIRCUITS
+            ports = [p.strip() for p in os.environ.get(PORTS_ENV, "").split(",") if p.strip()]
+            _default = CircuitPool(size, ports or None)
+            import tor_control  # 순환 import 방지 (tor_control이 이 모듈을 사용)
+            tor_control.start_monitor(_default)
+        return _default
+
+
+if httpx is not None:
+    class _CircuitStream(httpx.AsyncByteStream):
+        """응답 본문을 닫을 때 회로의 진행 중 요청 수를 돌려놓고 전송 계층에 요청 종료를 알리는 스트림"""
+        def __init__(self, stream, pool: CircuitPool, circuit: Circuit, latency: float, ok: bool,
+                     on_close: Optional[Callable[[], Awaitable[None]]] = None):
+            self._stream = stream
+            self._done = (pool, circuit, latency, ok, on_close)
+
+        async def __aiter__(self):
+            async for chunk in self._stream:
+                yield chunk
+
+        async def aclose(self):
+            try:
+                await self._stream.aclose()
+            finally:
+                done, self._done = self._done, None
+                if done is not None:
+                    pool, circuit, latency, ok, on_close = done
+                    pool.release(circuit, latency, ok)
+                    if on_close is not None:
+                        await on_close()
+
+    @dataclasses.dataclass
+    class _TransportSlot:
+        """회로 한 세대의 연결 풀과 그 풀에서 진행 중인 요청 수"""
+        generation: int
+        transport: "httpx.AsyncHTTPTransport"
+        inflight: int = 0
+        retired: bool = False
+
+    class PooledAsyncTransport(httpx.AsyncBaseTransport):
+        """회로마다 별도 연결 풀(AsyncHTTPTransport)을 두고 요청마다 회로를 골라 보내는 전송 계층"""
+        def __init__(self, pool: CircuitPool, **transport_kwargs):
+            self.pool = pool
+            self._kwargs = transport_kwargs
+            # 회로 번호 → 현재 세대의 연결 풀. 회로가 교체되면 이전 풀은 _retired로 옮겨
+            # 진행 중인 요청이 모두 끝난 뒤에 닫음 (바로 닫으면 진행 중 요청이 전송 오류로 끊김)
+            self._slots: Dict[int, _TransportSlot] = {}
+            self._retired: List[_TransportSlot] = []
+
+        def _new_transport(self, proxy: str) -> "httpx.AsyncHTTPTransport":
+            return httpx.AsyncHTTPTransport(proxy=proxy, **self._kwargs)
+
+        async def _slot_for(self, c: Circuit) -> _TransportSlot:
+            generation, proxy = c.generation, c.proxy
+            slot = self._slots.get(c.index)
+            if slot is not None and slot.generation == generation:
+                return slot
+            self._slots[c.index] = fresh = _TransportSlot(generation, self._new_transport(proxy))
+            if slot is not None:
+                slot.retired = True
+                if slot.inflight:
+                    self._retired.append(slot)
+                else:
+                    await slot.transport.aclose()
+            return fresh
+
+        async def _finish(self, slot: _TransportSlot):
+            slot.inflight -= 1
+            if slot.retired and slot.inflight == 0 and slot in self._retired:
+                self._retired.remove(slot)
+                await slot.transport.aclose()
+
+        async def handle_async_request(self, request):
+            c = self.pool.acquire(avoid=request.extensions.get(AVOID_EXT))
+            chosen = request.extensions.get(CIRCUIT_EXT)
+            if chosen is not None:
+                chosen["index"] = c.index
+            t0 = time.monotonic()
+            slot = None
+            try:
+                slot = await self._slot_for(c)
+                slot.inflight += 1
+                response = await slot.transport.handle_async_request(request)
+            except asyncio.CancelledError:
+                self.pool.cancel(c)
+                if slot is not None:
+                    await self._finish(slot)
+                raise
+            except BaseException:
+                self.pool.release(c, time.monotonic() - t0, ok=False)
+                if slot is not None:
+                    await self._finish(slot)
+                raise
+            # 지연은 응답 헤더까지, 진행 중 요청은 본문을 닫을 때까지로 계산
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_CircuitStream(response.stream, self.pool, c, time.monotonic() - t0,
+                                      ok=response.status_code < 500, on_close=lambda: self._finish(slot)),
+                extensions={**response.extensions, CIRCUIT_EXT: c.index},
+            )
+
+        async def aclose(self):
+            slots, self._slots = list(self._slots.values()), {}
+            slots += self._retired
+            self._retired = []
+            for slot in slots:
+                await slot.transport.aclose()
@@ -0,0 +1,464 @@
+# tor_control.py
+"""
+Tor control port 클라이언트와 회로 상태 감시(CircuitMonitor).
+
+긴 darkforums 실행 중 나쁜 회로 하나가 모든 요청을 30초 timeout까지 끌고 가다가
+CriticalCrawlStop으로 끝나는 일을 막기 위해, 회로 풀(tor_circuits.py)의 회로별 최근 지연/오류율을 주기적으로 보고
+- 한 회로가 나빠지면: 새 SOCKS 인증 정보로 교체(→ 새 회로)하고, control port로 예전 회로를 CLOSECIRCUIT
+- 절반 이상이 동시에 나빠지면: SIGNAL NEWNYM (tor 전체 회로 갱신) 후 모든 회로 교체
+회로별 쿨다운(tor_circuits.ROTATE_COOLDOWN)과 NEWNYM 쿨다운으로 계속 갈아엎지 않도록 합니다.
+control port에 연결할 수 없으면 인증 정보 교체만 하고, CONTROL_RETRY초 뒤에 다시 연결을 시도합니다.
+
+환경 변수
+- TOR_CONTROL_PORT (기본 9051, Windows Tor Browser는 9151), TOR_CONTROL_PASSWORD (HashedControlPassword 사용 시)
+  비밀번호가 없으면 PROTOCOLINFO로 쿠키 파일(CookieAuthentication) 또는 무인증을 사용
+- TOR_CIRCUIT_MONITOR=0 이면 감시 끔 (러너는 --no-circuit-monitor)
+
+`python3 tor_control.py --selftest` 는 로컬 대역 control 서버(StandInControlServer)를 띄워
+느린 회로/오류 회로/전체 장애 시나리오에서 교체·CLOSECIRCUIT·NEWNYM·쿨다운 동작과,
+회로 교체가 진행 중인 요청을 끊지 않는지(로컬 HTTP 서버)를 확인합니다.
+`python3 tor_control.py` 는 실제 control port의 회로 목록을 보여줍니다.
+"""
+
+import logging
+import os
+import platform
+import re
+import socket
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import tor_circuits
+
+CONTROL_PORT_ENV = "TOR_CONTROL_PORT"
+CONTROL_PASSWORD_ENV = "TOR_CONTROL_PASSWORD"
+MONITOR_ENV = "TOR_CIRCUIT_MONITOR"
+DEFAULT_CONTROL_PORT = 9151 if platform.system() == "Windows" else 9051
+
+CHECK_INTERVAL = 5.0          # 감시 주기(초)
+MIN_SAMPLES = 4               # 판정에 필요한 최근 요청 수
+LATENCY_THRESHOLD = 15.0      # 최근 요청 지연 중앙값이 이보다 크면 나쁜 회로(초, darkforums timeout 30초의 절반)
+ERROR_RATE_THRESHOLD = 0.5    # 최근 요청 오류율이 이 이상이면 나쁜 회로
+NEWNYM_FRACTION = 0.5         # 이 비율 이상의 회로가 동시에 나쁘면 NEWNYM
+NEWNYM_COOLDOWN = 300.0       # NEWNYM 최소 간격(초, tor 자체 제한은 10초)
+CONTROL_RETRY = 300.0         # control port 연결 실패 후 재시도 간격(초)
+
+log = logging.getLogger("tor_control")
+
+
+class ControlError(Exception):
+    pass
+
+
+class TorController:
+    """Tor control protocol 최소 구현. 명령마다 연결 → 인증 → 명령 → QUIT"""
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None,
+                 password: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.port = int(port or os.environ.get(CONTROL_PORT_ENV, DEFAULT_CONTROL_PORT))
+        self.password = password if password is not None else os.environ.get(CONTROL_PASSWORD_ENV)
+        self.timeout = timeout
+
+    def _command(self, f, line: str) -> List[str]:
+        f.write((line + "\r\n").encode())
+        f.flush()
+        lines = []
+        while True:
+            raw = f.readline()
+            if not raw:
+                raise ControlError("control 연결이 끊김")
+            text = raw.decode(errors="replace").rstrip("\r\n")
+            if len(text) >= 4 and text[3] == "+":  # 데이터 블록: "." 줄까지
+                lines.append(text[4:])
+                while True:
+                    data = f.readline().decode(errors="replace").rstrip("\r\n")
+                    if data == ".":
+                        break
+                    lines.append(data)
+                continue
+            lines.append(text[4:])
+            if len(text) >= 4 and text[3] == " ":
+                if not text.startswith("250"):
+                    raise ControlError(f"{line.split()[0]} 실패: {text}")
+                return lines
+
+    def _authenticate(self, f):
+        if self.password is not None:
+            escaped = self.password.replace("\\", "\\\\").replace('"', '\\"')
+            self._command(f, f'AUTHENTICATE "{escaped}"')
+            return
+        info = " ".join(self._command(f, "PROTOCOLINFO 1"))
+        methods = re.search(r"METHODS=(\S+)", info)
+        methods = methods.group(1).split(",") if methods else []
+        cookie = re.search(r'COOKIEFILE="((?:[^"\\]|\\.)*)"', info)
+        if "COOKIE" in methods and cookie:
+            with open(cookie.group(1).replace('\\"', '"').replace("\\\\", "\\"), "rb") as cf:
+                self._command(f, "AUTHENTICATE " + cf.read().hex())
+        elif "NULL" in methods:
+            self._command(f, "AUTHENTICATE")
+        else:
+            raise ControlError(f"지원하지 않는 인증 방식: {methods} ({CONTROL_PASSWORD_ENV} 설정 필요)")
+
+    def run(self, *commands: str) -> List[List[str]]:
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+            f = sock.makefile("rwb")
+            self._authenticate(f)
+            replies = [self._command(f, c) for c in commands]
+            try:
+                self._command(f, "QUIT")
+            except ControlError:
+                pass
+            return replies
+
+    def circuits(self) -> List[Tuple[str, str, Optional[str]]]:
+        """(회로 ID, 상태, SOCKS_USERNAME) 목록"""
+        out = []
+        for line in self.run("GETINFO circuit-status")[0]:
+            parts = line.split()
+            if not parts or not parts[0].isdigit():
+                continue
+            user = re.search(r'SOCKS_USERNAME="((?:[^"\\]|\\.)*)"', line)
+            out.append((parts[0], parts[1], user.group(1) if user else None))
+        return out
+
+    def close_circuits_for(self, usernames: List[str]) -> List[str]:
+        """해당 SOCKS 사용자명으로 만들어진 회로를 닫고 닫은 회로 ID를 반환"""
+        wanted = set(usernames)
+        ids = [cid for cid, _, user in self.circuits() if user in wanted]
+        if ids:
+            self.run(*(f"CLOSECIRCUIT {cid}" for cid in ids))
+        return ids
+
+    def newnym(self):
+        self.run("SIGNAL NEWNYM")
+
+
+class CircuitMonitor:
+    """회로 풀을 주기적으로 점검해 나빠진 회로를 교체하는 데몬 스레드"""
+    def __init__(self, pool: "tor_circuits.CircuitPool", controller: Optional[TorController] = None,
+                 interval: float = CHECK_INTERVAL):
+        self.pool = pool
+        self.controller = controller or TorController()
+        self.interval = interval
+        self.events: List[str] = []       # 최근 조치 기록 (요약/확인용)
+        self.newnym_at: Optional[float] = None
+        self._control_down_until = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="tor-circuit-monitor", daemon=True)
+
+    def start(self) -> "CircuitMonitor":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # 감시 실패가 크롤링을 멈추게 하지 않음
+                log.warning(f"회로 점검 실패: {e}")
+
+    def _note(self, msg: str):
+        log.info(msg)
+        self.events.append(f"{time.strftime('%H:%M:%S')} {msg}")
+        del self.events[:-50]
+
+    @staticmethod
+    def degraded(c: "tor_circuits.Circuit") -> Optional[str]:
+        recent = list(c.recent)
+        if len(recent) < MIN_SAMPLES:
+            return None
+        error_rate = sum(1 for _, ok in recent if not ok) / len(recent)
+        if error_rate >= ERROR_RATE_THRESHOLD:
+            return f"오류율 {error_rate:.0%}"
+        median = statistics.median(lat for lat, _ in recent)
+        if median >= LATENCY_THRESHOLD:
+            return f"지연 중앙값 {median:.1f}s"
+        return None
+
+    def check(self):
+        bad = [(c, reason) for c in self.pool.circuits if (reason := self.degraded(c))]
+        now = time.monotonic()
+        if bad and len(bad) >= max(2, len(self.pool.circuits) * NEWNYM_FRACTION) \
+                and (self.newnym_at is None or now - self.newnym_at >= NEWNYM_COOLDOWN):
+            ok, _ = self._control("SIGNAL NEWNYM", self.controller.newnym)
+            if ok:
+                self.newnym_at = now
+                self._note(f"회로 {len(bad)}/{len(self.pool.circuits)}개 저하 → NEWNYM")
+                for c in self.pool.circuits:
+                    self.pool.rotate(c, force=True)
+        else:
+            for c, reason in bad:
+                old = c.username
+                if self.pool.rotate(c):
+                    self._note(f"회로 #{c.index} 교체 ({reason}, {old} → 세대 {c.generation})")
+        retired = self.pool.take_retired()
+        if retired:
+            _, closed = self._control("CLOSECIRCUIT", self.controller.close_circuits_for, retired)
+            if closed:
+                self._note(f"예전 회로 {len(closed)}개 CLOSECIRCUIT ({', '.join(closed)})")
+
+    def _control(self, what: str, func, *args):
+        """control port 호출 → (성공 여부, 결과). 연결할 수 없으면 CONTROL_RETRY초 동안 시도하지 않음"""
+        if time.monotonic() < self._control_down_until:
+            return False, None
+        try:
+            return True, func(*args)
+        except (OSError, ControlError) as e:
+            self._control_down_until = time.monotonic() + CONTROL_RETRY
+            log.warning(f"Tor control port({self.controller.host}:{self.controller.port}) {what} 실패: {e}")
+            return False, None
+
+
+_monitor: Optional[CircuitMonitor] = None
+
+
+def start_monitor(pool: "tor_circuits.CircuitPool") -> Optional[CircuitMonitor]:
+    """프로세스 공용 회로 풀에 감시 스레드를 붙입니다 (격리 회로가 없거나 꺼져 있으면 None)."""
+    global _monitor
+    if os.environ.get(MONITOR_ENV, "1").strip().lower() in {"0", "false", "no"}:
+        return None
+    if not any(c.isolate for c in pool.circuits):
+        return None
+    _monitor = CircuitMonitor(pool).start()
+    return _monitor
+
+
+def monitor() -> Optional[CircuitMonitor]:
+    return _monitor
+
+
+# --- 로컬 대역 control 서버 (--selftest 용) ---
+
+class StandInControlServer(socketserver.ThreadingTCPServer):
+    """
+    Tor control protocol 일부(PROTOCOLINFO, AUTHENTICATE, GETINFO circuit-status,
+    CLOSECIRCUIT, SIGNAL NEWNYM, QUIT)만 흉내 내는 로컬 서버. 받은 명령은 commands에 남음.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password: str = "selftest"):
+        self.password = password
+        self.commands: List[str] = []
+        self.circuits: dict = {}  # 회로 ID → SOCKS_USERNAME
+        self._next_id = 1
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def add_circuit(self, username: str) -> str:
+        with self._lock:
+            cid = str(self._next_id)
+            self._next_id += 1
+            self.circuits[cid] = username
+            return cid
+
+    def start(self) -> "StandInControlServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    def _reply(self, text: str):
+        self.wfile.write(text.encode())
+
+    def handle(self):
+        srv: StandInControlServer = self.server
+        authed = False
+        for raw in self.rfile:
+            line = raw.decode().strip()
+            cmd = line.split(" ", 1)[0].upper()
+            with srv._lock:
+                srv.commands.append(line)
+            if cmd == "PROTOCOLINFO":
+                self._reply('250-PROTOCOLINFO 1\r\n250-AUTH METHODS=HASHEDPASSWORD\r\n'
+                            '250-VERSION Tor="0.4.8.0-standin"\r\n250 OK\r\n')
+            elif cmd == "AUTHENTICATE":
+                authed = line == f'AUTHENTICATE "{srv.password}"'
+                self._reply("250 OK\r\n" if authed else "515 Authentication failed\r\n")
+            elif not authed:
+                self._reply("514 Authentication required.\r\n")
+            elif line == "GETINFO circuit-status":
+                with srv._lock:
+                    body = "".join(f'{cid} BUILT $AAAA~relay1,$BBBB~relay2 PURPOSE=GENERAL '
+                                   f'SOCKS_USERNAME="{user}" SOCKS_PASSWORD="x"\r\n'
+                                   for cid, user in srv.circuits.items())
+                self._reply(f"250+circuit-status=\r\n{body}.\r\n250 OK\r\n")
+            elif cmd == "CLOSECIRCUIT":
+                cid = line.split()[1]
+                with srv._lock:
+                    found = srv.circuits.pop(cid, None)
+                self._reply("250 OK\r\n" if found else f"552 Unknown circuit \"{cid}\"\r\n")
+            elif line == "SIGNAL NEWNYM":
+                self._reply("250 OK\r\n")
+            elif cmd == "QUIT":
+                self._reply("250 closing connection\r\n")
+                return
+            else:
+                self._reply(f'510 Unrecognized command "{cmd}"\r\n')
+
+
+_SLOW_BODY = b"0123456789" * 10
+
+
+async def _inflight_rotation_check() -> Tuple[bytes, int, int, int]:
+    """로컬 HTTP 서버에서 본문을 천천히 받는 도중 회로를 교체하고, 그 요청이 끝까지 받아지는지 확인"""
+    import http.server
+    import httpx
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = _SLOW_BODY if self.path == "/slow" else b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.path == "/slow":  # 본문을 나눠 보내 교체 시점에 요청이 진행 중이도록
+                for i in range(0, len(body), 25):
+                    self.wfile.write(body[i:i + 25])
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            else:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    class DirectTransport(tor_circuits.PooledAsyncTransport):
+        def _new_transport(self, proxy):  # SOCKS 대신 로컬 서버로 직접 연결 (세대별 풀 관리만 확인)
+            return httpx.AsyncHTTPTransport()
+
+    pool = tor_circuits.CircuitPool(2)
+    transport = DirectTransport(pool)
+    c0 = pool.circuits[0]
+    only_c0 = {tor_circuits.AVOID_EXT: 1}
+    try:
+        async with httpx.AsyncClient(transport=transport, timeout=10) as client:
+            async with client.stream("GET", base + "/slow", extensions=only_c0) as r:
+                chunks = r.aiter_raw()
+                first = await chunks.__anext__()
+                pool.rotate(c0, force=True)
+                fast = await client.get(base + "/fast", extensions=only_c0)
+                body = first + b"".join([chunk async for chunk in chunks])
+            retired_left = len(transport._retired)
+    finally:
+        httpd.shutdown()
+    return body, fast.status_code, c0.total_failures, retired_left
+
+
+def selftest() -> int:
+    """대역 서버로 교체/CLOSECIRCUIT/쿨다운/NEWNYM 시나리오를 확인합니다. 실패 시 1 반환"""
+    srv = StandInControlServer().start()
+    ctl = TorController(port=srv.port, password=srv.password)
+    pool = tor_circuits.CircuitPool(4)
+    mon = CircuitMonitor(pool, ctl)
+    failures = []
+
+    def expect(cond: bool, what: str):
+        print(f"  [{'OK' if cond else 'FAIL'}] {what}")
+        if not cond:
+            failures.append(what)
+
+    def feed(c, latency, ok, n=tor_circuits.WINDOW):  # 최근 창 전체를 채움
+        for _ in range(n):
+            c.inflight += 1
+            pool.release(c, latency, ok)
+
+    def register_all():
+        for c in pool.circuits:
+            srv.add_circuit(c.username)
+
+    print("1) 느린 회로 하나 → 그 회로만 교체 + 예전 회로 CLOSECIRCUIT")
+    register_all()
+    slow = pool.circuits[1]
+    old_user = slow.username
+    for c in pool.circuits:
+        feed(c, LATENCY_THRESHOLD + 5 if c is slow else 0.5, True)
+    mon.check()
+    expect(slow.generation == 1 and slow.username != old_user, "회로 #1 새 인증 정보로 교체")
+    expect(all(c.generation == 0 for c in pool.circuits if c is not slow), "나머지 회로는 유지")
+    expect(old_user not in srv.circuits.values(), "예전 회로가 control port에서 닫힘")
+    expect(not any(c.startswith("SIGNAL") for c in srv.commands), "NEWNYM 없음")
+
+    print("2) 교체 직후 다시 나빠져도 쿨다운 동안은 교체하지 않음")
+    feed(slow, 0, False)
+    mon.check()
+    expect(slow.generation == 1, f"쿨다운({tor_circuits.ROTATE_COOLDOWN}s) 중 재교체 안 함")
+
+    print("3) 절반 이상 동시 저하 → NEWNYM + 전체 교체")
+    register_all()
+    for c in (pool.circuits[0], pool.circuits[2]):
+        feed(c, LATENCY_THRESHOLD + 5, True)
+    mon.check()
+    expect("SIGNAL NEWNYM" in srv.commands, "SIGNAL NEWNYM 전송")
+    expect(all(c.renewals >= 1 for c in pool.circuits), "모든 회로 교체")
+
+    print("4) NEWNYM 쿨다운 중에는 다시 보내지 않고 회로별 교체로 대응")
+    before = srv.commands.count("SIGNAL NEWNYM")
+    generations = [c.generation for c in pool.circuits]
+    for c in pool.circuits:
+        c.renewed_at = 0.0
+        feed(c, LATENCY_THRESHOLD + 5, True)
+    mon.check()
+    expect(srv.commands.count("SIGNAL NEWNYM") == before, f"NEWNYM 쿨다운({NEWNYM_COOLDOWN:.0f}s) 준수")
+    expect(all(c.generation == g + 1 for c, g in zip(pool.circuits, generations)), "저하된 회로는 각각 교체")
+
+    print("5) control port 연결 불가여도 인증 정보 교체는 계속")
+    dead = CircuitMonitor(tor_circuits.CircuitPool(2), TorController(port=1, timeout=0.5))
+    c0 = dead.pool.circuits[0]
+    for _ in range(MIN_SAMPLES):
+        c0.inflight += 1
+        dead.pool.release(c0, LATENCY_THRESHOLD + 1, True)
+    dead.check()
+    expect(c0.generation == 1, "control port 없이 회로 교체")
+    expect(dead._control_down_until > time.monotonic(), f"control port 재시도는 {CONTROL_RETRY:.0f}s 뒤로 미룸")
+
+    print("6) 회로 교체가 그 회로에서 진행 중인 요청을 끊지 않음")
+    if tor_circuits.httpx is None:
+        print("  [SKIP] httpx 없음")
+    else:
+        import asyncio
+        body, fast_status, failures_seen, retired_left = asyncio.run(_inflight_rotation_check())
+        expect(body == _SLOW_BODY, "교체 전에 시작한 요청의 본문을 끝까지 받음")
+        expect(fast_status == 200, "교체 후 요청은 새 연결 풀로 전송")
+        expect(failures_seen == 0, "교체로 인한 요청 실패 기록 없음")
+        expect(retired_left == 0, "진행 중 요청이 끝난 뒤 이전 연결 풀을 닫음")
+
+    srv.shutdown()
+    print("\n조치 기록:")
+    for e in mon.events:
+        print(f"  {e}")
+    print(f"\n결과: {'통과' if not failures else f'실패 {len(failures)}건'}")
+    return 1 if failures else 0
+
+
+def print_status():
+    ctl = TorController()
+    try:
+        rows = ctl.circuits()
+    except (OSError, ControlError) as e:
+        print(f"control port {ctl.host}:{ctl.port} 연결 실패: {e}")
+        sys.exit(1)
+    for cid, status, user in rows:
+        print(f"{cid:>5} {status:<9} {user or '-'}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if "--selftest" in sys.argv:
+        sys.exit(selftest())
+    print_status()
@@ -0,0 +1,274 @@
+# tracing.py
+"""
+크롤 → 파싱 → 저장 구간을 span으로 기록하는 경량 트레이싱 (외부 의존성 없음).
+
+- span: 이름, trace/span/parent id, 시작 시각, 소요 시간, 속성, 상태(ok/error)
+  · fetch (fetch.py): url, host, status, bytes, circuit, cache, coalesced
+  · parse (크롤러): kind, bytes, elements 등 파싱 결과 수
+  · write (크롤러): rows, bytes
+  · crawl (러너): 크롤러 1회 실행 전체. 위 span들의 부모
+  crawl_metrics.span()이 같은 이름의 span을 함께 만들므로 기존 계측 지점은 그대로 trace에 나옴
+- 부모-자식 관계는 ContextVar로 이어지므로 to_thread/asyncio.run/gather 안의 span도 crawl 아래에 붙음.
+  subprocess 모드는 러너가 CRAWL_TRACE_ID / CRAWL_TRACE_PARENT 로 trace를 넘겨줌
+- 출력: CRAWL_TRACE=jsonl(또는 1) 이면 한 줄에 span 하나, CRAWL_TRACE=otlp 면 한 줄에 OTLP/JSON
+  ExportTraceServiceRequest 하나 (OpenTelemetry Collector의 otlpjsonfile receiver로 읽을 수 있음).
+  위치는 CRAWL_TRACE_DIR(기본 outputs/traces)/traces-<날짜>-<pid>.jsonl, 러너는 --trace [jsonl|otlp]
+- 꺼져 있으면 span()은 아무것도 기록하지 않는 객체를 돌려줌
+
+`python3 tracing.py [디렉터리 또는 파일]` 로 크롤러별 구간 시간 합계와 호스트별 fetch 지연 분포를 출력합니다.
+"""
+
+import contextlib
+import contextvars
+import dataclasses
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_ENV = "CRAWL_TRACE"
+TRACE_DIR_ENV = "CRAWL_TRACE_DIR"
+TRACE_ID_ENV = "CRAWL_TRACE_ID"
+PARENT_ENV = "CRAWL_TRACE_PARENT"
+DEFAULT_DIR = Path("outputs/traces")
+FORMATS = ("jsonl", "otlp")
+
+# 호스트별 지연 히스토그램 경계(ms). crawl_metrics와 tracing.py 요약이 같이 사용
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+def trace_format() -> Optional[str]:
+    value = os.environ.get(TRACE_ENV, "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return None
+    return value if value in FORMATS else "jsonl"
+
+
+@dataclasses.dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float                         # epoch 초
+    attributes: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def __post_init__(self):
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def set_error(self, exc: BaseException):
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        d = dataclasses.asdict(self)
+        d["start"] = round(self.start, 6)
+        return d
+
+
+class _NoopSpan:
+    """트레이싱이 꺼져 있을 때 span() 블록이 받는 객체"""
+    trace_id = span_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def set_error(self, exc: BaseException):
+        pass
+
+
+NOOP = _NoopSpan()
+
+_CURRENT: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+def current():
+    return _CURRENT.get() or NOOP
+
+
+def _otlp_value(v) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def _otlp(span: Span, crawler: str) -> dict:
+    start_ns = int(span.start * 1e9)
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int((span.duration_ms or 0) * 1e6)),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+    }
+    if span.parent_id:
+        otlp_span["parentSpanId"] = span.parent_id
+    resource = [{"key": "service.name", "value": {"stringValue": "crawling"}},
+                {"key": "crawler", "value": {"stringValue": crawler}}]
+    return {"resourceSpans": [{"resource": {"attributes": resource},
+                               "scopeSpans": [{"scope": {"name": "crawling.tracing"}, "spans": [otlp_span]}]}]}
+
+
+class FileSink:
+    """프로세스당 하루 한 파일에 span을 한 줄씩 덧붙이는 출력 (스레드 안전)"""
+    def __init__(self, directory: Path, fmt: str = "jsonl"):
+        self.directory = Path(directory)
+        self.fmt = fmt
+        self._lock = threading.Lock()
+
+    def path(self) -> Path:
+        return self.directory / f"traces-{datetime.now().strftime('%Y%m%d')}-{os.getpid()}.jsonl"
+
+    def export(self, span: Span, crawler: str):
+        if self.fmt == "otlp":
+            doc = _otlp(span, crawler)
+        else:
+            doc = {"crawler": crawler, **span.to_dict()}
+        line = json.dumps(doc, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            path = self.path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+
+_sink: Optional[FileSink] = None
+_sink_lock = threading.Lock()
+
+
+def sink() -> Optional[FileSink]:
+    """환경 변수로 설정한 출력 (꺼져 있으면 None). 러너가 환경 변수를 바꾸면 다음 호출부터 반영"""
+    global _sink
+    fmt = trace_format()
+    if fmt is None:
+        return None
+    directory = Path(os.environ.get(TRACE_DIR_ENV) or DEFAULT_DIR)
+    with _sink_lock:
+        if _sink is None or _sink.fmt != fmt or _sink.directory != directory:
+            _sink = FileSink(directory, fmt)
+        return _sink
+
+
+def _crawler() -> str:
+    import tor_budget  # 크롤러 이름은 러너가 태스크 컨텍스트에 설정 (subprocess는 환경 변수)
+    return tor_budget.CURRENT_CRAWLER.get()
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """블록을 span 하나로 기록합니다. 블록 안에서 span.set(...)으로 속성 추가, 예외면 error 상태"""
+    out = sink()
+    if out is None:
+        yield NOOP
+        return
+    parent = _CURRENT.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id = os.environ.get(TRACE_ID_ENV) or secrets.token_hex(16)
+        parent_id = os.environ.get(PARENT_ENV) or None
+    s = Span(name, trace_id, secrets.token_hex(8), parent_id, time.time())
+    s.set(**attributes)
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set_error(e)
+        raise
+    finally:
+        _CURRENT.reset(token)
+        s.finish()
+        out.export(s, _crawler())
+
+
+# ── 요약 (CLI) ──
+def read_spans(path: Path) -> Iterator[dict]:
+    files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+    for p in files:
+        with p.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    doc = json.loads(line)
+                except ValueError:
+                    continue
+                if "resourceSpans" not in doc:
+                    yield doc
+                    continue
+                for rs in doc["resourceSpans"]:
+                    attrs = {a["key"]: next(iter(a["value"].values())) for a in rs["resource"]["attributes"]}
+                    for ss in rs["scopeSpans"]:
+                        for sp in ss["spans"]:
+                            start, end = int(sp["startTimeUnixNano"]), int(sp["endTimeUnixNano"])
+                            yield {
+                                "crawler": attrs.get("crawler", "unknown"),
+                                "name": sp["name"],
+                                "duration_ms": (end - start) / 1e6,
+                                "status": "error" if sp.get("status", {}).get("code") == 2 else "ok",
+                                "attributes": {a["key"]: next(iter(a["value"].values())) for a in sp["attributes"]},
+                            }
+
+
+def bucket_label(ms: float) -> str:
+    for le in LATENCY_BUCKETS_MS:
+        if ms <= le:
+            return f"≤{le}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+
+def print_summary(path: Path):
+    by_name: Dict[tuple, List[float]] = defaultdict(list)
+    errors: Dict[tuple, int] = defaultdict(int)
+    hosts: Dict[str, List[float]] = defaultdict(list)
+    host_bytes: Dict[str, int] = defaultdict(int)
+    for sp in read_spans(path):
+        key = (sp.get("crawler", "unknown"), sp["name"])
+        by_name[key].append(sp["duration_ms"] or 0.0)
+        if sp.get("status") == "error":
+            errors[key] += 1
+        if sp["name"] == "fetch":
+            host = sp["attributes"].get("host", "?")
+            hosts[host].append(sp["duration_ms"] or 0.0)
+            host_bytes[host] += int(sp["attributes"].get("bytes") or 0)
+
+    print(f"{'crawler':<20} {'span':<10} {'count':>7} {'errors':>7} {'total(s)':>10} {'p50(ms)':>9} {'p90(ms)':>9}")
+    for (crawler, name), values in sorted(by_name.items()):
+        v = sorted(values)
+        print(f"{crawler:<20} {name:<10} {len(v):>7} {errors[(crawler, name)]:>7} {sum(v) / 1000:>10.2f} "
+              f"{v[len(v) // 2]:>9.0f} {v[min(len(v) - 1, int(len(v) * 0.9))]:>9.0f}")
+
+    labels = [f"≤{le}ms" for le in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    for host, values in sorted(hosts.items()):
+        counts = defaultdict(int)
+        for ms in values:
+            counts[bucket_label(ms)] += 1
+        print(f"\n{host}  (fetch {len(values)}회, {host_bytes[host] / 1024:.1f}KB)")
+        peak = max(counts.values())
+        for label in labels:
+            if counts[label]:
+                print(f"  {label:>9} {counts[label]:>6} {'#' * max(1, round(40 * counts[label] / peak))}")
+
+
+if __name__ == "__main__":
+    print_summary(Path(sys.argv[1]) if len(sys.argv) > 1 else Path(os.environ.get(TRACE_DIR_ENV) or DEFAULT_DIR))
@@ -0,0 +1,246 @@
+# warc_archive.py
+"""
+크롤러 요청/응답을 WARC 파일로 기록하고, 기록한 응답을 네트워크 대신 돌려주는 재생 모드.
+
+Tor로 다시 가지 않고도 파서 변경/성능 작업을 같은 입력으로 빠르게 반복 실행하고 비교하기 위함입니다.
+- 기록: CRAWL_WARC_RECORD=<디렉터리> (러너는 --warc-record [DIR], 기본 outputs/warc)
+  fetch.py의 Fetcher가 전송 계층에서 request/response 레코드 쌍을 씀 (리다이렉트 각 단계 포함,
+  본문은 Content-Encoding 그대로의 원본 바이트). Fetcher 하나(크롤러 1회 실행)당 파일 하나:
+  <디렉터리>/<크롤러>-<시각>-<pid>-<번호>.warc.gz, 레코드마다 gzip 멤버 하나라 중간에 죽어도 앞부분은 읽힘
+- 재생: CRAWL_WARC_REPLAY=<파일 또는 디렉터리> (러너는 --warc-replay PATH)
+  Fetcher가 Tor/프록시/예산/캐시 없이 WARC의 응답을 돌려줌. 같은 URL이 여러 번 있으면 나중 기록을 사용,
+  기록에 없는 URL은 ConnectError(재시도 없음). .onion 가용성 기록도 건드리지 않음
+- selenium 크롤러는 selenium-wire로 잡은 트래픽을 같은 형식으로 기록 (save_network_data), 재생은 httpx 크롤러만
+
+형식은 WARC/1.1 (warcinfo / request / response 레코드, WARC-Block-Digest sha1) 이라 warcio 등 표준 도구로 열 수 있습니다.
+`python3 warc_archive.py <파일 또는 디렉터리>` 로 레코드 목록을 출력합니다.
+"""
+
+import base64
+import gzip
+import hashlib
+import itertools
+import os
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # selenium 크롤러(requests 전용 환경)에서도 WarcWriter는 사용 가능
+    httpx = None
+
+RECORD_ENV = "CRAWL_WARC_RECORD"
+REPLAY_ENV = "CRAWL_WARC_REPLAY"
+DEFAULT_DIR = Path("outputs/warc")
+
+# 재기록하지 않는 헤더 (본문은 이미 청크 해제된 상태로 저장)
+_HOP_HEADERS = {"transfer-encoding"}
+
+_counter = itertools.count()
+
+
+def recording() -> Optional[Path]:
+    value = os.environ.get(RECORD_ENV, "").strip()
+    return Path(value) if value else None
+
+
+def replaying() -> Optional[Path]:
+    value = os.environ.get(REPLAY_ENV, "").strip()
+    return Path(value) if value else None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _digest(block: bytes) -> str:
+    return "sha1:" + base64.b32encode(hashlib.sha1(block).digest()).decode("ascii")
+
+
+def _http_head(first_line: str, headers: Iterable[Tuple[str, str]]) -> bytes:
+    lines = [first_line] + [f"{k}: {v}" for k, v in headers if k.lower() not in _HOP_HEADERS]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1", "replace")
+
+
+class WarcWriter:
+    """WARC 파일 하나에 레코드를 덧붙이는 기록기 (스레드 안전)"""
+    def __init__(self, path: Path, software: str = "crawling"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.records = 0
+        self._lock = threading.Lock()
+        info = f"software: {software}\r\nformat: WARC File Format 1.1\r\n".encode("utf-8")
+        self._write("warcinfo", None, "application/warc-fields", info, {"WARC-Filename": self.path.name})
+
+    @classmethod
+    def for_crawler(cls, crawler: str, directory: Optional[Path] = None) -> "WarcWriter":
+        directory = Path(directory or recording() or DEFAULT_DIR)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return cls(directory / f"{crawler}-{stamp}-{os.getpid()}-{next(_counter)}.warc.gz")
+
+    def _write(self, warc_type: str, uri: Optional[str], content_type: str, block: bytes,
+               extra: Optional[Dict[str, str]] = None) -> str:
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        fields = {
+            "WARC-Type": warc_type,
+            "WARC-Record-ID": record_id,
+            "WARC-Date": _now(),
+        }
+        if uri:
+            fields["WARC-Target-URI"] = uri
+        fields.update(extra or {})
+        fields["WARC-Block-Digest"] = _digest(block)
+        fields["Content-Type"] = content_type
+        fields["Content-Length"] = str(len(block))
+        head = "WARC/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in fields.items()) + "\r\n"
+        member = gzip.compress(head.encode("utf-8") + block + b"\r\n\r\n")
+        with self._lock:
+            with self.path.open("ab") as f:
+                f.write(member)
+            self.records += 1
+        return record_id
+
+    def write_exchange(self, method: str, url: str, request_headers: Iterable[Tuple[str, str]],
+                       status: int, reason: str, response_headers: Iterable[Tuple[str, str]],
+                       body: bytes, http_version: str = "HTTP/1.1"):
+        """요청/응답 한 쌍 기록. body는 서버가 보낸 그대로(Content-Encoding 적용 상태)의 본문"""
+        target = url.split("://", 1)[-1].partition("/")[2]
+        request_block = _http_head(f"{method} /{target} {http_version}", request_headers)
+        response_block = _http_head(f"{http_version} {status} {reason}".rstrip(), response_headers) + body
+        response_id = self._write("response", url, "application/http;msgtype=response", response_block)
+        self._write("request", url, "application/http;msgtype=request", request_block,
+                    {"WARC-Concurrent-To": response_id})
+
+
+def iter_records(path: Path) -> Iterator[Tuple[Dict[str, str], bytes]]:
+    """WARC(.warc 또는 .warc.gz) 레코드를 (헤더 dict, 블록) 으로 순회 (끝이 잘린 레코드는 버림)"""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as f:
+        while True:
+            try:
+                line = f.readline()
+            except (EOFError, OSError):
+                return  # 기록 중 중단된 마지막 gzip 멤버
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                raise ValueError(f"{path}: WARC 레코드가 아님: {line[:40]!r}")
+            fields = {}
+            for raw in iter(f.readline, b"\r\n"):
+                if not raw:
+                    return
+                k, _, v = raw.decode("utf-8", "replace").partition(":")
+                fields[k.strip()] = v.strip()
+            try:
+                block = f.read(int(fields.get("Content-Length", 0)))
+            except (EOFError, OSError):
+                return
+            yield fields, block
+
+
+def _parse_response(block: bytes) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = []
+    for line in lines[1:]:
+        k, _, v = line.partition(":")
+        headers.append((k.strip(), v.strip()))
+    return status, headers, body
+
+
+def warc_files(path: Path) -> List[Path]:
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.name.endswith((".warc", ".warc.gz")))
+    return [path]
+
+
+class Archive:
+    """재생용 색인: URL → (status, headers, body). 여러 파일이면 이름 순으로 읽어 나중 기록이 우선"""
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.responses: Dict[str, Tuple[int, List[Tuple[str, str]], bytes]] = {}
+        self.files = warc_files(self.path)
+        for p in self.files:
+            for fields, block in iter_records(p):
+                if fields.get("WARC-Type") == "response" and fields.get("WARC-Target-URI"):
+                    self.responses[fields["WARC-Target-URI"]] = _parse_response(block)
+        self.served = 0
+        self.missed = 0
+
+    def get(self, url: str):
+        return self.responses.get(url)
+
+
+_archives: Dict[Path, Archive] = {}
+_archives_lock = threading.Lock()
+
+
+def archive(path: Optional[Path] = None) -> Archive:
+    """프로세스 공용 재생 색인 (in-process 모드에서는 크롤러들이 함께 사용)"""
+    path = Path(path or replaying())
+    with _archives_lock:
+        a = _archives.get(path)
+        if a is None:
+            a = _archives[path] = Archive(path)
+            print(f"[warc] 재생: {len(a.files)}개 파일, 응답 {len(a.responses)}개 ({path})")
+        return a
+
+
+if httpx is not None:
+    class RecordingAsyncTransport(httpx.AsyncBaseTransport):
+        """전송 계층 응답 본문을 끝까지 읽어 WARC에 기록한 뒤 그대로 돌려주는 전송 계층"""
+        def __init__(self, transport: httpx.AsyncBaseTransport, writer: WarcWriter):
+            self._transport = transport
+            self.writer = writer
+
+        async def handle_async_request(self, request):
+            response = await self._transport.handle_async_request(request)
+            try:
+                body = b"".join([chunk async for chunk in response.stream])
+            finally:
+                await response.stream.aclose()
+            version = response.extensions.get("http_version", b"HTTP/1.1")
+            version = version.decode("ascii") if isinstance(version, bytes) else str(version)
+            reason = response.extensions.get("reason_phrase", b"")
+            reason = reason.decode("latin-1") if isinstance(reason, bytes) else str(reason)
+            self.writer.write_exchange(request.method, str(request.url), request.headers.multi_items(),
+                                       response.status_code, reason, response.headers.multi_items(),
+                                       body, version)
+            return httpx.Response(status_code=response.status_code, headers=response.headers,
+                                  stream=httpx.ByteStream(body), extensions=response.extensions)
+
+        async def aclose(self):
+            await self._transport.aclose()
+
+    class ReplayAsyncTransport(httpx.AsyncBaseTransport):
+        """네트워크 대신 WARC에 기록된 응답을 돌려주는 전송 계층"""
+        def __init__(self, archive: Archive):
+            self.archive = archive
+
+        async def handle_async_request(self, request):
+            hit = self.archive.get(str(request.url)) if request.method == "GET" else None
+            if hit is None:
+                self.archive.missed += 1
+                raise httpx.ConnectError(f"WARC 기록에 없음: {request.method} {request.url}", request=request)
+            self.archive.served += 1
+            status, headers, body = hit
+            return httpx.Response(status_code=status, headers=headers, stream=httpx.ByteStream(body))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python3 warc_archive.py <WARC 파일 또는 디렉터리>")
+    for p in warc_files(Path(sys.argv[1])):
+        print(f"== {p}")
+        for fields, block in iter_records(p):
+            if fields.get("WARC-Type") == "response":
+                status, _, body = _parse_response(block)
+                print(f"  {status} {len(body):>9}B  {fields.get('WARC-Target-URI')}")
@@ -8,6 +8,9 @@ import json
 import logging
 from urllib.parse import urlparse
 from functools import lru_cache
+from lib.weights_presets import DEFAULT_WEIGHTS, normalize
+from lib.scoring import (NMAX, sens_score, vol_score, exp_stage, exp_score, actor_score, rec_score,
+                         evid_score, mentions_score, cross_score, to_norm, sev_level)
 
 try:
     import plotly.express as px
@@ -410,94 +413,10 @@ def infer_victim_country_iso3_offline(row: dict) -> str|None:
 
 df["victim_country_iso3"] = [infer_victim_country_iso3_offline(rec) for rec in df.to_dict(orient="records")]
 
-SENS_PATS = [("wallet_keys", r"\b(private key|seed phrase|mnemonic|wallet\.dat|api key|jwt|ssh key)\b", 50),("pii", r"\b(personal data|pii|ssn|passport|national id|주민등록|여권|운전면허)\b", 40),("financial", r"\b(credit card|iban|bank|송금|계좌|financial)\b", 40),("credentials", r"\b(credentials?|passwords?|hash(?:es)?|combo(?:list)?|stealer logs?|cookies?)\b", 35),("db_dump", r"\b(database|db dump|sql dump|backup|mongodb|postgres|mysql)\b", 35),("source_code", r"\b(source code|git leak|repository)\b", 25),("access_infra", r"\b(vpn|rdp|citrix|okta|admin panel|zimbra|o365)\b", 25),("lists", r"\b(email lists?|phone lists?|dox|fullz)\b", 20)]
-RANSOM = {"lockbit","blackcat","alphv","play","cl0p","medusa","black basta","akira","8base","bianlian","cactus","ragroup","cuba","royal","conti","ransomh0use","anubis"}
-HACKT = {"dragonforce","dragonforce malaysia","killnet","anonymous","thunderspy"}
-RESELL = {"coinbase cartel","xss","breachforums","raid"}
-
-def sens_score(t):
-    best = 0
-    for _, pat, w in SENS_PATS:
-        if re.search(pat, t):
-            best = max(best, w)
-    return best
-
-def vol_score(g):
-    if pd.isna(g):
-        return 0
-    if g >= 100:
-        return 30
-    if g >= 10:
-        return 22
-    if g >= 1:
-        return 15
-    if g >= 0.1:
-        return 8
-    return 4
-
-def exp_stage(t, row):
-    isp = False
-    if "is_published" in row and pd.notna(row["is_published"]):
-        isp = str(row["is_published"]).strip().lower() in {"1","true","yes"}
-    if isp or re.search(r"\b(leaked|published|dumped|released)\b", t):
-        return "published"
-    if re.search(r"\b(for sale|selling|price|btc|xmr|monero|bitcoin)\b", t):
-        return "for_sale"
-    if re.search(r"\b(countdown|leak in|time until)\b", t) or ("time_until_publication" in row and pd.notna(row["time_until_publication"])):
-        return "announced"
-    return "listed"
-
-def exp_score(stage):
-    return {"published":30, "for_sale":20, "announced":15, "listed":10}.get(stage, 10)
-
-def actor_score(t):
-    s = 0
-    if any(a in t for a in RANSOM):
-        s = max(s, 20)
-    if any(a in t for a in HACKT):
-        s = max(s, 12)
-    if any(a in t for a in RESELL):
-        s = max(s, 8)
-    return s
-
-def rec_score(ts):
-    if pd.isna(ts):
-        return 5
-    now = pd.Timestamp.now(tz="UTC")
-    ts = pd.to_datetime(ts, utc=True, errors="coerce")
-    if pd.isna(ts):
-        return 5
-    days = (now - ts).days
-    if days <= 7:
-        return 15
-    if days <= 30:
-        return 10
-    if days <= 90:
-        return 7
-    return 5
-
-def evid_score(row, t):
-    fields = ["attachment_urls","media","files_api_present","extracted_emails","extracted_domains"]
-    ok = any((c in row and pd.notna(row[c]) and str(row[c]).strip() not in {"[]","{}",""}) for c in fields)
-    if ok:
-        return 10
-    return 8 if re.search(r"\b(screenshot|sample|proof|poc)\b", t) else 0
-
-def mentions_score(t):
-    s = 0
-    if re.search(r"\b(admin|root|privileged|domain admin|global admin)\b", t):
-        s += 10
-    if re.search(r"\b(okta|adfs|azure ad|o365|exchange)\b", t):
-        s += 5
-    if re.search(r"\b(ransom|btc|xmr|monero|bitcoin|demand)\b", t):
-        s += 8
-    return min(s, 23)
-
 dup = df.groupby(df["__company_norm"])["__dataset"].nunique()
-cross_keys = set(dup[dup > 1].index)
 
-def cross_score(norm):
-    return 10 if norm and norm in cross_keys else 0
+def company_cross_score(norm):
+    return cross_score(dup.get(norm, 0) if norm else 0)
 
 raw = pd.DataFrame({
     "__dataset": df["__dataset"],
@@ -515,20 +434,11 @@ raw["actor"] = df["__text"].apply(actor_score)
 raw["recency"] = df["__ts"].apply(rec_score)
 raw["evidence"] = [evid_score(r, t) for r, t in zip(df.to_dict(orient="records"), df["__text"])]
 raw["mentions"] = df["__text"].apply(mentions_score)
-raw["cross"] = df["__company_norm"].apply(cross_score)
+raw["cross"] = df["__company_norm"].apply(company_cross_score)
 
 st.sidebar.header("⚖️ 현재 가중치")
-DEFAULT_WEIGHTS = {"sensitivity":25,"volume":10,"actor":15,"exposure":20,"recency":10,"evidence":10,"mentions":5,"cross":5}
-
-def _normalize(ws: dict) -> dict:
-    t = sum(ws.values())
-    if t <= 0:
-        ws = DEFAULT_WEIGHTS.copy()
-        t = sum(ws.values())
-    return {k: (v / t) * 100 for k, v in ws.items()}
-
 weights_raw = st.session_state.get("weights_raw", DEFAULT_WEIGHTS.copy())
-norm_w = st.session_state.get("weights_norm", _normalize(weights_raw))
+norm_w = st.session_state.get("weights_norm", normalize(weights_raw))
 st.sidebar.caption(f"합계: {sum(weights_raw.values())} → 내부 환산 100 기준")
 
 w_df = pd.DataFrame({"component": list(norm_w.keys()), "weight": list(norm_w.values())})
@@ -541,12 +451,9 @@ try:
 except Exception:
     st.sidebar.info("좌측 Pages 메뉴에서 가중치 관련 페이지로 이동하세요.")
 
-def to_norm(val, maxv): return max(0.0, min(1.0, float(val)/maxv if maxv>0 else 0.0))
-NMAX = {"sensitivity":50,"volume":30,"actor":20,"exposure":30,"recency":15,"evidence":10,"mentions":23,"cross":10}
 for k in NMAX:
     raw[f"n_{k}"] = raw[k].apply(lambda v: to_norm(v, NMAX[k]))
 raw["severity_score"] = sum(raw[f"n_{k}"] * norm_w[k] for k in NMAX)
-def sev_level(s): return "CRITICAL" if s>=80 else "HIGH" if s>=60 else "MEDIUM" if s>=40 else "LOW" if s>=20 else "INFO"
 raw["severity_level"] = raw["severity_score"].apply(sev_level)
 
 st.sidebar.header("🔎 필터")
@@ -0,0 +1,140 @@
+# lib/scoring.py
+"""
+심각도 점수 규칙 (대시보드 app.py 와 crawling/post_crawl.py 의 score 단계가 함께 사용).
+pandas 없이 표준 라이브러리만 사용합니다. 결측값은 None / NaN / NaT / 빈 문자열 모두 '없음'으로 봅니다.
+가중치는 lib/weights_presets.py 의 DEFAULT_WEIGHTS / normalize 를 사용하세요.
+"""
+import re
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+SENS_PATS = [
+    ("wallet_keys", r"\b(private key|seed phrase|mnemonic|wallet\.dat|api key|jwt|ssh key)\b", 50),
+    ("pii", r"\b(personal data|pii|ssn|passport|national id|주민등록|여권|운전면허)\b", 40),
+    ("financial", r"\b(credit card|iban|bank|송금|계좌|financial)\b", 40),
+    ("credentials", r"\b(credentials?|passwords?|hash(?:es)?|combo(?:list)?|stealer logs?|cookies?)\b", 35),
+    ("db_dump", r"\b(database|db dump|sql dump|backup|mongodb|postgres|mysql)\b", 35),
+    ("source_code", r"\b(source code|git leak|repository)\b", 25),
+    ("access_infra", r"\b(vpn|rdp|citrix|okta|admin panel|zimbra|o365)\b", 25),
+    ("lists", r"\b(email lists?|phone lists?|dox|fullz)\b", 20),
+]
+RANSOM = {"lockbit","blackcat","alphv","play","cl0p","medusa","black basta","akira","8base","bianlian","cactus","ragroup","cuba","royal","conti","ransomh0use","anubis"}
+HACKT = {"dragonforce","dragonforce malaysia","killnet","anonymous","thunderspy"}
+RESELL = {"coinbase cartel","xss","breachforums","raid"}
+
+# 구성요소별 최대 원점수 (0~1 정규화 기준)
+NMAX = {"sensitivity":50,"volume":30,"actor":20,"exposure":30,"recency":15,"evidence":10,"mentions":23,"cross":10}
+EXPOSURE_SCORES = {"published":30, "for_sale":20, "announced":15, "listed":10}
+EVIDENCE_FIELDS = ["attachment_urls","media","files_api_present","extracted_emails","extracted_domains"]
+
+
+def isna(v) -> bool:
+    if v is None:
+        return True
+    try:
+        return bool(v != v)  # NaN / NaT
+    except TypeError:
+        return True  # pd.NA
+
+
+def _present(v) -> bool:
+    return not isna(v) and str(v).strip() not in {"", "[]", "{}"}
+
+
+def sens_score(t: str) -> int:
+    return max((w for _, pat, w in SENS_PATS if re.search(pat, t)), default=0)
+
+
+def vol_score(g) -> int:
+    if isna(g):
+        return 0
+    if g >= 100:
+        return 30
+    if g >= 10:
+        return 22
+    if g >= 1:
+        return 15
+    if g >= 0.1:
+        return 8
+    return 4
+
+
+def exp_stage(t: str, row: Mapping) -> str:
+    isp = _present(row.get("is_published")) and str(row["is_published"]).strip().lower() in {"1","true","yes"}
+    if isp or re.search(r"\b(leaked|published|dumped|released)\b", t):
+        return "published"
+    if re.search(r"\b(for sale|selling|price|btc|xmr|monero|bitcoin)\b", t):
+        return "for_sale"
+    if re.search(r"\b(countdown|leak in|time until)\b", t) or _present(row.get("time_until_publication")):
+        return "announced"
+    return "listed"
+
+
+def exp_score(stage: str) -> int:
+    return EXPOSURE_SCORES.get(stage, 10)
+
+
+def actor_score(t: str) -> int:
+    if any(a in t for a in RANSOM):
+        return 20
+    if any(a in t for a in HACKT):
+        return 12
+    if any(a in t for a in RESELL):
+        return 8
+    return 0
+
+
+def rec_score(ts, now: Optional[datetime] = None) -> int:
+    """ts: datetime(pd.Timestamp 포함) 또는 ISO 문자열. tz 없는 값은 UTC로 간주"""
+    if isna(ts):
+        return 5
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        except ValueError:
+            return 5
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    days = ((now or datetime.now(timezone.utc)) - ts).days
+    if days <= 7:
+        return 15
+    if days <= 30:
+        return 10
+    if days <= 90:
+        return 7
+    return 5
+
+
+def evid_score(row: Mapping, t: str) -> int:
+    if any(_present(row.get(c)) for c in EVIDENCE_FIELDS):
+        return 10
+    return 8 if re.search(r"\b(screenshot|sample|proof|poc)\b", t) else 0
+
+
+def mentions_score(t: str) -> int:
+    s = 0
+    if re.search(r"\b(admin|root|privileged|domain admin|global admin)\b", t):
+        s += 10
+    if re.search(r"\b(okta|adfs|azure ad|o365|exchange)\b", t):
+        s += 5
+    if re.search(r"\b(ransom|btc|xmr|monero|bitcoin|demand)\b", t):
+        s += 8
+    return min(s, 23)
+
+
+def cross_score(n_sources: int) -> int:
+    """같은 회사가 올라온 서로 다른 소스 수"""
+    return 10 if n_sources > 1 else 0
+
+
+def to_norm(val, maxv) -> float:
+    return max(0.0, min(1.0, float(val)/maxv if maxv>0 else 0.0))
+
+
+def severity(comp: Mapping[str, float], norm_w: Dict[str, float]) -> float:
+    """구성요소 원점수 dict + normalize() 된 가중치 → 0~100 점수"""
+    return sum(to_norm(comp[k], NMAX[k]) * norm_w.get(k, 0) for k in NMAX)
+
+
+def sev_level(s: float) -> str:
+    return "CRITICAL" if s>=80 else "HIGH" if s>=60 else "MEDIUM" if s>=40 else "LOW" if s>=20 else "INFO"